@@ -0,0 +1,48 @@
+"""
+Synthetic catalog generator for benchmarks.
+"""
+import random
+
+from django.apps import apps
+from django.db import transaction
+
+from djcat import settings
+from djcat.register import CatalogItem
+
+ITEM_CLASS = 'catalog_module_realty.models.FlatBuy'
+
+
+def random_name(prefix):
+    return '{} {:08x}'.format(prefix, random.getrandbits(32))
+
+
+def create_item(category, item_class):
+    return item_class.class_obj.objects.create(category=category, price=random.randint(1, 1000000), active=True,
+                                               building_type=random.randint(1, 5), room=random.randint(1, 11))
+
+
+@transaction.atomic
+def generate_catalog(depth, fanout, items_per_endpoint, unique_ratio=0.3):
+    """
+    Create catalog tree: fanout roots, every inner node has fanout children, leaves at depth are endpoints with items
+    :param depth: Integer, tree depth (levels count)
+    :param fanout: Integer, children per node
+    :param items_per_endpoint: Integer, items created in every endpoint
+    :param unique_ratio: Float, share of inner categories unique in path
+    :return: Dictionary: 'categories' - list of levels, 'endpoints' - list, 'items' - list
+    """
+    CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+    item_class = CatalogItem.get_item_by_class(ITEM_CLASS)
+    levels = [[CategoryModel.objects.create(name=random_name('root'), is_active=True) for x in range(fanout)]]
+    for level in range(1, depth):
+        endpoint = level == depth - 1
+        levels.append([])
+        for parent in levels[level - 1]:
+            for x in range(fanout):
+                levels[level].append(CategoryModel.objects.create(
+                    name=random_name('node'), parent=parent, is_active=True,
+                    is_unique_in_path=random.random() < unique_ratio,
+                    item_class=ITEM_CLASS if endpoint else None))
+    endpoints = [CategoryModel.objects.get(pk=n.pk) for n in levels[-1]]
+    items = [create_item(e, item_class) for e in endpoints for x in range(items_per_endpoint)]
+    return {'categories': levels, 'endpoints': endpoints, 'items': items}
@@ -0,0 +1,114 @@
+"""
+Common benchmark helpers: django setup on in-memory SQLite test database, timing and query counting.
+"""
+import os
+import sys
+import json
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TESTS_DIR = os.path.join(BASE_DIR, 'tests')
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, TESTS_DIR)
+
+
+def setup_django():
+    """
+    Configure django with test project settings and create in-memory test database
+    :return: Database connection
+    """
+    import django
+    from django.conf import settings
+    from test_settings import settings as test_settings
+
+    databases = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}}
+    settings.configure(**dict(test_settings, DATABASES=databases, DJCAT_DEBUG_FILE=os.devnull))
+    django.setup()
+
+    from django.db import connection
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+    # registry attributes are loaded on app ready only if category table exists
+    from djcat.register import CatalogItem
+    CatalogItem.load_items_attributes()
+    return connection
+
+
+def percentile(values, p):
+    """
+    Return percentile of values
+    :param values: List of numbers
+    :param p: Integer, percentile 0..100
+    :return: Number
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    k = (len(values) - 1) * p / 100.0
+    f = int(k)
+    c = min(f + 1, len(values) - 1)
+    return values[f] + (values[c] - values[f]) * (k - f)
+
+
+class Measure:
+    """
+    Collect timings (ms) and query counts of repeated operation, usage:
+        m = Measure('resolve')
+        for x in range(100):
+            with m:
+                Path(path='...')
+        m.result()
+    """
+    def __init__(self, name):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self.name = name
+        self.timings = []
+        self.queries = []
+        self._connection = connection
+        self._capture = CaptureQueriesContext(connection)
+        self._start = None
+
+    def __enter__(self):
+        # queries log is bounded deque, keep it short so counts stay exact
+        self._connection.queries_log.clear()
+        self._capture.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.timings.append((time.perf_counter() - self._start) * 1000)
+        self._capture.__exit__(*args)
+        self.queries.append(len(self._capture))
+
+    def result(self):
+        return {
+            'name': self.name,
+            'runs': len(self.timings),
+            'p50_ms': percentile(self.timings, 50),
+            'p90_ms': percentile(self.timings, 90),
+            'p99_ms': percentile(self.timings, 99),
+            'max_ms': max(self.timings) if self.timings else None,
+            'queries_avg': sum(self.queries) / len(self.queries) if self.queries else None,
+            'queries_max': max(self.queries) if self.queries else None,
+        }
+
+
+def print_results(results):
+    print('{:<40} {:>6} {:>10} {:>10} {:>10} {:>10} {:>8}'.format(
+        'operation', 'runs', 'p50 ms', 'p90 ms', 'p99 ms', 'max ms', 'queries'))
+    for r in results:
+        print('{:<40} {:>6} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f} {:>8.1f}'.format(
+            r['name'], r['runs'], r['p50_ms'], r['p90_ms'], r['p99_ms'], r['max_ms'], r['queries_avg']))
+
+
+def write_results(results, output, **meta):
+    """
+    Write machine-readable results
+    :param results: List of Measure.result() dictionaries
+    :param output: String, file path
+    :param meta: Benchmark parameters
+    """
+    with open(output, 'w') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2)
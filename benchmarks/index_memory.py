@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Compare memory held by category model instances (with slug and path lookup dictionaries) and by compact
+CategoryIndex for synthetic catalog. Categories are bulk inserted with precomputed MPTT fields, so large trees
+are created fast.
+Usage: python benchmarks/index_memory.py --depth 4 --fanout 20 --output index_memory.json
+"""
+import os
+import sys
+import gc
+import time
+import tracemalloc
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import setup_django, write_results
+
+ITEM_CLASS = 'catalog_module_realty.models.FlatBuy'
+
+
+def generate_categories(depth, fanout):
+    """
+    Bulk insert tree: fanout roots, every inner node has fanout children, leaves at depth are endpoints
+    :return: Integer, categories count
+    """
+    from django.apps import apps
+    from djcat import settings
+
+    CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+    rows = []
+
+    def add(parent, level, tree_id, lft, path):
+        pk = len(rows) + 1
+        slug = 'node{}'.format(pk)
+        endpoint = level == depth - 1
+        node = CategoryModel(pk=pk, name='Node {}'.format(pk), slug=slug, parent_id=parent, is_active=True,
+                             is_root=parent is None, is_unique_in_path=endpoint or pk % 3 == 0,
+                             is_endpoint=endpoint, item_class=ITEM_CLASS if endpoint else None,
+                             url='/'.join(path + [slug]) + '/', tree_id=tree_id, level=level, lft=lft)
+        rows.append(node)
+        right = lft + 1
+        if not endpoint:
+            for x in range(fanout):
+                right = add(pk, level + 1, tree_id, right, path + [slug]) + 1
+        node.rght = right
+        return right
+
+    for tree_id in range(1, fanout + 1):
+        add(None, 0, tree_id, 1, [])
+    CategoryModel.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def measure(name, build):
+    """
+    Return memory held by result of build and build time
+    :return: Dictionary
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {'name': name, 'bytes': current, 'peak_bytes': peak, 'build_s': elapsed}
+
+
+def build_instances():
+    """
+    Model instances approach: all categories with lookups by slug and by path
+    """
+    from django.apps import apps
+    from djcat import settings
+
+    CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+    nodes = list(CategoryModel.objects.all())
+    return nodes, {n.slug: n for n in nodes}, {n.url.strip('/'): n for n in nodes}
+
+
+def build_index():
+    from djcat.index import CategoryIndex
+    return CategoryIndex.build()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--depth', type=int, default=4, help='Catalog depth')
+    parser.add_argument('--fanout', type=int, default=12, help='Children per category')
+    parser.add_argument('--output', default=None, help='Write results to JSON file')
+    args = parser.parse_args()
+
+    setup_django()
+    count = generate_categories(args.depth, args.fanout)
+
+    results = [measure('model instances', build_instances), measure('category index', build_index)]
+    for r in results:
+        r['bytes_per_node'] = r['bytes'] / count
+        print('{:<20} {:>10.1f} MB {:>8.0f} B/node  peak {:>8.1f} MB  build {:.2f} s'.format(
+            r['name'], r['bytes'] / 2 ** 20, r['bytes_per_node'], r['peak_bytes'] / 2 ** 20, r['build_s']))
+    print('{} categories, index takes {:.1%} of instances memory'.format(
+        count, results[1]['bytes'] / results[0]['bytes']))
+
+    if args.output:
+        write_results(results, args.output, benchmark='index_memory', depth=args.depth, fanout=args.fanout,
+                      categories=count)
+
+
+if __name__ == '__main__':
+    main()
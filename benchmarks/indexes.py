@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""
+Show query plans and timings of djcat lookups with and without indexes on synthetic catalog.
+Plans without indexes are taken with SQLite "NOT INDEXED" clause on every table of the query.
+Usage: python benchmarks/indexes.py --depth 3 --fanout 5 --items 40 --output indexes.json
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import setup_django, percentile, write_results
+
+
+def get_queries(catalog):
+    """
+    Return lookups used by Path, unique_slug, create_uid, ItemClassField and category listings
+    :return: List of tuples (name, QuerySet)
+    """
+    from django.apps import apps
+    from django.contrib.contenttypes.models import ContentType
+    from djcat import settings
+    from djcat.register import CatalogItem
+
+    CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+    endpoint = random.choice(catalog['endpoints'])
+    item = random.choice(catalog['items'])
+    item_model = CatalogItem.get_item_by_class(endpoint.item_class).class_obj
+    content_type = ContentType.objects.get_for_model(CategoryModel)
+    return [
+        ('category by slug', CategoryModel.objects.filter(slug=endpoint.slug)),
+        ('categories by item class', CategoryModel.objects.filter(item_class=endpoint.item_class)),
+        ('item by slug', item_model.objects.filter(slug=item.slug)),
+        ('item uid exists', item_model.objects.filter(uid=item.uid)),
+        ('category items listing', item_model.objects.filter(content_type=content_type, object_id=endpoint.pk,
+                                                             active=True)),
+        ('items by price range', item_model.objects.filter(price__gte=item.price, price__lte=item.price + 1000)),
+        ('items by choice attribute', item_model.objects.filter(building_type=item.building_type)
+                                                         .values_list('pk', flat=True)[:20]),
+    ]
+
+
+def without_indexes(sql):
+    return re.sub(r'(FROM|JOIN) ("\w+")', r'\1 \2 NOT INDEXED', sql)
+
+
+def explain(cursor, sql, params):
+    cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+    return [row[-1] for row in cursor.fetchall()]
+
+
+def timing(cursor, sql, params, runs):
+    timings = []
+    for x in range(runs):
+        start = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return percentile(timings, 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--depth', type=int, default=3, help='Catalog depth')
+    parser.add_argument('--fanout', type=int, default=5, help='Children per category')
+    parser.add_argument('--items', type=int, default=40, help='Items per endpoint category')
+    parser.add_argument('--runs', type=int, default=200, help='Runs of every query')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default=None, help='Write results to JSON file')
+    args = parser.parse_args()
+
+    connection = setup_django()
+    from benchmarks.catalog import generate_catalog
+
+    random.seed(args.seed)
+    catalog = generate_catalog(args.depth, args.fanout, args.items)
+
+    results = []
+    with connection.cursor() as cursor:
+        for name, qs in get_queries(catalog):
+            sql, params = qs.query.sql_with_params()
+            before = {'plan': explain(cursor, without_indexes(sql), params),
+                      'p50_ms': timing(cursor, without_indexes(sql), params, args.runs)}
+            after = {'plan': explain(cursor, sql, params), 'p50_ms': timing(cursor, sql, params, args.runs)}
+            results.append({'name': name, 'before': before, 'after': after})
+
+            print('{}: {:.3f} ms -> {:.3f} ms'.format(name, before['p50_ms'], after['p50_ms']))
+            for line in before['plan']:
+                print('  before: {}'.format(line))
+            for line in after['plan']:
+                print('  after:  {}'.format(line))
+
+    if args.output:
+        write_results(results, args.output, benchmark='indexes', depth=args.depth, fanout=args.fanout,
+                      items=args.items, runs=args.runs, seed=args.seed)
+
+
+if __name__ == '__main__':
+    main()
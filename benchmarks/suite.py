@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+"""
+djcat benchmark suite: path resolution, tree maintenance, slug generation and item ingestion on synthetic catalog.
+Usage:
+    python benchmarks/suite.py --depth 4 --fanout 5 --items 5 --output before.json
+    python benchmarks/suite.py --depth 4 --fanout 5 --items 5 --compare before.json
+"""
+import os
+import sys
+import json
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import setup_django, Measure, print_results, write_results
+
+
+def bench_resolve(catalog, runs):
+    from djcat.path import Path
+    from djcat.register import CatalogItem
+
+    item_class = CatalogItem.get_item_by_class(catalog['endpoints'][0].item_class)
+    choices = [s for a in item_class.attrs if a.type == 'choice' for s in a.choices]
+    categories = [n for level in catalog['categories'] for n in level]
+
+    category = Measure('resolve category path')
+    mixed = Measure('resolve category + attribute path')
+    item = Measure('resolve item path')
+    for x in range(runs):
+        url = random.choice(categories).url
+        with category:
+            Path(path=url)
+        url = random.choice(catalog['endpoints']).url + random.choice(choices)
+        with mixed:
+            Path(path=url)
+        url = random.choice(catalog['items']).url
+        with item:
+            Path(path=url)
+    return [category.result(), mixed.result(), item.result()]
+
+
+def bench_tree(catalog, runs):
+    from django.apps import apps
+    from djcat import settings
+    from benchmarks.catalog import random_name
+
+    CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+    inner = catalog['categories'][-2] if len(catalog['categories']) > 1 else catalog['categories'][0]
+
+    leaf = Measure('category save (new leaf)')
+    for x in range(runs):
+        parent = random.choice(inner)
+        with leaf:
+            CategoryModel.objects.create(name=random_name('leaf'), parent=parent, is_active=True)
+
+    rename = Measure('category rename (inner node)')
+    for x in range(runs):
+        node = CategoryModel.objects.get(pk=random.choice(inner).pk)
+        node.slug = random_name('renamed').replace(' ', '')
+        with rename:
+            node.save()
+
+    move = Measure('category move (subtree to other root)')
+    roots = catalog['categories'][0]
+    for x in range(runs):
+        node = CategoryModel.objects.get(pk=random.choice(inner).pk)
+        node.parent = CategoryModel.objects.get(pk=random.choice(roots).pk)
+        with move:
+            node.save()
+    return [leaf.result(), rename.result(), move.result()]
+
+
+def bench_slugs(catalog, runs):
+    from django.apps import apps
+    from djcat import settings
+    from djcat.utils import unique_slug
+
+    CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+    slug = Measure('unique_slug (existing slug)')
+    for x in range(runs):
+        with slug:
+            unique_slug(CategoryModel, random.choice(catalog['endpoints']).slug)
+    return [slug.result()]
+
+
+def bench_import(catalog, runs):
+    from django.db import transaction
+    from djcat.register import CatalogItem
+    from benchmarks.catalog import create_item
+
+    item_class = CatalogItem.get_item_by_class(catalog['endpoints'][0].item_class)
+    single = Measure('item create')
+    for x in range(runs):
+        with single:
+            create_item(random.choice(catalog['endpoints']), item_class)
+
+    batch = Measure('bulk import (100 items in transaction)')
+    for x in range(max(1, runs // 20)):
+        with batch:
+            with transaction.atomic():
+                for y in range(100):
+                    create_item(random.choice(catalog['endpoints']), item_class)
+    return [single.result(), batch.result()]
+
+
+def compare(results, previous):
+    """
+    Print p50 and queries difference with previous run results
+    """
+    previous = {r['name']: r for r in previous['results']}
+    print()
+    print('{:<40} {:>12} {:>12} {:>10}'.format('operation', 'p50 before', 'p50 after', 'queries'))
+    for r in results:
+        p = previous.get(r['name'])
+        if not p:
+            continue
+        print('{:<40} {:>12.3f} {:>12.3f} {:>4.1f}->{:<4.1f}'.format(
+            r['name'], p['p50_ms'], r['p50_ms'], p['queries_avg'], r['queries_avg']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--depth', type=int, default=4, help='Catalog depth')
+    parser.add_argument('--fanout', type=int, default=4, help='Children per category')
+    parser.add_argument('--items', type=int, default=5, help='Items per endpoint category')
+    parser.add_argument('--runs', type=int, default=200, help='Runs of every operation')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default=None, help='Write results to JSON file')
+    parser.add_argument('--compare', default=None, help='Compare with results JSON file of previous run')
+    args = parser.parse_args()
+
+    setup_django()
+    from benchmarks.catalog import generate_catalog
+
+    random.seed(args.seed)
+    catalog = generate_catalog(args.depth, args.fanout, args.items)
+
+    results = []
+    results.extend(bench_resolve(catalog, args.runs))
+    results.extend(bench_slugs(catalog, args.runs))
+    results.extend(bench_import(catalog, args.runs))
+    results.extend(bench_tree(catalog, max(1, args.runs // 10)))
+    print_results(results)
+
+    if args.output:
+        write_results(results, args.output, benchmark='suite', depth=args.depth, fanout=args.fanout,
+                      items=args.items, runs=args.runs, seed=args.seed)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""
+Compare write and read costs of MPTT and materialized path tree backends.
+Usage: python benchmarks/tree_backends.py --depth 4 --fanout 6 --output tree.json
+"""
+import os
+import sys
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import setup_django, Measure, print_results, write_results
+
+
+def build(model, depth, fanout, measure):
+    """
+    Build tree level by level, names are random so MPTT ordered inserts land anywhere in tree
+    :return: List of levels, each level is list of nodes
+    """
+    levels = [[]]
+    for x in range(fanout):
+        with measure:
+            levels[0].append(model.objects.create(name='{:08x}'.format(random.getrandbits(32))))
+    for level in range(1, depth):
+        levels.append([])
+        for parent in levels[level - 1]:
+            for x in range(fanout):
+                with measure:
+                    levels[level].append(model.objects.create(name='{:08x}'.format(random.getrandbits(32)),
+                                                              parent=parent))
+    return levels
+
+
+def run(model, depth, fanout):
+    name = model.__name__
+    insert = Measure('{} insert'.format(name))
+    levels = build(model, depth, fanout, insert)
+
+    ancestors = Measure('{} get_ancestors (leaf)'.format(name))
+    for node in random.sample(levels[-1], min(200, len(levels[-1]))):
+        node = model.objects.get(pk=node.pk)
+        with ancestors:
+            list(node.get_ancestors())
+
+    descendants = Measure('{} get_descendants (level 1)'.format(name))
+    for node in levels[min(1, depth - 1)]:
+        node = model.objects.get(pk=node.pk)
+        with descendants:
+            list(node.get_descendants())
+
+    move = Measure('{} move subtree to other root'.format(name))
+    for node in random.sample(levels[min(1, depth - 1)], min(20, len(levels[min(1, depth - 1)]))):
+        node = model.objects.get(pk=node.pk)
+        node.parent = model.objects.get(pk=random.choice(levels[0]).pk)
+        with move:
+            node.save()
+
+    return [insert.result(), ancestors.result(), descendants.result(), move.result()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--fanout', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    setup_django()
+    from catalog.models import MPTTNode, PathNode
+
+    results = []
+    for model in (MPTTNode, PathNode):
+        random.seed(args.seed)
+        results.extend(run(model, args.depth, args.fanout))
+    print_results(results)
+    if args.output:
+        write_results(results, args.output, benchmark='tree_backends', depth=args.depth, fanout=args.fanout)
+
+
+if __name__ == '__main__':
+    main()
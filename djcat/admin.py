@@ -1,3 +1,4 @@
+from django.contrib import admin
 from django.utils.html import format_html
 
 from mptt.admin import MPTTModelAdmin
@@ -8,7 +9,7 @@ from .forms import CategoryForm
 class CategoryAdmin(MPTTModelAdmin):
     form = CategoryForm
 
-    list_display = ('name', 'is_active', 'is_unique_in_path', 'is_endpoint')
+    list_display = ('name', 'is_active', 'is_unique_in_path', 'is_endpoint', 'item_count')
     list_display_links = ('name', 'is_active', 'is_unique_in_path', 'is_endpoint')
 
     def name(self, instance):
@@ -17,3 +18,21 @@ class CategoryAdmin(MPTTModelAdmin):
             instance._mpttfield('level') * self.mptt_level_indent,
             instance.name,  # Or whatever you want to put here
         )
+
+
+class PathCategoryAdmin(admin.ModelAdmin):
+    """
+    Admin for categories based on DjcatMPCategory
+    """
+    form = CategoryForm
+    level_indent = 10
+
+    list_display = ('name', 'is_active', 'is_unique_in_path', 'is_endpoint', 'item_count')
+    list_display_links = ('name', 'is_active', 'is_unique_in_path', 'is_endpoint')
+
+    def name(self, instance):
+        return format_html(
+            '<div style="text-indent:{}px">{}</div>',
+            instance.level * self.level_indent,
+            instance.name,
+        )
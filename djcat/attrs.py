@@ -2,6 +2,7 @@ import json
 
 from django.apps import apps
 from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Q
 
 from . import settings
 from djcat.exceptions import *
@@ -32,15 +33,23 @@ def catalog_attribute(name=None, key=None, verbose_name=None):
     return decorate
 
 
-def djcat_attr():
+def djcat_attr(db_index=True):
     """
     Decorator for set attribute class (_attr_class) variable in model field class
+    :param db_index: Bool, attributes are used in items filters, so fields are indexed unless db_index passed to field
     :return: Class
     """
     def decorate(cls):
         for b in cls.__bases__:
             if getattr(b, '_is_djcat_attr', None) and getattr(b, 'attr_key', None):
                 setattr(cls, '_attr_class', b)
+        if db_index:
+            init = cls.__init__
+
+            def __init__(self, *args, **kwargs):
+                kwargs.setdefault('db_index', True)
+                init(self, *args, **kwargs)
+            cls.__init__ = __init__
         return cls
     return decorate
 
@@ -84,6 +93,16 @@ class BaseAttribute:
         """
         raise Exception('build_query() must implement in subclasses')
 
+    @classmethod
+    def get_query_filter(cls, field, value):
+        """
+        Return items queryset filter for value
+        :param field: String, item model field name
+        :param value: Parsed value, see parse_query()
+        :return: Q object
+        """
+        raise Exception('get_query_filter() must implement in subclasses')
+
     @classmethod
     def check(cls):
         if cls.attr_type not in settings.DJCAT_ATTR_TYPES:
@@ -203,6 +222,15 @@ class NumericAttribute(BaseAttribute):
 
             return value
 
+    @classmethod
+    def get_query_filter(cls, field, value):
+        q = Q()
+        if value.get('from') is not None:
+            q &= Q(**{'{}__gte'.format(field): value['from']})
+        if value.get('to') is not None:
+            q &= Q(**{'{}__lte'.format(field): value['to']})
+        return q
+
     def _get_val(self, val):
         value = {}
         if 'f' not in val and 't' not in val:
@@ -294,6 +322,12 @@ class ChoiceAttribute(BaseAttribute):
     def get_choices_values(self):
         return [x[0] for x in self.__class__.attr_choices]
 
+    @classmethod
+    def get_query_filter(cls, field, value):
+        if isinstance(value, list):
+            return Q(**{'{}__in'.format(field): value})
+        return Q(**{field: value})
+
     @classmethod
     def check(cls):
         super(ChoiceAttribute, cls).check()
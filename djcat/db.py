@@ -0,0 +1,30 @@
+import time
+
+from . import settings
+from . import versions
+
+
+def get_read_alias(*scopes):
+    """
+    Return database alias for catalog reads that depend on scopes: DJCAT_READ_DB_ALIAS, or None (default routing,
+    primary) if any of scopes versions changed within DJCAT_READ_STALENESS seconds, so reads right after write see it.
+    Evicted versions are new, so reads go to primary for staleness window after eviction too.
+    Fallback works across processes only if DJCAT_VERSIONS_CACHE is shared cache, not process local one.
+    :param scopes: Strings, version scopes, see djcat.versions
+    :return: String or None
+    """
+    alias = settings.DJCAT_READ_DB_ALIAS
+    if not alias or not scopes:
+        return alias
+    changed = max(versions.get_versions(*scopes).values())
+    if time.time() - changed < settings.DJCAT_READ_STALENESS:
+        return None
+    return alias
+
+
+def get_catalog_read_alias():
+    """
+    Return database alias for categories reads, see get_read_alias()
+    :return: String or None
+    """
+    return get_read_alias(versions.CATALOG)
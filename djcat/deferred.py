@@ -0,0 +1,128 @@
+import logging
+import threading
+from collections import OrderedDict
+
+from django.apps import apps
+from django.db import transaction, close_old_connections
+
+from . import settings
+from . import versions
+from .metrics import metrics, TREE_UPDATE
+
+
+DEFERRED_THREAD = 'thread'
+DEFERRED_COMMAND = 'command'
+
+logger = logging.getLogger('djcat')
+
+
+def get_queue_model():
+    return apps.get_model('djcat', 'TreeUpdate')
+
+
+def enqueue(*root_pks):
+    """
+    Add root trees to tree updates queue and wake worker thread in thread mode
+    :param root_pks: Integers, root categories pk
+    :return:
+    """
+    TreeUpdate = get_queue_model()
+    TreeUpdate.objects.bulk_create([TreeUpdate(root_id=pk) for pk in sorted({pk for pk in root_pks if pk})])
+    if settings.DJCAT_DEFERRED_TREE_UPDATES == DEFERRED_THREAD:
+        get_worker().wake()
+
+
+def schedule(*root_pks):
+    """
+    Enqueue root trees after current transaction commit, so worker sees committed changes
+    :param root_pks: Integers, root categories pk
+    :return:
+    """
+    transaction.on_commit(lambda: enqueue(*root_pks))
+
+
+def process_queue():
+    """
+    Rebuild queued trees, every tree once however many times it was queued, and bump their versions after rebuild.
+    Trees queued while processing are left for next call.
+    :return: List of rebuilt root pks
+    """
+    TreeUpdate = get_queue_model()
+    CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+    queued = OrderedDict()
+    for pk, root_id in TreeUpdate.objects.order_by('pk').values_list('pk', 'root_id'):
+        queued.setdefault(root_id, []).append(pk)
+
+    processed = []
+    for root_id, pks in queued.items():
+        with metrics.timer(TREE_UPDATE, deferred=True), transaction.atomic():
+            # rebuild is serialized with category saves of the tree
+            CategoryModel.objects.lock_trees(root_id)
+            # root could be deleted or moved into other tree since it was queued
+            root = CategoryModel.objects.filter(pk=root_id, parent__isnull=True).first()
+            if root:
+                CategoryModel.objects.rebuild_tree(root)
+            TreeUpdate.objects.filter(pk__in=pks).delete()
+        if root:
+            versions.bump(versions.CATALOG, versions.tree_scope(root_id))
+            processed.append(root_id)
+    return processed
+
+
+class TreeUpdateWorker(threading.Thread):
+    """
+    Daemon thread that processes tree updates queue when woken up by enqueue() and every interval seconds
+    """
+    def __init__(self, interval=settings.DJCAT_DEFERRED_TREE_INTERVAL):
+        super().__init__(name='djcat-tree-updates', daemon=True)
+        self.interval = interval
+        self.event = threading.Event()
+        self.stopped = False
+
+    def wake(self):
+        self.event.set()
+
+    def stop(self):
+        self.stopped = True
+        self.event.set()
+
+    def run(self):
+        while not self.stopped:
+            self.event.wait(self.interval)
+            self.event.clear()
+            if self.stopped:
+                break
+            try:
+                process_queue()
+            except Exception:
+                logger.exception('Deferred tree update failed')
+            finally:
+                close_old_connections()
+
+
+_worker = {'thread': None}
+_worker_lock = threading.Lock()
+
+
+def get_worker():
+    """
+    Return running process wide worker thread, it is started on first call
+    :return: TreeUpdateWorker
+    """
+    with _worker_lock:
+        if _worker['thread'] is None or not _worker['thread'].is_alive():
+            _worker['thread'] = TreeUpdateWorker()
+            _worker['thread'].start()
+        return _worker['thread']
+
+
+def stop_worker():
+    """
+    Stop worker thread if it is running
+    :return:
+    """
+    with _worker_lock:
+        if _worker['thread'] is not None:
+            _worker['thread'].stop()
+            _worker['thread'].join()
+            _worker['thread'] = None
@@ -15,6 +15,19 @@ class CategoryInheritanceError(Exception):
         return _(self.error).format(self.invalid_category)
 
 
+class CategoryInvalidMove(Exception):
+    def __init__(self, node, parent):
+        self.node = node
+        self.parent = parent
+        self.error = "Category '{}' can't be moved into its descendant '{}'."
+
+    def __repr__(self):
+        return self.error.format(self.node, self.parent)
+
+    def __str__(self):
+        return _(self.error).format(self.node, self.parent)
+
+
 class CategoryRootCheckError(Exception):
     def __init__(self, name):
         self.name = name
@@ -167,6 +180,18 @@ class PathNotFound(Exception):
         return self.error.format(self.path)
 
 
+class PageCursorNotValid(Exception):
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.error = "Page cursor '{}' not valid."
+
+    def __repr__(self):
+        return self.error.format(self.cursor)
+
+    def __str__(self):
+        return self.error.format(self.cursor)
+
+
 class ItemAttributeChoicesSlugsDuplicate(Exception):
     def __init__(self, attr_class):
         self.attr_class = attr_class
@@ -241,3 +266,28 @@ class ItemNameNotValid(Exception):
 
     def __str__(self):
         return _(self.error).format(self.item_name, settings.DJCAT_ITEM_SLUG_DELIMITER)
+
+
+class IndexSnapshotNotValid(Exception):
+    def __init__(self, path):
+        self.path = path
+        self.error = "Category index snapshot '{}' not valid."
+
+    def __repr__(self):
+        return self.error.format(self.path)
+
+    def __str__(self):
+        return self.error.format(self.path)
+
+
+class CatalogImportError(Exception):
+    def __init__(self, line, reason):
+        self.line = line
+        self.reason = reason
+        self.error = "Catalog import failed at line {}: {}."
+
+    def __repr__(self):
+        return self.error.format(self.line, self.reason)
+
+    def __str__(self):
+        return _(self.error).format(self.line, self.reason)
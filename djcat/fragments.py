@@ -0,0 +1,114 @@
+import hashlib
+
+from django.core.cache import caches
+
+from . import settings
+from . import versions
+from .http import get_path_scopes, get_request_path
+from .metrics import metrics, CACHE_HIT, CACHE_MISS
+
+
+# fragment depends on category tree and items of category: listings, item pages
+SCOPE_PATH = 'path'
+# fragment depends on category tree only: breadcrumbs
+SCOPE_TREE = 'tree'
+# fragment depends on whole catalog and items counts: menus
+SCOPE_CATALOG = 'catalog'
+SCOPES = (SCOPE_PATH, SCOPE_TREE, SCOPE_CATALOG)
+
+
+def get_cache():
+    return caches[settings.DJCAT_FRAGMENTS_CACHE]
+
+
+def get_fragment_scopes(path, scope=SCOPE_PATH):
+    """
+    Return version scopes that fragment of resolved path depends on
+    :param path: Path instance or None
+    :param scope: String, one of SCOPES
+    :return: List of strings, empty if fragment can not be cached
+    """
+    if scope not in SCOPES:
+        raise ValueError('Fragment scope must be one of {}, got {!r}'.format(SCOPES, scope))
+    if scope == SCOPE_CATALOG:
+        return [versions.CATALOG, versions.COUNTS]
+    scopes = get_path_scopes(path) if path is not None else []
+    return scopes[:1] if scope == SCOPE_TREE else scopes
+
+
+def make_fragment_key(name, path, scope=SCOPE_PATH, vary_on=()):
+    """
+    Return cache key of fragment: hash of fragment name, canonical url of resolved path and versions of scopes,
+    so any category save in the tree or item change in the category branch makes new key
+    :param name: String, fragment name
+    :param path: Path instance or None
+    :param scope: String, one of SCOPES
+    :param vary_on: Iterable, additional values key depends on
+    :return: String or None if fragment can not be cached
+    """
+    scopes = get_fragment_scopes(path, scope)
+    if not scopes:
+        return None
+    path_versions = versions.get_versions(*scopes)
+    url = path.get_canonical_url(path.cursor) if path is not None else ''
+    parts = [name, scope, url] + [str(v) for v in vary_on]
+    parts += ['{}={!r}'.format(s, path_versions[s]) for s in sorted(path_versions)]
+    key = '|'.join(parts)
+    return '{}:fragment:{}:{}'.format(settings.DJCAT_CACHE_PREFIX, name,
+                                      hashlib.md5(key.encode('utf-8')).hexdigest())
+
+
+def get_fragment(name, path, render, scope=SCOPE_PATH, vary_on=(), timeout=settings.DJCAT_FRAGMENTS_TIMEOUT,
+                 cache=None):
+    """
+    Return cached fragment of resolved path, render and cache it if not found.
+    Fragment of not resolved path is rendered without cache, except SCOPE_CATALOG fragments.
+    :param name: String, fragment name
+    :param path: Path instance or None
+    :param render: Callable() - return rendered fragment String
+    :param scope: String, one of SCOPES
+    :param vary_on: Iterable, additional values fragment depends on
+    :param timeout: Integer seconds or None - never expire
+    :param cache: Cache backend, DJCAT_FRAGMENTS_CACHE by default
+    :return: String
+    """
+    key = make_fragment_key(name, path, scope, vary_on)
+    if key is None:
+        return render()
+    cache = cache or get_cache()
+    value = cache.get(key)
+    if value is not None:
+        metrics.incr(CACHE_HIT, fragment=name)
+        return value
+    metrics.incr(CACHE_MISS, fragment=name)
+    value = render()
+    cache.set(key, value, timeout)
+    return value
+
+
+class FragmentCacheMixin:
+    """
+    View mixin, caches rendered fragments of catalog pages by resolved path of request.
+    Example:
+        class Catalog(FragmentCacheMixin, View):
+            def get(self, request, *args, **kwargs):
+                menu = self.get_fragment('menu', lambda: render_to_string('menu.html'), scope=SCOPE_CATALOG)
+                ...
+    """
+    fragment_scope = SCOPE_PATH
+    fragment_timeout = settings.DJCAT_FRAGMENTS_TIMEOUT
+
+    def get_catalog_path(self):
+        return get_request_path(self.request, *self.args, **self.kwargs)
+
+    def get_fragment(self, name, render, scope=None, vary_on=()):
+        """
+        Return cached fragment of request path
+        :param name: String, fragment name
+        :param render: Callable() - return rendered fragment String
+        :param scope: String, one of SCOPES, fragment_scope by default
+        :param vary_on: Iterable, additional values fragment depends on
+        :return: String
+        """
+        return get_fragment(name, self.get_catalog_path(), render, scope=scope or self.fragment_scope,
+                            vary_on=vary_on, timeout=self.fragment_timeout)
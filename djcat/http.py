@@ -0,0 +1,111 @@
+import hashlib
+from datetime import datetime
+from urllib.parse import urlencode
+
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from . import settings
+from . import versions
+from .path import Path
+
+
+def get_request_path(request, *args, **kwargs):
+    """
+    Return Path resolved from request, path is resolved once per request
+    :param request: HttpRequest
+    :param kwargs: View arguments, catalog path is in "path" argument
+    :return: Path instance
+    """
+    if not hasattr(request, 'djcat_path'):
+        request.djcat_path = Path(path=kwargs.get('path') or '', query=request.GET.get('a', ''),
+                                  cursor=request.GET.get(settings.DJCAT_PAGE_CURSOR_KEY, ''))
+    return request.djcat_path
+
+
+def get_path_scopes(path):
+    """
+    Return version scopes that resolved path page depends on: tree of category and items of category branch
+    :param path: Path instance
+    :return: List of strings
+    """
+    if not path.category:
+        return []
+    return [versions.tree_scope(path.get_root_pk()), versions.items_scope(path.category.pk)]
+
+
+def get_path_versions(path):
+    """
+    Return versions of resolved path page
+    :param path: Path instance
+    :return: Dictionary {scope: Float version}
+    """
+    scopes = get_path_scopes(path)
+    return versions.get_versions(*scopes) if scopes else {}
+
+
+def get_request_query(request):
+    """
+    Return canonical query of request parameters that are not part of path: attributes and page cursor
+    :param request: HttpRequest
+    :return: String
+    """
+    skip = ('a', settings.DJCAT_PAGE_CURSOR_KEY)
+    return urlencode(sorted((k, v) for k, v in request.GET.items() if k not in skip))
+
+
+def get_path_etag(path, path_versions, query=''):
+    """
+    Return ETag of resolved path page: hash of canonical url and versions of category tree and items
+    :param path: Path instance
+    :param path_versions: Dictionary, see get_path_versions()
+    :param query: String, other query parameters
+    :return: String or None if path not resolved
+    """
+    if not path.category:
+        return None
+    parts = [path.get_page_url(path.cursor), query]
+    parts += ['{}={!r}'.format(s, path_versions[s]) for s in sorted(path_versions)]
+    key = '|'.join(parts)
+    return hashlib.md5(key.encode('utf-8')).hexdigest()
+
+
+def get_path_last_modified(path_versions):
+    """
+    Return time of last change of resolved path page
+    :param path_versions: Dictionary, see get_path_versions()
+    :return: Datetime or None
+    """
+    if not path_versions:
+        return None
+    return datetime.fromtimestamp(max(path_versions.values()), tz=timezone.utc)
+
+
+def catalog_condition(get_path=get_request_path):
+    """
+    View decorator, handles conditional GET of catalog pages with ETag and Last-Modified derived from resolved path,
+    so not modified pages are answered with 304 without rendering. Last-Modified has one second resolution, clients
+    should prefer ETag. Resolved path is available in view as request.djcat_path when default get_path is used.
+    Example:
+        @catalog_condition()
+        def catalog(request, path=''):
+            path = get_request_path(request, path=path)
+            ...
+    :param get_path: Callable(request, *args, **kwargs) - return resolved Path
+    :return: Decorator
+    """
+    def decorator(func):
+        def get_versions(request, *args, **kwargs):
+            if not hasattr(request, 'djcat_versions'):
+                request.djcat_versions = get_path_versions(get_path(request, *args, **kwargs))
+            return request.djcat_versions
+
+        def etag_func(request, *args, **kwargs):
+            return get_path_etag(get_path(request, *args, **kwargs), get_versions(request, *args, **kwargs),
+                                 query=get_request_query(request))
+
+        def last_modified_func(request, *args, **kwargs):
+            return get_path_last_modified(get_versions(request, *args, **kwargs))
+
+        return condition(etag_func=etag_func, last_modified_func=last_modified_func)(func)
+    return decorator
@@ -0,0 +1,526 @@
+import os
+import sys
+import json
+import mmap
+import struct
+import hashlib
+import tempfile
+from contextlib import contextmanager
+from array import array
+from bisect import bisect_left
+
+from django.apps import apps
+
+from . import settings
+from . import versions
+from .utils import get_tree_ordering
+from .db import get_catalog_read_alias
+from .exceptions import *
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+FLAG_ACTIVE = 1
+FLAG_ENDPOINT = 2
+FLAG_UNIQUE = 4
+
+SNAPSHOT_MAGIC = b'DJCATIDX'
+SNAPSHOT_FORMAT = 1
+# magic, header length
+SNAPSHOT_PREFIX = struct.Struct('<8sI')
+# number columns stored in snapshot: name, array typecode
+SNAPSHOT_COLUMNS = (
+    ('pks', 'q'),
+    ('parents', 'i'),
+    ('ends', 'i'),
+    ('levels', 'H'),
+    ('flags', 'B'),
+    ('item_class_ids', 'H'),
+    ('pk_keys', 'q'),
+    ('pk_positions', 'i'),
+    ('slug_keys', 'q'),
+    ('slug_positions', 'i'),
+    ('path_keys', 'q'),
+    ('path_positions', 'i'),
+)
+# string columns stored in snapshot as offsets and utf-8 data
+SNAPSHOT_STRINGS = ('names', 'slugs')
+
+
+def path_hash(path):
+    """
+    Return 64 bit hash of category path string
+    :param path: String, path elements joined with "/"
+    :return: Integer, signed, fits array typecode "q"
+    """
+    digest = hashlib.blake2b(path.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+class CategoryNode:
+    """
+    Light view of category stored in CategoryIndex, it is created on access and holds index and node position only
+    """
+    __slots__ = ('index', 'position')
+
+    def __init__(self, index, position):
+        self.index = index
+        self.position = position
+
+    def __eq__(self, other):
+        return isinstance(other, CategoryNode) and self.index is other.index and self.position == other.position
+
+    def __hash__(self):
+        return hash((id(self.index), self.position))
+
+    def __repr__(self):
+        return '<CategoryNode {}: {}>'.format(self.pk, self.name)
+
+    @property
+    def pk(self):
+        return self.index.pks[self.position]
+
+    @property
+    def name(self):
+        return self.index.names[self.position]
+
+    @property
+    def slug(self):
+        return self.index.slugs[self.position]
+
+    @property
+    def level(self):
+        return self.index.levels[self.position]
+
+    @property
+    def item_class(self):
+        return self.index.item_classes[self.index.item_class_ids[self.position]]
+
+    @property
+    def is_active(self):
+        return bool(self.index.flags[self.position] & FLAG_ACTIVE)
+
+    @property
+    def is_endpoint(self):
+        return bool(self.index.flags[self.position] & FLAG_ENDPOINT)
+
+    @property
+    def is_unique_in_path(self):
+        return bool(self.index.flags[self.position] & FLAG_UNIQUE)
+
+    @property
+    def parent(self):
+        parent = self.index.parents[self.position]
+        return CategoryNode(self.index, parent) if parent >= 0 else None
+
+    def get_ancestors(self, include_self=False):
+        """
+        Return ancestors from root
+        :param include_self: Bool
+        :return: List of CategoryNode
+        """
+        nodes = [self] if include_self else []
+        node = self.parent
+        while node:
+            nodes.append(node)
+            node = node.parent
+        return nodes[::-1]
+
+    def get_children(self):
+        """
+        Return children in tree order
+        :return: List of CategoryNode
+        """
+        children = []
+        end = self.index.ends[self.position]
+        position = self.position + 1
+        while position <= end:
+            children.append(CategoryNode(self.index, position))
+            position = self.index.ends[position] + 1
+        return children
+
+    def get_descendants(self, include_self=False):
+        """
+        Return descendants in tree order, they are stored in range after node
+        :param include_self: Bool
+        :return: List of CategoryNode
+        """
+        start = self.position if include_self else self.position + 1
+        return [CategoryNode(self.index, p) for p in range(start, self.index.ends[self.position] + 1)]
+
+    def is_descendant_of(self, other, include_self=False):
+        if include_self and self == other:
+            return True
+        return other.position < self.position <= self.index.ends[other.position]
+
+    def get_url_paths(self):
+        """
+        Return available category paths, see BaseDjcatCategory.get_url_paths()
+        :return: Dictionary
+        """
+        ancestors = self.get_ancestors(include_self=True)
+        return {'full': [n.slug for n in ancestors], 'unique': [n.slug for n in ancestors if n.is_unique_in_path]}
+
+    def get_url(self):
+        """
+        Return canonical url of category, it is computed from ancestors
+        :return: String
+        """
+        return self.index.model.objects.make_url(self, self.get_url_paths())
+
+    url = property(get_url)
+
+
+class StringTable:
+    """
+    Read only list of strings stored as utf-8 data and offsets of strings in it, strings are decoded on access
+    """
+    __slots__ = ('offsets', 'data')
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError('string table index out of range')
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], 'utf-8')
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    @staticmethod
+    def encode(strings):
+        """
+        Return offsets and data of strings
+        :param strings: Iterable of strings
+        :return: Tuple (array of offsets, bytes)
+        """
+        offsets = array('I', [0])
+        data = bytearray()
+        for string in strings:
+            data.extend(string.encode('utf-8'))
+            offsets.append(len(data))
+        return offsets, bytes(data)
+
+
+class CategoryIndex:
+    """
+    Compact in-process copy of category tree for path resolution and navigation.
+    Nodes are stored in tree order (preorder) in parallel columns: arrays of numbers for pk, parent position, level,
+    flags and end position of subtree (descendants of node are the nodes between node and its end, like
+    lft/rght of nested sets), lists of names and interned slugs. Lookups by pk, slug and path use sorted arrays of
+    keys or 64 bit key hashes searched with bisect instead of dictionaries of model instances.
+    Items counts are not stored, they change too often.
+    Index can be written to snapshot file and loaded from it memory mapped, see write_snapshot().
+    Example:
+        index = get_category_index()
+        node = index.get_by_path('flat/flatbuy')
+        children = node.get_children()
+    """
+    def __init__(self, model=None):
+        self.model = model or apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+        self.version = None
+        self.pks = array('q')
+        self.parents = array('i')
+        self.ends = array('i')
+        self.levels = array('H')
+        self.flags = array('B')
+        self.item_class_ids = array('H')
+        self.item_classes = [None]
+        self.names = []
+        self.slugs = []
+        self.pk_keys = array('q')
+        self.pk_positions = array('i')
+        self.slug_keys = array('q')
+        self.slug_positions = array('i')
+        self.path_keys = array('q')
+        self.path_positions = array('i')
+
+    def __len__(self):
+        return len(self.pks)
+
+    def __iter__(self):
+        return (CategoryNode(self, p) for p in range(len(self.pks)))
+
+    @classmethod
+    def build(cls, queryset=None):
+        """
+        Build index of categories with one query, categories whose parent is not in queryset are skipped
+        :param queryset: Categories QuerySet, all categories by default
+        :return: CategoryIndex
+        """
+        index = cls()
+        if queryset is None:
+            queryset = index.model._default_manager.using(get_catalog_read_alias())
+        rows = queryset.order_by(*get_tree_ordering(index.model))\
+            .values_list('pk', 'parent_id', 'name', 'slug', 'item_class', 'is_active', 'is_endpoint',
+                         'is_unique_in_path')
+        item_class_ids = {None: 0}
+        positions = {}
+        stack = []
+        for pk, parent_id, name, slug, item_class, is_active, is_endpoint, is_unique_in_path in rows:
+            parent = positions.get(parent_id, -1) if parent_id else -1
+            if parent_id and parent < 0:
+                continue
+            # close subtrees of nodes that are not ancestors of this one
+            while stack and not stack[-1] == parent:
+                index.ends[stack.pop()] = len(index.pks) - 1
+            position = len(index.pks)
+            positions[pk] = position
+            stack.append(position)
+            if item_class not in item_class_ids:
+                item_class_ids[item_class] = len(index.item_classes)
+                index.item_classes.append(sys.intern(item_class))
+            index.pks.append(pk)
+            index.parents.append(parent)
+            index.ends.append(position)
+            index.levels.append(index.levels[parent] + 1 if parent >= 0 else 0)
+            flags = FLAG_ACTIVE * is_active | FLAG_ENDPOINT * is_endpoint | FLAG_UNIQUE * is_unique_in_path
+            index.flags.append(flags)
+            index.item_class_ids.append(item_class_ids[item_class])
+            index.names.append(name)
+            index.slugs.append(sys.intern(slug))
+        while stack:
+            index.ends[stack.pop()] = len(index.pks) - 1
+        index.make_lookups()
+        return index
+
+    def make_lookup(self, keys):
+        """
+        Return keys sorted and positions of nodes in order of sorted keys
+        :param keys: List of tuples (Integer key, Integer node position)
+        :return: Tuple (array of keys, array of positions)
+        """
+        keys.sort()
+        return array('q', [k for k, p in keys]), array('i', [p for k, p in keys])
+
+    def make_lookups(self):
+        paths = {}
+        path_keys = []
+        manager = self.model.objects
+        for node in self:
+            # parent paths are computed before children in tree order
+            node_paths = manager.make_url_paths(node, paths.get(self.parents[node.position]))
+            paths[node.position] = node_paths
+            for pk, kind, path in manager.make_path_rows(node, node_paths):
+                path_keys.append((path_hash(path), node.position))
+        self.pk_keys, self.pk_positions = self.make_lookup([(pk, p) for p, pk in enumerate(self.pks)])
+        self.slug_keys, self.slug_positions = self.make_lookup([(path_hash(s), p) for p, s in enumerate(self.slugs)])
+        self.path_keys, self.path_positions = self.make_lookup(path_keys)
+
+    def find(self, keys, positions, key):
+        """
+        Return positions of nodes with given key
+        :return: List of Integers
+        """
+        found = []
+        i = bisect_left(keys, key)
+        while i < len(keys) and keys[i] == key:
+            found.append(positions[i])
+            i += 1
+        return found
+
+    def get(self, pk):
+        """
+        Return node by category pk
+        :param pk: Integer
+        :return: CategoryNode or None
+        """
+        found = self.find(self.pk_keys, self.pk_positions, pk)
+        return CategoryNode(self, found[0]) if found else None
+
+    def get_by_slug(self, slug):
+        """
+        Return node by category slug
+        :param slug: String
+        :return: CategoryNode or None
+        """
+        for position in self.find(self.slug_keys, self.slug_positions, path_hash(slug)):
+            if self.slugs[position] == slug:
+                return CategoryNode(self, position)
+        return None
+
+    def get_by_path(self, path):
+        """
+        Return node by full or unique category path
+        :param path: String, path elements joined with "/", leading and trailing "/" are ignored
+        :return: CategoryNode or None
+        """
+        path = path.strip('/')
+        for position in self.find(self.path_keys, self.path_positions, path_hash(path)):
+            # hash collision is checked with actual paths of found node
+            paths = CategoryNode(self, position).get_url_paths()
+            if path in ('/'.join(paths['full']), '/'.join(paths['unique'])):
+                return CategoryNode(self, position)
+        return None
+
+    def get_roots(self):
+        """
+        Return root nodes in tree order
+        :return: List of CategoryNode
+        """
+        return [CategoryNode(self, p) for p in range(len(self.pks)) if self.parents[p] < 0]
+
+    def write_snapshot(self, path):
+        """
+        Write index to snapshot file. File is written to temporary file and atomically replaces old one, processes
+        that have old file mapped keep reading it until they load new one.
+        Layout: magic, header length, JSON header with version, item classes and sections, sections aligned to 8 bytes.
+        :param path: String, file path
+        :return:
+        """
+        sections = [(name, typecode, getattr(self, name).tobytes()) for name, typecode in SNAPSHOT_COLUMNS]
+        for name in SNAPSHOT_STRINGS:
+            offsets, data = StringTable.encode(getattr(self, name))
+            sections.extend([(name + '_offsets', 'I', offsets.tobytes()), (name + '_data', 'B', data)])
+        header = {'format': SNAPSHOT_FORMAT, 'version': self.version, 'count': len(self),
+                  'item_classes': list(self.item_classes), 'sections': {}}
+        offset = 0
+        for name, typecode, data in sections:
+            header['sections'][name] = [typecode, offset, len(data)]
+            offset += len(data) + -len(data) % 8
+        header = json.dumps(header).encode('utf-8')
+        start = SNAPSHOT_PREFIX.size + len(header)
+        start += -start % 8
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix='.djcat-index-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(SNAPSHOT_PREFIX.pack(SNAPSHOT_MAGIC, len(header)) + header)
+                f.write(b'\0' * (start - SNAPSHOT_PREFIX.size - len(header)))
+                for name, typecode, data in sections:
+                    f.write(data + b'\0' * (-len(data) % 8))
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load_snapshot(cls, path, model=None):
+        """
+        Return index memory mapped read only from snapshot file, pages of file are shared by all processes that
+        loaded it
+        :param path: String, file path
+        :param model: Category model
+        :return: CategoryIndex
+        """
+        with open(path, 'rb') as f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # empty file
+                raise IndexSnapshotNotValid(path)
+        try:
+            magic, header_length = SNAPSHOT_PREFIX.unpack_from(data)
+            if not magic == SNAPSHOT_MAGIC:
+                raise ValueError
+            header = json.loads(data[SNAPSHOT_PREFIX.size:SNAPSHOT_PREFIX.size + header_length].decode('utf-8'))
+            if not header['format'] == SNAPSHOT_FORMAT:
+                raise ValueError
+            start = SNAPSHOT_PREFIX.size + header_length
+            start += -start % 8
+            view = memoryview(data)
+            sections = {}
+            for name, (typecode, offset, length) in header['sections'].items():
+                if start + offset + length > len(data):
+                    raise ValueError
+                sections[name] = view[start + offset:start + offset + length].cast(typecode)
+        except (struct.error, ValueError, KeyError, TypeError):
+            raise IndexSnapshotNotValid(path)
+
+        index = cls(model)
+        index.version = header['version']
+        index.item_classes = header['item_classes']
+        for name, typecode in SNAPSHOT_COLUMNS:
+            setattr(index, name, sections[name])
+        for name in SNAPSHOT_STRINGS:
+            setattr(index, name, StringTable(sections[name + '_offsets'], sections[name + '_data']))
+        return index
+
+
+_index = {'version': None, 'index': None}
+
+
+@contextmanager
+def snapshot_lock(path):
+    """
+    Hold exclusive lock of snapshot file across processes, lock is taken on separate "<path>.lock" file because
+    snapshot file itself is replaced on write. Without fcntl (not posix) lock is not taken.
+    :param path: String, snapshot file path
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(path + '.lock', 'a') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def load_snapshot_version(path, version):
+    """
+    Return index loaded from snapshot file if file has this version
+    :param path: String, snapshot file path
+    :param version: Float, catalog version
+    :return: CategoryIndex or None
+    """
+    try:
+        index = CategoryIndex.load_snapshot(path)
+    except (OSError, IndexSnapshotNotValid):
+        return None
+    return index if index.version == version else None
+
+
+def load_category_index(version, snapshot=None):
+    """
+    Return category index of catalog version. With snapshot file it is loaded from file if file has this version,
+    otherwise index is built and written to file for other processes. Only one process builds the snapshot, others
+    wait for its lock and load the written file.
+    :param version: Float, catalog version
+    :param snapshot: String, snapshot file path or None
+    :return: CategoryIndex
+    """
+    if not snapshot:
+        index = CategoryIndex.build()
+        index.version = version
+        return index
+    index = load_snapshot_version(snapshot, version)
+    if index is not None:
+        return index
+    with snapshot_lock(snapshot):
+        # snapshot may have been written by process that held the lock
+        index = load_snapshot_version(snapshot, version)
+        if index is not None:
+            return index
+        index = CategoryIndex.build()
+        index.version = version
+        index.write_snapshot(snapshot)
+    # mapped file pages are shared with other processes, built columns are freed
+    loaded = load_snapshot_version(snapshot, version)
+    return loaded if loaded is not None else index
+
+
+def get_category_index():
+    """
+    Return process wide category index, it is rebuilt or loaded from DJCAT_INDEX_SNAPSHOT file when catalog version
+    changes
+    :return: CategoryIndex
+    """
+    version = versions.get_versions(versions.CATALOG)[versions.CATALOG]
+    if not _index['version'] == version:
+        # version is taken before build, so changes made during build are not missed
+        _index['index'] = load_category_index(version, settings.DJCAT_INDEX_SNAPSHOT)
+        _index['version'] = version
+    return _index['index']
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from djcat import settings
+from djcat.transfer import export_catalog
+
+
+class Command(BaseCommand):
+    help = 'Export categories and items as NDJSON stream, see djcat_import'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='-', help='Output file path, stdout by default.')
+        parser.add_argument('--chunk-size', type=int, default=settings.DJCAT_ITEMS_CHUNK_SIZE,
+                            help='Items per query.')
+
+    def handle(self, *args, **options):
+        if options['output'] == '-':
+            export_catalog(self.stdout, chunk_size=options['chunk_size'])
+            return
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            counts = export_catalog(f, chunk_size=options['chunk_size'])
+        self.stdout.write('Done: {} categories, {} items written to {}.'.format(
+            counts['categories'], counts['items'], options['output']))
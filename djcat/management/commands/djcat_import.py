@@ -0,0 +1,27 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from djcat import settings
+from djcat.transfer import import_catalog
+from djcat.exceptions import CatalogImportError
+
+
+class Command(BaseCommand):
+    help = 'Import categories and items written by djcat_export into empty catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='Input file path, "-" for stdin.')
+        parser.add_argument('--batch-size', type=int, default=settings.DJCAT_ITEMS_CHUNK_SIZE,
+                            help='Rows per insert.')
+
+    def handle(self, *args, **options):
+        try:
+            if options['input'] == '-':
+                counts = import_catalog(sys.stdin, batch_size=options['batch_size'])
+            else:
+                with open(options['input'], encoding='utf-8') as f:
+                    counts = import_catalog(f, batch_size=options['batch_size'])
+        except CatalogImportError as e:
+            raise CommandError(str(e))
+        self.stdout.write('Done: {} categories, {} items imported.'.format(counts['categories'], counts['items']))
@@ -0,0 +1,104 @@
+from multiprocessing import Pool
+
+import django
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from djcat import settings
+from djcat import versions
+
+
+def rebuild_root(root_pk, write=True):
+    """
+    Rebuild (or verify if not write) one root tree, runs in worker process with its own db connection
+    :param root_pk: Integer, root category pk
+    :param write: Bool, store changes
+    :return: Dictionary, see BaseCategoryManager.rebuild_tree(), nodes are replaced with their string presentation
+    """
+    CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+    with transaction.atomic():
+        root = CategoryModel.objects.get(pk=root_pk)
+        diff = CategoryModel.objects.rebuild_tree(root, write=write)
+        if write:
+            versions.bump_on_commit(versions.CATALOG, versions.tree_scope(root.pk))
+    diff['root'] = str(root)
+    diff['inactive'] = [str(n) for n in diff['inactive']]
+    diff['urls'] = [(str(n), stored, computed) for n, stored, computed in diff['urls']]
+    diff['ancestors'] = [(str(n), stored, computed) for n, stored, computed in diff['ancestors']]
+    return diff
+
+
+def rebuild_root_star(args):
+    return rebuild_root(*args)
+
+
+def init_worker():
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = 'Recompute categories url paths, canonical urls, ancestor chains and active flags of every root tree'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--root', type=int, action='append', dest='roots', default=[],
+                            help='Root category pk, may be repeated. All roots by default.')
+        parser.add_argument('--jobs', type=int, default=1,
+                            help='Number of worker processes, each root tree is processed independently. '
+                                 'Parallel writes need database with concurrent writers (not SQLite).')
+        parser.add_argument('--dry-run', action='store_true', default=False,
+                            help='Compute and report changes without writing.')
+        parser.add_argument('--verify', action='store_true', default=False,
+                            help='Report differences between stored and computed paths without writing, '
+                                 'fail if any found.')
+
+    def handle(self, *args, **options):
+        CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+        roots = options['roots'] or list(CategoryModel.objects.filter(parent__isnull=True)
+                                         .order_by('pk').values_list('pk', flat=True))
+        write = not (options['dry_run'] or options['verify'])
+
+        results = []
+        if options['jobs'] > 1 and len(roots) > 1:
+            # workers open own connections, inherited ones must not be shared
+            connections.close_all()
+            pool = Pool(processes=options['jobs'], initializer=init_worker)
+            try:
+                for diff in pool.imap_unordered(rebuild_root_star, [(pk, write) for pk in roots]):
+                    results.append(self.report(diff, len(results) + 1, len(roots), options['verify']))
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            for pk in roots:
+                results.append(self.report(rebuild_root(pk, write), len(results) + 1, len(roots), options['verify']))
+
+        changes = sum(results)
+        action = 'found' if not write else 'fixed'
+        self.stdout.write('Done: {} roots, {} differences {}.'.format(len(roots), changes, action))
+        if options['verify'] and changes:
+            raise CommandError('Stored paths differ from computed in {} places.'.format(changes))
+
+    def report(self, diff, num, total, verbose):
+        """
+        Print root tree progress and differences
+        :return: Integer, differences count
+        """
+        changes = len(diff['inactive']) + len(diff['urls']) + len(diff['ancestors']) + len(diff['stale']) + \
+            len(diff['missing'])
+        self.stdout.write('[{}/{}] {}: {} nodes, {} inactive, {} urls, {} ancestors, {} stale paths, '
+                          '{} missing paths'.format(num, total, diff['root'], diff['nodes'], len(diff['inactive']),
+                                                    len(diff['urls']), len(diff['ancestors']), len(diff['stale']),
+                                                    len(diff['missing'])))
+        if verbose:
+            for name in diff['inactive']:
+                self.stdout.write('  active under inactive ancestor: {}'.format(name))
+            for name, stored, computed in diff['urls']:
+                self.stdout.write('  url {}: stored "{}", computed "{}"'.format(name, stored, computed))
+            for name, stored, computed in diff['ancestors']:
+                self.stdout.write('  ancestors {}: stored "{}", computed "{}"'.format(name, stored, computed))
+            for row in diff['stale']:
+                self.stdout.write('  stale path: {} ({})'.format(row[3], row[2]))
+            for row in diff['missing']:
+                self.stdout.write('  missing path: {} ({})'.format(row[2], row[1]))
+        return changes
@@ -0,0 +1,35 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from djcat import settings
+from djcat import versions
+
+
+class Command(BaseCommand):
+    help = 'Recount active items of every category including descendants items and fix stored counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', default=False,
+                            help='Compute and report changes without writing.')
+        parser.add_argument('--verify', action='store_true', default=False,
+                            help='Report differences between stored and computed counts without writing, '
+                                 'fail if any found.')
+
+    def handle(self, *args, **options):
+        CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+        write = not (options['dry_run'] or options['verify'])
+
+        with transaction.atomic():
+            diff = CategoryModel.objects.recount_items(write=write)
+            if write and diff:
+                versions.bump_on_commit(versions.COUNTS)
+
+        if options['verbosity'] > 1 or options['verify']:
+            names = dict(CategoryModel.objects.filter(pk__in=[x[0] for x in diff]).values_list('pk', 'name'))
+            for pk, stored, computed in diff:
+                self.stdout.write('  {}: stored {}, computed {}'.format(names[pk], stored, computed))
+        action = 'found' if not write else 'fixed'
+        self.stdout.write('Done: {} differences {}.'.format(len(diff), action))
+        if options['verify'] and diff:
+            raise CommandError('Stored items counts differ from computed in {} categories.'.format(len(diff)))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from djcat import settings
+from djcat.deferred import process_queue
+
+
+class Command(BaseCommand):
+    help = 'Process deferred category tree updates queue, see DJCAT_DEFERRED_TREE_UPDATES setting'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', default=False,
+                            help='Process queued updates and exit.')
+        parser.add_argument('--interval', type=float, default=settings.DJCAT_DEFERRED_TREE_INTERVAL,
+                            help='Seconds between queue checks.')
+
+    def handle(self, *args, **options):
+        while True:
+            processed = process_queue()
+            if processed or options['verbosity'] > 1:
+                self.stdout.write('Rebuilt {} trees: {}'.format(len(processed), ', '.join(map(str, processed))))
+            if options['once']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
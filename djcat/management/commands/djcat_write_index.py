@@ -0,0 +1,26 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from djcat import settings
+from djcat import versions
+from djcat.index import CategoryIndex
+
+
+class Command(BaseCommand):
+    help = 'Build category index of current catalog version and write it to snapshot file shared by workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=settings.DJCAT_INDEX_SNAPSHOT,
+                            help='Snapshot file path, DJCAT_INDEX_SNAPSHOT by default.')
+
+    def handle(self, *args, **options):
+        if not options['output']:
+            raise CommandError('Snapshot file path is not set, use --output or DJCAT_INDEX_SNAPSHOT setting.')
+        # version is taken before build, so changes made during build make snapshot outdated
+        version = versions.get_versions(versions.CATALOG)[versions.CATALOG]
+        index = CategoryIndex.build()
+        index.version = version
+        index.write_snapshot(options['output'])
+        self.stdout.write('Done: {} categories, {} bytes written to {}.'.format(
+            len(index), os.path.getsize(options['output']), options['output']))
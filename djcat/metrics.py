@@ -0,0 +1,170 @@
+import time
+from functools import wraps
+
+from django.dispatch import Signal
+from django.utils.module_loading import import_string
+
+from . import settings
+
+
+KIND_TIMING = 'timing'
+KIND_COUNTER = 'counter'
+
+# metric names
+PATH_RESOLVE = 'path.resolve'
+PATH_PARSE_QUERY = 'path.parse_query'
+PATH_PARSE_POST_REQUEST = 'path.parse_post_request'
+PATH_BUILD_URL = 'path.build_url'
+PATH_DB_LOOKUP = 'path.db_lookup'
+PATH_DB_LOOKUPS = 'path.db_lookups'
+CACHE_HIT = 'cache.hit'
+CACHE_MISS = 'cache.miss'
+TREE_UPDATE = 'tree.update'
+TREE_ROWS = 'tree.rows'
+
+metric = Signal(providing_args=['name', 'kind', 'value', 'tags'])
+
+
+class NullTimer:
+    """
+    Timer used when metrics are disabled, does nothing
+    """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+NULL_TIMER = NullTimer()
+
+
+class Timer:
+    """
+    Measure duration of block and emit it as timing metric
+    """
+    def __init__(self, metrics, name, tags):
+        self.metrics = metrics
+        self.name = name
+        self.tags = tags
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.metrics.emit(self.name, KIND_TIMING, time.perf_counter() - self.start, self.tags)
+        return False
+
+
+class Metrics:
+    """
+    Timing and counter hooks of djcat hot paths. Metrics are passed to callback(name, kind, value, tags) and sent
+    with "metric" signal. When disabled every hook returns immediately.
+    Example:
+        metrics.configure(enabled=True, callback=lambda name, kind, value, tags: statsd.timing(name, value))
+    """
+    def __init__(self, enabled=False, callback=None):
+        self.enabled = False
+        self.callback = None
+        self.configure(enabled=enabled, callback=callback)
+
+    def configure(self, enabled=None, callback=None):
+        """
+        Enable or disable metrics and set callback
+        :param enabled: Bool, None - keep current
+        :param callback: Callable or dotted path to callable, None - keep current
+        :return:
+        """
+        if enabled is not None:
+            self.enabled = enabled
+        if callback is not None:
+            self.callback = import_string(callback) if isinstance(callback, str) else callback
+
+    def emit(self, name, kind, value, tags=None):
+        """
+        Pass metric to callback and signal receivers
+        :param name: String, metric name
+        :param kind: String, KIND_TIMING - value in seconds or KIND_COUNTER
+        :param value: Number
+        :param tags: Dictionary or None
+        :return:
+        """
+        tags = tags or {}
+        if self.callback:
+            self.callback(name, kind, value, tags)
+        if metric.receivers:
+            metric.send(sender=self.__class__, name=name, kind=kind, value=value, tags=tags)
+
+    def incr(self, name, value=1, **tags):
+        if self.enabled:
+            self.emit(name, KIND_COUNTER, value, tags)
+
+    def timing(self, name, seconds, **tags):
+        if self.enabled:
+            self.emit(name, KIND_TIMING, seconds, tags)
+
+    def timer(self, name, **tags):
+        """
+        Return context manager that emits duration of block
+        :param name: String, metric name
+        :return: Timer
+        """
+        if not self.enabled:
+            return NULL_TIMER
+        return Timer(self, name, tags)
+
+    def timed(self, name):
+        """
+        Decorator, emits duration of function call
+        :param name: String, metric name
+        :return: Decorator
+        """
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with Timer(self, name, {}):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+class MetricsRecorder:
+    """
+    Callback that aggregates metrics in memory, useful without metrics service and in tests.
+    Example:
+        recorder = MetricsRecorder()
+        metrics.configure(enabled=True, callback=recorder)
+        ...
+        print(recorder.summary())
+    """
+    def __init__(self):
+        self.records = []
+
+    def __call__(self, name, kind, value, tags):
+        self.records.append((name, kind, value, tags))
+
+    def clear(self):
+        self.records = []
+
+    def values(self, name):
+        return [r[2] for r in self.records if r[0] == name]
+
+    def summary(self):
+        """
+        Return aggregated metrics
+        :return: Dictionary {name: {'kind', 'count', 'total', 'max'}}
+        """
+        result = {}
+        for name, kind, value, tags in self.records:
+            s = result.setdefault(name, {'kind': kind, 'count': 0, 'total': 0, 'max': 0})
+            s['count'] += 1
+            s['total'] += value
+            s['max'] = max(s['max'], value)
+        return result
+
+
+metrics = Metrics(enabled=settings.DJCAT_METRICS_ENABLED, callback=settings.DJCAT_METRICS_CALLBACK)
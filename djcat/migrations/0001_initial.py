@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.DJCAT_CATEGORY_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryPath',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('full', 'Full'), ('unique', 'Unique')], max_length=10,
+                                          verbose_name='Kind')),
+                ('path', models.CharField(max_length=1000, unique=True, verbose_name='Path')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='url_paths',
+                                               to=settings.DJCAT_CATEGORY_MODEL, verbose_name='Category')),
+            ],
+            options={
+                'verbose_name': 'Category path',
+                'verbose_name_plural': 'Category paths',
+            },
+        ),
+    ]
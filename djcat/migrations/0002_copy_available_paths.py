@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Copy category paths from former DjcatCategory.available_paths JSON column to CategoryPath table.
+Project migration that removes available_paths column from category model must depend on this migration:
+    dependencies = [('djcat', '0002_copy_available_paths'), ...]
+"""
+from __future__ import unicode_literals
+
+import json
+
+from django.conf import settings
+from django.db import migrations
+
+
+def copy_available_paths(apps, schema_editor):
+    try:
+        Category = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+    except LookupError:
+        # category model app is not migrated yet, nothing to copy
+        return
+    if 'available_paths' not in [f.name for f in Category._meta.get_fields()]:
+        return
+    CategoryPath = apps.get_model('djcat', 'CategoryPath')
+
+    rows = []
+    for pk, is_unique_in_path, available_paths in Category.objects.order_by('pk')\
+            .values_list('pk', 'is_unique_in_path', 'available_paths').iterator():
+        if not available_paths:
+            continue
+        paths = json.loads(available_paths)
+        full = '/'.join(paths['full'])
+        rows.append(CategoryPath(category_id=pk, kind='full', path=full))
+        unique = '/'.join(paths['unique'])
+        if is_unique_in_path and unique and not unique == full:
+            rows.append(CategoryPath(category_id=pk, kind='unique', path=unique))
+        if len(rows) >= 1000:
+            CategoryPath.objects.bulk_create(rows, batch_size=300)
+            rows = []
+    CategoryPath.objects.bulk_create(rows, batch_size=300)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djcat', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_available_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.DJCAT_CATEGORY_MODEL),
+        ('djcat', '0002_copy_available_paths'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryRedirect',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=1000, unique=True, verbose_name='Old path')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Created')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='redirects',
+                                               to=settings.DJCAT_CATEGORY_MODEL, verbose_name='Category')),
+            ],
+            options={
+                'verbose_name': 'Category redirect',
+                'verbose_name_plural': 'Category redirects',
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djcat', '0003_categoryredirect'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TreeUpdate',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('root_id', models.PositiveIntegerField(db_index=True, verbose_name='Root category')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Created')),
+            ],
+            options={
+                'verbose_name': 'Tree update',
+                'verbose_name_plural': 'Tree updates',
+            },
+        ),
+    ]
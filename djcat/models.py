@@ -1,7 +1,16 @@
 import abc
+import copy
 import json
-
-from django.db import models
+import threading
+from collections import namedtuple
+
+from django.db import models, router, transaction
+from django.db.models.signals import pre_delete, post_delete, class_prepared
+from django.dispatch import receiver
+from django.apps import apps
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Case, When, Value, F
+from django.db.models.functions import Concat
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.utils.translation import ugettext as _
@@ -10,10 +19,19 @@ from mptt.models import MPTTModel, TreeForeignKey
 
 from . import settings
 from .register import CatalogItem
-from .utils import create_slug, unique_slug, create_uid
+from .tree import MaterializedPathNode
+from .metrics import metrics, TREE_UPDATE, TREE_ROWS
+from . import versions
+from . import deferred
+from .utils import create_slug, unique_slug, create_uid, bulk_update_fields, chunks, atomic_retry, get_tree_fields
 from .exceptions import *
 
 
+# ancestor of category stored in category row, see BaseDjcatCategory.get_ancestor_chain()
+CategoryAncestor = namedtuple('CategoryAncestor', ['pk', 'name', 'slug', 'url', 'is_unique_in_path'])
+Breadcrumb = namedtuple('Breadcrumb', ['name', 'url'])
+
+
 class BaseDjcat:
     __metaclass__ = abc.ABCMeta
 
@@ -56,46 +74,272 @@ class BaseCategoryManager(models.Manager):
         :return:
         """
         if instance_before and not instance_before.is_active == instance.is_active:
-            instance.get_descendants().update(is_active=instance.is_active)
+            updated = instance.get_descendants().update(is_active=instance.is_active)
+            metrics.incr(TREE_ROWS, updated, table='category', field='is_active')
 
     def update_paths(self, instance, instance_before):
         """
         Updates tree url paths
         :param instance: Model instance
         :param instance_before: Model instance before save()
-        :return:
+        :return: List of instance ancestors, instance and its descendants in tree order
         """
-        # update actual tree branch where instance
-        for node in instance.get_family():
-            node.available_paths = json.dumps(self.make_url_paths(node))
-            node.save(update_process=True)
-
-        # update tree branch where instance was before move
-        if instance_before and not instance_before.get_root() == instance.get_root():
-            for node in instance_before.get_family():
-                node.available_paths = json.dumps(self.make_url_paths(node))
-                node.save(update_process=True)
+        # update actual tree branch where instance, paths of nodes left in branch where instance was before move
+        # don't depend on instance, so that branch is not touched
+        family = list(instance.get_family())
+        self.update_family_paths(family)
+        for node in family:
+            if node.pk == instance.pk:
+                instance.url = node.url
+                instance.ancestors = node.ancestors
+        return family
+
+    def compute_paths(self, nodes):
+        """
+        Compute url paths rows, canonical urls and ancestor chains of nodes in one pass.
+        Nodes must be ordered so that parent goes before its children (tree order).
+        :param nodes: List of model instances
+        :return: Tuple (set of path rows, dictionary {pk: canonical url}, dictionary {pk: encoded ancestor chain})
+        """
+        paths = {}
+        rows = set()
+        urls = {}
+        chains = {}
+        ancestors = {}
+        for node in nodes:
+            parent_paths = paths.get(node.parent_id) if node.parent_id else None
+            parent_chain = chains.get(node.parent_id, []) if node.parent_id else []
+            if node.parent_id and parent_paths is None:
+                parent_paths = node.parent.get_url_paths()
+                parent_chain = node.parent.get_ancestor_chain(include_self=True)
+            node_paths = self.make_url_paths(node, parent_paths)
+            paths[node.pk] = node_paths
+            rows.update(self.make_path_rows(node, node_paths))
+            urls[node.pk] = self.make_url(node, node_paths)
+            ancestors[node.pk] = node.encode_ancestor_chain(parent_chain)
+            chains[node.pk] = parent_chain + [CategoryAncestor(node.pk, node.name, node.slug, urls[node.pk],
+                                                               node.is_unique_in_path)]
+        return rows, urls, ancestors
+
+    def compute_inactive(self, nodes):
+        """
+        Return active nodes that have inactive ancestor, nodes must be in tree order
+        :param nodes: List of model instances
+        :return: List of model instances
+        """
+        active = {}
+        inactive = []
+        for node in nodes:
+            active[node.pk] = node.is_active and active.get(node.parent_id, True)
+            if node.is_active and not active[node.pk]:
+                inactive.append(node)
+        return inactive
+
+    def update_family_paths(self, nodes):
+        """
+        Compute url paths, canonical urls and ancestor chains of nodes in one pass and store changed ones.
+        Nodes must be ordered so that parent goes before its children (tree order).
+        :param nodes: Iterable of model instances
+        :return: List of nodes with changed canonical url
+        """
+        nodes = list(nodes)
+        rows, urls, ancestors = self.compute_paths(nodes)
+        values = {}
+        url_changed = []
+        for node in nodes:
+            if not node.ancestors == ancestors[node.pk]:
+                node.ancestors = ancestors[node.pk]
+                values[node.pk] = {'ancestors': node.ancestors}
+            if not node.url == urls[node.pk]:
+                node.url = urls[node.pk]
+                values.setdefault(node.pk, {})['url'] = node.url
+                if node.is_endpoint:
+                    url_changed.append(node)
+        updated = bulk_update_fields(self.all(), values)
+        deleted, created = CategoryPath.objects.db_manager(self._db).replace_paths([n.pk for n in nodes], rows)
+        items_updated = self.update_items_urls(url_changed)
+        if metrics.enabled:
+            metrics.incr(TREE_ROWS, updated, table='category', field='url')
+            metrics.incr(TREE_ROWS, deleted + created, table='category_path')
+            metrics.incr(TREE_ROWS, items_updated, table='item', field='url')
+        return url_changed
+
+    def rebuild_tree(self, root, write=True):
+        """
+        Recompute active flags and url paths of whole tree and store them if write.
+        :param root: Root node instance
+        :param write: Bool, store changes, otherwise only compare stored with computed
+        :return: Dictionary with found differences: 'nodes' - nodes count, 'inactive' - list of nodes to deactivate,
+            'urls' - list of tuples (node, stored url, computed url), 'ancestors' - list of tuples (node, stored chain,
+            computed chain), 'stale' and 'missing' - lists of path rows
+        """
+        nodes = list(root.get_descendants(include_self=True).using(self._db))
+        inactive = self.compute_inactive(nodes)
+        for node in inactive:
+            node.is_active = False
+        rows, urls, ancestors = self.compute_paths(nodes)
+        stale, missing = CategoryPath.objects.db_manager(self._db).diff_paths([n.pk for n in nodes], rows)
+        diff = {
+            'nodes': len(nodes),
+            'inactive': inactive,
+            'urls': [(n, n.url, urls[n.pk]) for n in nodes if not n.url == urls[n.pk]],
+            'ancestors': [(n, n.ancestors, ancestors[n.pk]) for n in nodes if not n.ancestors == ancestors[n.pk]],
+            'stale': stale,
+            'missing': sorted(missing),
+        }
+        if write:
+            for pks in chunks([n.pk for n in inactive], 500):
+                self.filter(pk__in=pks).update(is_active=False)
+            self.update_family_paths(nodes)
+        return diff
+
+    def update_items_urls(self, nodes):
+        """
+        Updates denormalized items urls of endpoint categories
+        :param nodes: List of endpoint category instances
+        :return: Integer, updated items count
+        """
+        content_type = ContentType.objects.db_manager(self._db).get_for_model(self.model)
+        by_class = {}
+        updated = 0
+        for node in nodes:
+            by_class.setdefault(node.item_class, []).append(node)
+        for item_class, endpoints in by_class.items():
+            item = CatalogItem.get_item_by_class(item_class)
+            if not item:
+                continue
+            url = Case(*[When(object_id=n.pk, then=Value(n.url)) for n in endpoints],
+                       output_field=models.CharField())
+            updated += item.class_obj.objects.db_manager(self._db)\
+                .filter(content_type=content_type, object_id__in=[n.pk for n in endpoints])\
+                .update(url=Concat(url, F('slug'), Value('/')))
+        return updated
+
+    def lock_trees(self, *root_pks):
+        """
+        Lock root rows of trees till the end of transaction, so tree writers are serialized.
+        Roots are locked in pk order, writers of several trees don't deadlock.
+        :param root_pks: Integers, root categories pk
+        :return: Set of locked root pks
+        """
+        pks = sorted({pk for pk in root_pks if pk})
+        if not pks:
+            return set()
+        return set(self.select_for_update().filter(pk__in=pks).order_by('pk').values_list('pk', flat=True))
 
-    def update_tree(self, instance, instance_before):
+    def update_tree(self, instance, instance_before, old_root_pk=None):
         """
-        Update tree branch where instance present, if instance was moved to another branch then update old branch
+        Update tree branch where instance present and bump versions of changed trees.
+        With DJCAT_DEFERRED_TREE_UPDATES active flags and items counts are updated here, url paths of changed trees
+        are rebuilt by deferred worker after commit, see djcat.deferred.
         :param instance: Model instance
         :param instance_before: Model instance before save()
+        :param old_root_pk: Integer, root pk of tree where instance was before move
         :return:
         """
-        self.update_active(instance, instance_before)
-        self.update_paths(instance, instance_before)
-
-    def make_url_paths(self, node):
+        if settings.DJCAT_DEFERRED_TREE_UPDATES:
+            self.update_active(instance, instance_before)
+            self.update_moved_item_count(instance, instance_before)
+            # stored ancestors of instance are not updated yet
+            deferred.schedule(instance.get_root().pk, old_root_pk)
+            return
+        with metrics.timer(TREE_UPDATE):
+            self.update_active(instance, instance_before)
+            family = self.update_paths(instance, instance_before)
+            self.update_moved_item_count(instance, instance_before)
+        scopes = [versions.CATALOG, versions.tree_scope(family[0].pk)]
+        if old_root_pk:
+            scopes.append(versions.tree_scope(old_root_pk))
+        versions.bump_on_commit(*scopes)
+
+    def add_item_count(self, category_pk, delta):
+        """
+        Add delta to active items count of category and its ancestors
+        :param category_pk: Integer, category pk
+        :param delta: Integer
+        :return: Integer, updated categories count
+        """
+        if not delta:
+            return 0
+        # fresh instance, tree fields of cached one may be outdated
+        node = self.get(pk=category_pk)
+        updated = node.get_ancestors(include_self=True).update(item_count=F('item_count') + delta)
+        versions.bump_on_commit(versions.COUNTS)
+        return updated
+
+    def remove_item_count(self, instance):
+        """
+        Subtract items count of deleted category from its ancestors. Count is read fresh and counts of whole subtree
+        are zeroed, so descendants deleted with category in any order don't subtract their items again.
+        :param instance: Model instance
+        :return:
+        """
+        node = self.filter(pk=instance.pk).first()
+        if not node or not node.item_count:
+            return
+        if node.parent_id:
+            self.add_item_count(node.parent_id, -node.item_count)
+        node.get_descendants(include_self=True).update(item_count=0)
+
+    def update_moved_item_count(self, instance, instance_before):
+        """
+        Move items count of instance from old ancestors to new ones if instance was moved
+        :param instance: Model instance
+        :param instance_before: Model instance before save()
+        :return:
+        """
+        if not instance_before or instance_before.parent_id == instance.parent_id:
+            return
+        if instance_before.parent_id:
+            self.add_item_count(instance_before.parent_id, -instance.item_count)
+        if instance.parent_id:
+            self.add_item_count(instance.parent_id, instance.item_count)
+
+    def count_items(self):
+        """
+        Count active items of every category including descendants items
+        :return: Dictionary {category pk: items count}
+        """
+        parents = dict(self.values_list('pk', 'parent_id'))
+        counts = {pk: 0 for pk in parents}
+        content_type = ContentType.objects.get_for_model(self.model)
+        item_classes = set(self.filter(is_endpoint=True).values_list('item_class', flat=True))
+        for item_class in item_classes:
+            item = CatalogItem.get_item_by_class(item_class)
+            if not item:
+                continue
+            rows = item.class_obj.objects.filter(content_type=content_type, active=True)\
+                .values_list('object_id').annotate(count=models.Count('pk')).order_by()
+            for pk, count in rows:
+                while pk in counts:
+                    counts[pk] += count
+                    pk = parents[pk]
+        return counts
+
+    def recount_items(self, write=True):
+        """
+        Recount active items of all categories and store counts that differ if write
+        :param write: Bool, store changes, otherwise only compare stored with computed
+        :return: List of tuples (category pk, stored count, computed count)
+        """
+        counts = self.count_items()
+        diff = [(pk, stored, counts[pk]) for pk, stored in self.values_list('pk', 'item_count')
+                if pk in counts and not stored == counts[pk]]
+        if write:
+            bulk_update_fields(self.model.objects.all(), {pk: {'item_count': count} for pk, stored, count in diff})
+        return diff
+
+    def make_url_paths(self, node, parent_paths=None):
         """
         Return category instance (node) paths: full and unique
         :param node: Model instance
+        :param parent_paths: Dictionary, parent paths
         :return: Dictionary paths
         """
         paths = {'full': [], 'unique': []}
 
-        if node.parent:
-            paths = node.parent.get_url_paths()
+        if parent_paths:
+            paths = {'full': list(parent_paths['full']), 'unique': list(parent_paths['unique'])}
             paths['full'].append(node.slug)
             if node.is_unique_in_path:
                 paths['unique'].append(node.slug)
@@ -106,25 +350,206 @@ class BaseCategoryManager(models.Manager):
 
         return paths
 
+    def make_path_rows(self, node, paths):
+        """
+        Return category path rows: full path and unique path if it leads to node itself and differs from full.
+        Unique path of not unique node is the path of its nearest unique ancestor, so it is not stored.
+        :param node: Model instance
+        :param paths: Dictionary paths
+        :return: List of tuples (category pk, kind, path string)
+        """
+        full = '/'.join(paths['full'])
+        rows = [(node.pk, CategoryPath.KIND_FULL, full)]
+        if node.is_unique_in_path:
+            unique = '/'.join(paths['unique'])
+            if not unique == full:
+                rows.append((node.pk, CategoryPath.KIND_UNIQUE, unique))
+        return rows
+
+    def make_url(self, node, paths):
+        """
+        Return canonical url of category: shortest path that leads to node itself
+        :param node: Model instance
+        :param paths: Dictionary paths
+        :return: String
+        """
+        path = paths['full']
+        if node.is_unique_in_path and len(paths['unique']) < len(path):
+            path = paths['unique']
+        return '/'.join(path) + '/'
+
+
+class CategoryPathManager(models.Manager):
+
+    def get_categories(self, paths):
+        """
+        Return categories of given path strings with one query
+        :param paths: List of strings, path elements joined with "/"
+        :return: Dictionary {path: Category instance}
+        """
+        return {p.path: p.category for p in self.select_related('category').filter(path__in=paths)}
+
+    def diff_paths(self, category_pks, rows):
+        """
+        Compare stored paths of categories with given rows
+        :param category_pks: List of categories pk
+        :param rows: Iterable of tuples (category pk, kind, path string)
+        :return: Tuple (list of stale stored rows as tuples (pk, category pk, kind, path), set of missing rows)
+        """
+        missing = set(rows)
+        stale = []
+        for pks in chunks(category_pks, 500):
+            for row in self.filter(category_id__in=pks).values_list('pk', 'category_id', 'kind', 'path'):
+                if row[1:] in missing:
+                    missing.remove(row[1:])
+                else:
+                    stale.append(row)
+        return stale, missing
+
+    def replace_paths(self, category_pks, rows):
+        """
+        Replace stored paths of categories with given rows, only changed rows are deleted and created
+        :param category_pks: List of categories pk
+        :param rows: Iterable of tuples (category pk, kind, path string)
+        :return: Tuple (deleted rows count, created rows count)
+        """
+        stale, missing = self.diff_paths(category_pks, rows)
+        for pks in chunks([x[0] for x in stale], 500):
+            self.filter(pk__in=pks).delete()
+        self.bulk_create([self.model(category_id=r[0], kind=r[1], path=r[2]) for r in missing], batch_size=300)
+        if settings.DJCAT_PATH_REDIRECTS:
+            CategoryRedirect.objects.db_manager(self._db).update_redirects([(x[1], x[3]) for x in stale],
+                                                                           [x[2] for x in missing])
+        return len(stale), len(missing)
+
+    def get_category(self, path):
+        """
+        Return category with given path string
+        :param path: String, path elements joined with "/"
+        :return: Category instance or None
+        """
+        try:
+            return self.select_related('category').get(path=path).category
+        except ObjectDoesNotExist:
+            return None
+
+
+class CategoryPath(models.Model):
+    """
+    Category url path, one row per category path of each kind, path strings are unique in catalog
+    """
+    KIND_FULL = 'full'
+    KIND_UNIQUE = 'unique'
+    KINDS = (
+        (KIND_FULL, _('Full')),
+        (KIND_UNIQUE, _('Unique')),
+    )
+
+    category = models.ForeignKey(settings.DJCAT_CATEGORY_MODEL, related_name='url_paths', on_delete=models.CASCADE,
+                                 verbose_name=_('Category'))
+    kind = models.CharField(max_length=10, choices=KINDS, verbose_name=_('Kind'))
+    path = models.CharField(max_length=1000, unique=True, verbose_name=_('Path'))
+
+    objects = CategoryPathManager()
+
+    class Meta:
+        verbose_name = _('Category path')
+        verbose_name_plural = _('Category paths')
+
+    def __str__(self):
+        return self.path
+
+
+class TreeUpdate(models.Model):
+    """
+    Queued deferred update of root category tree, see djcat.deferred
+    """
+    root_id = models.PositiveIntegerField(db_index=True, verbose_name=_('Root category'))
+    created = models.DateTimeField(auto_now_add=True, verbose_name=_('Created'))
+
+    class Meta:
+        verbose_name = _('Tree update')
+        verbose_name_plural = _('Tree updates')
+
+    def __str__(self):
+        return str(self.root_id)
+
+
+class CategoryRedirectManager(models.Manager):
+
+    def update_redirects(self, stale, created):
+        """
+        Redirect stale paths to their categories and drop redirects of paths that lead to categories again.
+        Redirect leads to category, not to path, so chains of renames and moves are compacted: every old path
+        redirects to current category url.
+        :param stale: List of tuples (category pk, old path string)
+        :param created: List of created path strings
+        :return:
+        """
+        created = set(created)
+        stale = {path: pk for pk, path in stale if path not in created}
+        for paths in chunks(list(created) + list(stale), 500):
+            self.filter(path__in=paths).delete()
+        self.bulk_create([self.model(path=path, category_id=pk) for path, pk in stale.items()], batch_size=300)
+
+    def get_categories(self, paths):
+        """
+        Return categories that old path strings redirect to with one query
+        :param paths: List of strings, path elements joined with "/"
+        :return: Dictionary {path: Category instance}
+        """
+        return {r.path: r.category for r in self.select_related('category').filter(path__in=paths)}
+
+    def get_category(self, path):
+        """
+        Return category that old path string redirects to
+        :param path: String, path elements joined with "/"
+        :return: Category instance or None
+        """
+        try:
+            return self.select_related('category').get(path=path).category
+        except ObjectDoesNotExist:
+            return None
+
+
+class CategoryRedirect(models.Model):
+    """
+    Old category url path left after slug change or move, it redirects to current url of category
+    """
+    path = models.CharField(max_length=1000, unique=True, verbose_name=_('Old path'))
+    category = models.ForeignKey(settings.DJCAT_CATEGORY_MODEL, related_name='redirects', on_delete=models.CASCADE,
+                                 verbose_name=_('Category'))
+    created = models.DateTimeField(auto_now_add=True, verbose_name=_('Created'))
 
-class DjcatCategory(MPTTModel, BaseDjcat):
+    objects = CategoryRedirectManager()
+
+    class Meta:
+        verbose_name = _('Category redirect')
+        verbose_name_plural = _('Category redirects')
+
+    def __str__(self):
+        return self.path
+
+
+class BaseDjcatCategory(models.Model, BaseDjcat):
+    """
+    Category fields and logic independent of tree backend, see DjcatCategory and DjcatMPCategory
+    """
     name = models.CharField(max_length=400, verbose_name=_('Category name'))
-    slug = models.SlugField(max_length=420, verbose_name='Slug', blank=True)
-    parent = TreeForeignKey('self', null=True, blank=True, related_name=_('Children'), db_index=True,
-                            verbose_name=_('Parent category'))
-    item_class = models.CharField(max_length=200, verbose_name=_('Item class'), null=True, blank=True)
-    available_paths = models.CharField(max_length=10000, verbose_name=_('Available url paths'), editable=False,
-                                       blank=True, null=True)
+    slug = models.SlugField(max_length=420, verbose_name='Slug', blank=True, unique=True)
+    item_class = models.CharField(max_length=200, verbose_name=_('Item class'), null=True, blank=True, db_index=True)
+    url = models.CharField(max_length=1000, verbose_name=_('Canonical url'), editable=False, blank=True,
+                           db_index=True)
     is_active = models.BooleanField(default=False, verbose_name=_('Active'))
     is_root = models.BooleanField(default=False, verbose_name=_('Root'), blank=True)
     is_unique_in_path = models.BooleanField(default=False, verbose_name=_('Unique'), blank=True)
     is_endpoint = models.BooleanField(default=False, verbose_name=_('Endpoint'), blank=True)
+    item_count = models.IntegerField(default=0, verbose_name=_('Active items'), editable=False)
+    # JSON encoded ancestor chain from root, maintained with url paths, empty if not computed yet
+    ancestors = models.TextField(verbose_name=_('Ancestors'), editable=False, blank=True, default='')
 
     objects = BaseCategoryManager()
 
-    class MPTTMeta:
-        order_insertion_by = ['name']
-
     class Meta:
         abstract = True
         verbose_name = _('Category')
@@ -137,16 +562,56 @@ class DjcatCategory(MPTTModel, BaseDjcat):
         return self.name
 
     def get_url(self, *args, **kwargs):
-        paths = [v for k, v in self.get_url_paths().items() if len(v)]
-        shortest = min(paths, key=len)
-        return '/'.join(shortest) + '/'
+        return self.url
 
     def get_url_paths(self):
         """
         Return available category paths
         :return: Dictionary
         """
-        return json.loads(self.available_paths)
+        ancestors = self.get_ancestor_chain(include_self=True)
+        return {'full': [n.slug for n in ancestors], 'unique': [n.slug for n in ancestors if n.is_unique_in_path]}
+
+    def encode_ancestor_chain(self, chain):
+        """
+        Return ancestor chain encoded for ancestors field
+        :param chain: List of CategoryAncestor, from root
+        :return: String
+        """
+        return json.dumps([list(a) for a in chain], separators=(',', ':'))
+
+    def get_ancestor_chain(self, include_self=False):
+        """
+        Return ancestors from root decoded from stored chain without queries,
+        chain is queried from tree if it is not computed yet
+        :param include_self: Bool
+        :return: List of CategoryAncestor
+        """
+        if getattr(self, '_ancestor_chain', (None,))[0] != self.ancestors:
+            if self.ancestors:
+                chain = [CategoryAncestor(*a) for a in json.loads(self.ancestors)]
+            else:
+                chain = [CategoryAncestor(n.pk, n.name, n.slug, n.url, n.is_unique_in_path)
+                         for n in self.get_ancestors()]
+            self._ancestor_chain = (self.ancestors, chain)
+        chain = list(self._ancestor_chain[1])
+        if include_self:
+            chain.append(CategoryAncestor(self.pk, self.name, self.slug, self.url, self.is_unique_in_path))
+        return chain
+
+    def get_root_pk(self):
+        """
+        Return root category pk without queries
+        :return: Integer
+        """
+        return self.get_ancestor_chain(include_self=True)[0].pk
+
+    def get_breadcrumbs(self):
+        """
+        Return breadcrumbs of category page: ancestors from root and category itself, without queries
+        :return: List of Breadcrumb
+        """
+        return [Breadcrumb(a.name, a.url) for a in self.get_ancestor_chain(include_self=True)]
 
     def create_slug(self, instance_before):
         """
@@ -194,43 +659,173 @@ class DjcatCategory(MPTTModel, BaseDjcat):
 
     def save(self, *args, **kwargs):
         """
-        Saves instance and update tree
+        Saves instance and update tree in one transaction with root rows of changed trees locked,
+        on concurrent writes errors whole save is retried
         :param args:
         :param kwargs:
         :return:
         """
         update_process = kwargs.pop('update_process', False)
         if not update_process:
-            self.check_name(self.name)
-            instance_before = self.__class__.objects.get(pk=self.pk) if self.id else None
-            if not self.parent:
-                self.__class__.check_root(self.name, self.__class__, instance_before=instance_before)
-                self.is_root = True
-            self.is_endpoint = True if self.item_class else False
-            self.check_inheritance()
-            if self.is_endpoint and not self.is_unique_in_path:
-                self.is_unique_in_path = True
-            self.create_slug(instance_before=instance_before)
-
-            super(DjcatCategory, self).save(*args, **kwargs)
-            self.__class__.objects.update_tree(self, instance_before)
+            state = dict(self.__dict__, _state=copy.copy(self._state))
+
+            def reset():
+                self.__dict__.clear()
+                self.__dict__.update(state, _state=copy.copy(state['_state']))
+            atomic_retry(lambda: self.save_tree(*args, **kwargs),
+                         using=kwargs.get('using') or router.db_for_write(self.__class__, instance=self),
+                         on_retry=reset)
         else:
-            super(DjcatCategory, self).save(*args, **kwargs)
+            super(BaseDjcatCategory, self).save(*args, **kwargs)
+
+    def save_tree(self, *args, **kwargs):
+        """
+        Saves instance and update tree, must be called in transaction
+        :param args:
+        :param kwargs:
+        :return:
+        """
+        self.check_name(self.name)
+        # root pks are taken from stored ancestors, they could be outdated, so instance before is checked again
+        locked = self.__class__.objects.lock_trees(self.get_root_pk() if self.id else None,
+                                                   self.parent.get_root_pk() if self.parent else None)
+        instance_before = self.__class__.objects.get(pk=self.pk) if self.id else None
+        if instance_before and instance_before.get_root_pk() not in locked:
+            self.__class__.objects.lock_trees(instance_before.get_root_pk())
+        if not self.parent:
+            self.__class__.check_root(self.name, self.__class__, instance_before=instance_before)
+            self.is_root = True
+        self.is_endpoint = True if self.item_class else False
+        self.check_inheritance()
+        if self.is_endpoint and not self.is_unique_in_path:
+            self.is_unique_in_path = True
+        self.create_slug(instance_before=instance_before)
+        if instance_before:
+            # count is maintained with F() updates, tree position and paths could be changed by other writer,
+            # don't overwrite them with values loaded earlier
+            for f in ('item_count', 'url', 'ancestors') + get_tree_fields(self.__class__):
+                setattr(self, f, getattr(instance_before, f))
+        moved = instance_before and not instance_before.parent_id == self.parent_id
+        old_root_pk = instance_before.get_root_pk() if moved else None
+
+        super(BaseDjcatCategory, self).save(*args, **kwargs)
+        self.__class__.objects.update_tree(self, instance_before, old_root_pk=old_root_pk)
+
+
+class DjcatCategory(BaseDjcatCategory, MPTTModel):
+    """
+    Category stored as MPTT tree
+    """
+    parent = TreeForeignKey('self', null=True, blank=True, related_name=_('Children'), db_index=True,
+                            verbose_name=_('Parent category'))
+
+    class MPTTMeta:
+        order_insertion_by = ['name']
+
+    class Meta(BaseDjcatCategory.Meta):
+        abstract = True
+
+
+class DjcatMPCategory(BaseDjcatCategory, MaterializedPathNode):
+    """
+    Category stored as materialized path tree: inserts and moves cost O(depth) instead of shifting lft/rght
+    values of the whole tree, so concurrent edits of different branches don't block each other.
+    Children are ordered by creation instead of name.
+    """
+    parent = models.ForeignKey('self', null=True, blank=True, related_name=_('Children'), on_delete=models.CASCADE,
+                               verbose_name=_('Parent category'))
+
+    class Meta(BaseDjcatCategory.Meta):
+        abstract = True
+        ordering = ['tree_path']
+
+
+def prefetch_categories(items):
+    """
+    Load categories of items with one query per content type and attach them to items, items may be instances of
+    different item classes
+    :param items: Iterable of item instances
+    :return: List of items
+    """
+    items = list(items)
+    by_content_type = {}
+    for item in items:
+        by_content_type.setdefault(item.content_type_id, set()).add(item.object_id)
+    categories = {}
+    for content_type_id, pks in by_content_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        for chunk in chunks(list(pks), 500):
+            for category in model._base_manager.filter(pk__in=chunk):
+                categories[(content_type_id, category.pk)] = category
+    for item in items:
+        category = categories.get((item.content_type_id, item.object_id))
+        if category:
+            item.category = category
+    return items
+
+
+class DjcatItemQuerySet(models.QuerySet):
+
+    def with_categories(self):
+        """
+        Prefetch items categories, one query per content type
+        :return: QuerySet
+        """
+        return self.prefetch_related('category')
+
+    def delete(self):
+        """
+        Delete items and take them out of categories items counts with one update per category instead of one per item
+        :return: Tuple, see QuerySet.delete()
+        """
+        if not CatalogItem.is_registered(self.model):
+            return super(DjcatItemQuerySet, self).delete()
+        CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+        counts = {}
+        for pk, active, count in self.values_list('object_id', 'active').annotate(count=models.Count('pk'))\
+                .order_by():
+            counts[pk] = counts.get(pk, 0) + (count if active else 0)
+        with transaction.atomic(using=self.db):
+            _bulk_deletes.models = getattr(_bulk_deletes, 'models', set()) | {self.model}
+            try:
+                deleted = super(DjcatItemQuerySet, self).delete()
+            finally:
+                _bulk_deletes.models = _bulk_deletes.models - {self.model}
+            branch = set()
+            for category in CategoryModel.objects.filter(pk__in=list(counts)):
+                branch.update(a.pk for a in category.get_ancestor_chain(include_self=True))
+                CategoryModel.objects.add_item_count(category.pk, -counts[category.pk])
+            versions.bump_on_commit(*[versions.items_scope(pk) for pk in branch])
+        return deleted
 
 
 class DjcatItem(models.Model, BaseDjcat):
     name = models.CharField(max_length=200, verbose_name=_('Item name'))
-    slug = models.SlugField(max_length=200, verbose_name='Slug', blank=True)
-    uid = models.CharField(max_length=200)
+    slug = models.SlugField(max_length=200, verbose_name='Slug', blank=True, unique=True)
+    uid = models.CharField(max_length=200, unique=True)
+    url = models.CharField(max_length=1300, verbose_name=_('Canonical url'), editable=False, blank=True)
     active = models.BooleanField(verbose_name=_('Active'), default=False)
 
     content_type = models.ForeignKey(ContentType)
     object_id = models.PositiveIntegerField()
     category = GenericForeignKey('content_type', 'object_id')
 
+    objects = DjcatItemQuerySet.as_manager()
+
+    # composite index of category items listings, counts and urls updates, it is added to concrete model that owns
+    # the fields on class preparation, abstract Meta index_together is inherited by multi-table children too
+    category_index = ('content_type', 'object_id', 'active')
+
     class Meta:
         abstract = True
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(DjcatItem, cls).from_db(db, field_names, values)
+        if not {'object_id', 'active'} & instance.get_deferred_fields():
+            instance._counted_category_pk = instance.get_counted_category_pk()
+        return instance
+
     def __str__(self):
         return self.name
 
@@ -238,7 +833,79 @@ class DjcatItem(models.Model, BaseDjcat):
         return self.name
 
     def get_url(self):
-        return 'url'
+        return self.url
+
+    def get_breadcrumbs(self):
+        """
+        Return breadcrumbs of item page: breadcrumbs of its category and item itself.
+        Costs one query to load the category unless it is already cached (see prefetch_categories()).
+        :return: List of Breadcrumb
+        """
+        return self.category.get_breadcrumbs() + [Breadcrumb(self.name, self.url)]
+
+    def get_counted_category_pk(self):
+        """
+        Return pk of category where item is counted: its category if item is active
+        :return: Integer or None
+        """
+        return self.object_id if self.active else None
+
+    def get_stored_counted_category_pk(self):
+        """
+        Return pk of category where item was counted when it was loaded or last saved
+        :return: Integer or None
+        """
+        if hasattr(self, '_counted_category_pk'):
+            return self._counted_category_pk
+        stored = self.__class__.objects.filter(pk=self.pk).values_list('object_id', 'active').first()
+        return stored[0] if stored and stored[1] else None
+
+    def get_branch_pks(self, *category_pks):
+        """
+        Return pks of categories and their ancestors, item category ancestors are taken without queries
+        :param category_pks: Integers or None, categories pk
+        :return: Set of integers
+        """
+        CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+        branch = set()
+        for pk in {pk for pk in category_pks if pk}:
+            if pk == self.object_id:
+                category = self.category
+            else:
+                category = CategoryModel.objects.filter(pk=pk).first()
+            if category:
+                branch.update(a.pk for a in category.get_ancestor_chain(include_self=True))
+            else:
+                branch.add(pk)
+        return branch
+
+    def update_item_count(self, before, after):
+        """
+        Move item from categories items count of category before to category after and bump items versions of
+        categories branches.
+        Only registered item classes are counted, so parent rows of multi-table inherited items are not counted twice.
+        :param before: Integer or None, category pk
+        :param after: Integer or None, category pk
+        :return:
+        """
+        if not CatalogItem.is_registered(self.__class__):
+            return
+        branch = self.get_branch_pks(before, after, self.object_id)
+        versions.bump_on_commit(*[versions.items_scope(pk) for pk in branch])
+        if before == after:
+            return
+        CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+        if before:
+            CategoryModel.objects.add_item_count(before, -1)
+        if after:
+            CategoryModel.objects.add_item_count(after, 1)
+
+    def make_url(self):
+        """
+        Return item url: category url with item slug
+        :return: String
+        """
+        return '{}{}/'.format(self.category.get_url(), self.slug)
 
     def create_name(self):
         """
@@ -279,7 +946,11 @@ class DjcatItem(models.Model, BaseDjcat):
     def save(self, *args, **kwargs):
         self.create_name()
         self.create_slug()
+        self.url = self.make_url()
+        before = self.get_stored_counted_category_pk() if self.pk else None
         super(DjcatItem, self).save(*args, **kwargs)
+        self._counted_category_pk = self.get_counted_category_pk()
+        self.update_item_count(before, self._counted_category_pk)
 
     def create_slug(self):
         """
@@ -293,4 +964,41 @@ class DjcatItem(models.Model, BaseDjcat):
             self.slug = create_slug(self.get_name_for_slug()) + settings.DJCAT_ITEM_SLUG_DELIMITER + self.uid
 
 
+# item models which queryset delete is in progress in this thread, their items counts are updated by
+# DjcatItemQuerySet.delete() at once
+_bulk_deletes = threading.local()
 
+
+def category_pre_delete(sender, instance, **kwargs):
+    """
+    Take items of deleted category out of its ancestors items counts and bump versions of its tree
+    """
+    sender.objects.remove_item_count(instance)
+    versions.bump_on_commit(versions.CATALOG, versions.tree_scope(instance.get_root_pk()))
+
+
+def item_post_delete(sender, instance, **kwargs):
+    """
+    Decrease items count of category of deleted item, items deleted with DjcatItemQuerySet.delete() are counted by it
+    """
+    if sender in getattr(_bulk_deletes, 'models', ()):
+        return
+    instance.update_item_count(getattr(instance, '_counted_category_pk', instance.get_counted_category_pk()), None)
+
+
+@receiver(class_prepared)
+def prepare_djcat_model(sender, **kwargs):
+    """
+    Add category index to concrete item models that own item fields, connect item and category signals to concrete
+    models only, receivers without sender disable fast deletes of all models
+    """
+    if issubclass(sender, DjcatItem) and not sender._meta.abstract:
+        local_fields = {f.name for f in sender._meta.local_fields}
+        if local_fields.issuperset(sender.category_index) and \
+                sender.category_index not in sender._meta.index_together:
+            sender._meta.index_together = tuple(sender._meta.index_together) + (sender.category_index,)
+            # migrations autodetector reads options from original attributes
+            sender._meta.original_attrs['index_together'] = sender._meta.index_together
+        post_delete.connect(item_post_delete, sender=sender)
+    if issubclass(sender, BaseDjcatCategory) and not sender._meta.abstract:
+        pre_delete.connect(category_pre_delete, sender=sender)
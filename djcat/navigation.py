@@ -0,0 +1,140 @@
+import gzip
+import hashlib
+import json
+
+from django.apps import apps
+from django.core.cache import caches
+
+from . import settings
+from . import versions
+from .metrics import metrics, CACHE_HIT, CACHE_MISS
+from .utils import get_tree_ordering
+from .db import get_catalog_read_alias
+
+
+def get_cache():
+    return caches[settings.DJCAT_NAVIGATION_CACHE]
+
+
+def make_key(*parts):
+    return '{}:navigation:{}'.format(settings.DJCAT_CACHE_PREFIX, ':'.join(parts))
+
+
+def compress(data):
+    return gzip.compress(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+
+
+def decompress(data):
+    return json.loads(gzip.decompress(data).decode('utf-8'))
+
+
+class NavigationSnapshot:
+    """
+    Serialized active categories tree, stored compressed in cache once per catalog and items counts version.
+    Snapshot is addressed by etag - hash of its content, so versions with same content share etag.
+    """
+    def __init__(self, etag, data):
+        self.etag = etag
+        self.data = data
+
+    @property
+    def tree(self):
+        """
+        Return tree: list of root nodes, node is dictionary with 'id', 'name', 'url', 'count' and 'children' keys
+        """
+        return decompress(self.data)['tree']
+
+
+def get_tree_queryset():
+    """
+    Return active categories in tree order: parent goes before its children, siblings in tree order
+    :return: QuerySet
+    """
+    CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+    return CategoryModel._default_manager.using(get_catalog_read_alias()).filter(is_active=True)\
+        .order_by(*get_tree_ordering(CategoryModel))
+
+
+def build_tree():
+    """
+    Return active categories tree built with one query
+    :return: List of root nodes, see NavigationSnapshot.tree
+    """
+    nodes = {}
+    roots = []
+    rows = get_tree_queryset().values_list('pk', 'parent_id', 'name', 'url', 'item_count')
+    for pk, parent_id, name, url, count in rows:
+        node = {'id': pk, 'name': name, 'url': settings.DJCAT_CATALOG_ROOT_URL + url, 'count': count, 'children': []}
+        nodes[pk] = node
+        if parent_id is None:
+            roots.append(node)
+        elif parent_id in nodes:
+            nodes[parent_id]['children'].append(node)
+    return roots
+
+
+def flatten_tree(tree):
+    """
+    Return nodes of tree without children, with parent id and position among siblings
+    :param tree: List of root nodes
+    :return: Dictionary {String node id: node}
+    """
+    nodes = {}
+    stack = [(None, i, node) for i, node in enumerate(tree)]
+    while stack:
+        parent, position, node = stack.pop()
+        nodes[str(node['id'])] = {'id': node['id'], 'name': node['name'], 'url': node['url'], 'count': node['count'],
+                                  'parent': parent, 'position': position}
+        stack.extend((node['id'], i, child) for i, child in enumerate(node['children']))
+    return nodes
+
+
+def get_snapshot():
+    """
+    Return snapshot of current catalog version, it is built once per version
+    :return: NavigationSnapshot
+    """
+    scopes = versions.get_versions(versions.CATALOG, versions.COUNTS)
+    version_key = make_key('version', *['{!r}'.format(scopes[s]) for s in sorted(scopes)])
+    cache = get_cache()
+    etag = cache.get(version_key)
+    data = cache.get(make_key('snapshot', etag)) if etag else None
+    if data is not None:
+        metrics.incr(CACHE_HIT, cache='navigation')
+        return NavigationSnapshot(etag, data)
+
+    metrics.incr(CACHE_MISS, cache='navigation')
+    tree = build_tree()
+    etag = hashlib.md5(json.dumps(tree, sort_keys=True).encode('utf-8')).hexdigest()
+    data = compress({'etag': etag, 'tree': tree})
+    cache.set_many({version_key: etag, make_key('snapshot', etag): data}, timeout=settings.DJCAT_NAVIGATION_TIMEOUT)
+    return NavigationSnapshot(etag, data)
+
+
+def get_diff(since, snapshot):
+    """
+    Return compressed diff from snapshot with etag since to given snapshot, client patches its tree with it:
+    'changed' - added or changed nodes without children, with 'parent' id and 'position' among siblings,
+    'removed' - ids of removed nodes
+    :param since: String, etag of client snapshot
+    :param snapshot: NavigationSnapshot, current snapshot
+    :return: Bytes or None if snapshot since is not cached any more
+    """
+    cache = get_cache()
+    diff_key = make_key('diff', since, snapshot.etag)
+    diff = cache.get(diff_key)
+    if diff is not None:
+        return diff
+    old = cache.get(make_key('snapshot', since))
+    if old is None:
+        return None
+    before = flatten_tree(decompress(old)['tree'])
+    after = flatten_tree(snapshot.tree)
+    diff = compress({
+        'etag': snapshot.etag,
+        'since': since,
+        'changed': [after[k] for k in sorted(after, key=int) if not before.get(k) == after[k]],
+        'removed': sorted(int(k) for k in before if k not in after),
+    })
+    cache.set(diff_key, diff, timeout=settings.DJCAT_NAVIGATION_TIMEOUT)
+    return diff
@@ -0,0 +1,130 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from . import settings
+from .exceptions import *
+
+
+CURSOR_NEXT = 'n'
+CURSOR_PREVIOUS = 'p'
+
+
+class KeysetPage:
+    """
+    Page of keyset paginated queryset
+    """
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator:
+    """
+    Paginate queryset with "seek" conditions instead of OFFSET, so every page costs as the first one.
+    Pages are addressed with opaque cursor tokens: url safe base64 of order fields values of the edge row.
+    Order fields must not be null, primary key is added as the last order field to make order stable.
+    Example:
+        paginator = KeysetPaginator(queryset, ordering=('price',), per_page=20)
+        page = paginator.page(request.GET.get('c'))
+        next_url = '?c=' + page.next_cursor if page.has_next() else None
+    """
+    def __init__(self, queryset, ordering=settings.DJCAT_PAGE_ORDERING, per_page=settings.DJCAT_PAGE_SIZE):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = list(ordering)
+        if self.ordering[-1].lstrip('-') not in ('pk', queryset.model._meta.pk.name):
+            self.ordering.append('pk')
+        self.fields = [(x.lstrip('-'), x.startswith('-')) for x in self.ordering]
+
+    def get_model_field(self, name):
+        meta = self.queryset.model._meta
+        return meta.pk if name == 'pk' else meta.get_field(name)
+
+    def encode_cursor(self, obj, direction):
+        """
+        Return cursor token of row
+        :param obj: Model instance
+        :param direction: String, CURSOR_NEXT - rows after obj, CURSOR_PREVIOUS - rows before obj
+        :return: String
+        """
+        values = [getattr(obj, name) for name, descending in self.fields]
+        data = json.dumps([direction, values], cls=DjangoJSONEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """
+        Return direction and order fields values of cursor token
+        :param cursor: String
+        :return: Tuple (String direction, List of values)
+        """
+        try:
+            data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            direction, values = json.loads(data.decode('utf-8'))
+            if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS) or not len(values) == len(self.fields):
+                raise ValueError
+            values = [self.get_model_field(f[0]).to_python(v) for f, v in zip(self.fields, values)]
+        except (ValueError, TypeError, binascii.Error, ValidationError):
+            raise PageCursorNotValid(cursor)
+        return direction, values
+
+    def get_seek_filter(self, values, forward=True):
+        """
+        Return condition of rows after (or before if not forward) row with given order fields values:
+        (a > x) or (a = x and b > y) or ...
+        :param values: List of order fields values
+        :param forward: Bool
+        :return: Q object
+        """
+        q = Q()
+        for i, (name, descending) in enumerate(self.fields):
+            lookup = 'lt' if descending == forward else 'gt'
+            condition = Q(**{'{}__{}'.format(name, lookup): values[i]})
+            for prev_name, prev_value in zip([f[0] for f in self.fields[:i]], values[:i]):
+                condition &= Q(**{prev_name: prev_value})
+            q |= condition
+        return q
+
+    def page(self, cursor=None):
+        """
+        Return page of rows addressed by cursor
+        :param cursor: String or None for first page
+        :return: KeysetPage
+        """
+        if not cursor:
+            rows = list(self.queryset.order_by(*self.ordering)[:self.per_page + 1])
+            return self.make_page(rows, has_next=len(rows) > self.per_page, has_previous=False)
+
+        direction, values = self.decode_cursor(cursor)
+        forward = direction == CURSOR_NEXT
+        ordering = self.ordering if forward else [x[1:] if x.startswith('-') else '-' + x for x in self.ordering]
+        rows = list(self.queryset.filter(self.get_seek_filter(values, forward)).order_by(*ordering)
+                    [:self.per_page + 1])
+        more = len(rows) > self.per_page
+        if forward:
+            return self.make_page(rows, has_next=more, has_previous=True)
+        rows = rows[:self.per_page][::-1]
+        return self.make_page(rows, has_next=True, has_previous=more)
+
+    def make_page(self, rows, has_next, has_previous):
+        rows = rows[:self.per_page]
+        next_cursor = self.encode_cursor(rows[-1], CURSOR_NEXT) if rows and has_next else None
+        previous_cursor = self.encode_cursor(rows[0], CURSOR_PREVIOUS) if rows and has_previous else None
+        return KeysetPage(rows, next_cursor=next_cursor, previous_cursor=previous_cursor)
@@ -2,14 +2,23 @@ from urllib.parse import urlencode
 
 from django.apps import apps
 from django.core.exceptions import ObjectDoesNotExist
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
 
 from . import settings
+from . import versions
+from .db import get_read_alias
 from .exceptions import *
 from .register import CatalogItem
+from .routing import split_attr_slugs, is_item_slug
+from .models import CategoryPath, CategoryRedirect, Breadcrumb
+from .pagination import KeysetPaginator
+from .metrics import metrics, PATH_RESOLVE, PATH_PARSE_QUERY, PATH_PARSE_POST_REQUEST, PATH_BUILD_URL, \
+    PATH_DB_LOOKUP, PATH_DB_LOOKUPS
 
 
 class Path:
-    def __init__(self, path='', query='', query_allow_multiple=False, post_dict=None):
+    def __init__(self, path='', query='', query_allow_multiple=False, post_dict=None, cursor=''):
         self.CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
         self.category = None
         self.item = None
@@ -18,6 +27,12 @@ class Path:
         self.url_full = ''
         self.url_path = ''
         self.url_query = ''
+        self.db_lookups = 0
+        self.cursor = cursor or ''
+        self._root_pk = None
+        self._read_db = False
+        # current url of stale path, see get_redirect_url()
+        self.redirect_url = None
 
         self.path = str(path)
         self._path_list = []
@@ -26,6 +41,10 @@ class Path:
                 self.resolve()
             except PathNotFound:
                 self.category = None
+                self.item = None
+                if settings.DJCAT_PATH_REDIRECTS:
+                    self.redirect_url = self.get_redirect_url()
+            metrics.incr(PATH_DB_LOOKUPS, self.db_lookups)
 
         self.query = str(query)
         if len(self.query) and self.category:
@@ -36,24 +55,72 @@ class Path:
             self.parse_post_request()
             self.build_url()
 
+    @classmethod
+    def from_route(cls, route, query='', query_allow_multiple=False, cursor=''):
+        """
+        Return Path of route classified with djcat.routing.classify(), category is loaded by pk and item by slug
+        without trying path interpretations
+        :param route: Route instance
+        :param query: String, attributes query
+        :param query_allow_multiple: Bool
+        :param cursor: String, page cursor
+        :return: Path instance
+        """
+        path = cls(query_allow_multiple=query_allow_multiple, cursor=cursor)
+        path.path = str(route.path)
+        path._path_list = list(route.slugs)
+        try:
+            path.category = path.get_category_by_pk(route.node.pk)
+            if route.item_slug:
+                item = CatalogItem.get_item_by_class(path.category.item_class)
+                path.item = path.get_item(route.item_slug, item_type='item', item_model=item.class_obj)
+        except PathNotFound:
+            path.category = None
+            path.item = None
+        metrics.incr(PATH_DB_LOOKUPS, path.db_lookups)
+        if path.category and route.attr_slugs:
+            path.attrs = path.get_attrs(path.category, route.attr_slugs)
+        path.query = str(query)
+        if len(path.query) and path.category:
+            path.parse_query()
+        return path
+
+    def get_read_db(self):
+        """
+        Return database alias of categories lookups, it is chosen once, see djcat.db.get_read_alias()
+        :return: String or None
+        """
+        if self._read_db is False:
+            self._read_db = get_read_alias(versions.CATALOG)
+        return self._read_db
+
+    @metrics.timed(PATH_DB_LOOKUP)
+    def get_category_by_pk(self, pk):
+        """
+        Return category with given pk
+        :param pk: Integer
+        :return: Category instance
+        """
+        self.db_lookups += 1
+        try:
+            return self.CategoryModel.objects.using(self.get_read_db()).get(pk=pk)
+        except ObjectDoesNotExist:
+            raise PathNotFound(self.path)
+
+    @metrics.timed(PATH_DB_LOOKUP)
     def get_item(self, slug, item_type='category', item_model=None):
+        self.db_lookups += 1
         try:
             if item_type == 'category':
-                item = self.CategoryModel.objects.get(slug=slug)
+                item = self.CategoryModel.objects.using(self.get_read_db()).get(slug=slug)
             else:
-                item = item_model.objects.get(slug=slug)
+                # item saves bump items version of category only, not catalog version
+                db = get_read_alias(versions.items_scope(self.category.pk)) if self.category else self.get_read_db()
+                item = item_model.objects.using(db).get(slug=slug)
         except ObjectDoesNotExist:
             raise PathNotFound(self.path)
         return item
 
-    def get_category_paths(self, node):
-        """
-        Return category instance url paths converted to list
-        :param node: Category instance
-        :return: List of paths
-        """
-        return list(node.get_url_paths().values())
-
     def get_category_attr_paths(self, node):
         """
         Return list of all category attributes slugs
@@ -69,25 +136,6 @@ class Path:
                 paths.extend(a.choices)
         return paths
 
-    def check_slug_category(self, slug, category_paths):
-        """
-        Return True if slug in category paths
-        :param slug: String slug
-        :param category_paths: List of category paths
-        :return: Bool
-        """
-        paths = list(set([x for paths in category_paths for x in paths]))
-        return slug in paths
-
-    def check_slug_attr(self, slug, attr_paths):
-        """
-        Return True if slug in category attributes paths
-        :param slug: String slug
-        :param attr_paths: List of category attributes paths
-        :return: Bool
-        """
-        return slug in attr_paths
-
     def get_attrs(self, node, resolved_attr_slugs):
         """
         Return resolved attribute with selected slug
@@ -112,30 +160,61 @@ class Path:
         """
         self.category = self.get_item(category_slug)
         _item = CatalogItem.get_item_by_class(self.category.item_class)
+        if not _item:
+            # only endpoint categories have items
+            raise PathNotFound(self.path)
         self.item = self.get_item(item_slug, item_type='item', item_model=_item.class_obj)
 
-    def resolve_mix_path(self, category_paths, attr_paths):
+    @metrics.timed(PATH_DB_LOOKUP)
+    def get_redirect_url(self):
         """
-        Resolve path that probably contain category paths (slugs) and category attributes paths (slugs)
-        :param category_paths: List of category paths
-        :param attr_paths: List of category attributes paths
-        :return:
+        Return current url of stale path left after category slug change or move: url of category that old category
+        part of path redirects to, followed by the rest of path (attributes slugs of category or item slug).
+        Single lookup.
+        :return: String or None if path is not stale
         """
-        if len(self._path_list) > 1 and len(self._path_list[-1].split('_')) == 2:
-            pass
+        slugs = self._path_list
+        if not slugs:
+            return None
+        item = len(slugs) > 1 and is_item_slug(slugs[-1])
+        splits = [(slugs[:-1], slugs[-1:])] if item else split_attr_slugs(slugs)
+        self.db_lookups += 1
+        found = CategoryRedirect.objects.db_manager(self.get_read_db()).get_categories(
+            ['/'.join(old) for old, _ in splits])
+        for old, rest in splits:
+            category = found.get('/'.join(old))
+            if category and (item or set(rest).issubset(self.get_category_attr_paths(category))):
+                return category.get_url() + ''.join(x + '/' for x in rest)
+        return None
 
-        resolved = []
-        for slug in self._path_list:
-            if self.check_slug_category(slug, category_paths):
-                resolved.append({'category': slug})
-                continue
-            if self.check_slug_attr(slug, attr_paths):
-                resolved.append({'attr': slug})
-                continue
-        if not len(resolved) == len(self._path_list):
-            raise PathNotFound(self.path)
-        return resolved
+    @metrics.timed(PATH_DB_LOOKUP)
+    def get_categories_by_paths(self, paths):
+        """
+        Return categories of given paths with single lookup of stored category paths
+        :param paths: List of path strings
+        :return: Dictionary {path: Category instance}
+        """
+        self.db_lookups += 1
+        return CategoryPath.objects.db_manager(self.get_read_db()).get_categories(paths)
 
+    def resolve_mix_path(self):
+        """
+        Resolve path that contain category path (slugs) optionally followed by category attributes paths (slugs).
+        Whole path is tried as category path first, then paths with trailing attributes slugs of category item class
+        peeled off, all in single lookup.
+        :return:
+        """
+        splits = split_attr_slugs(self._path_list)
+        found = self.get_categories_by_paths(['/'.join(category_slugs) for category_slugs, _ in splits])
+        for category_slugs, attr_slugs in splits:
+            node = found.get('/'.join(category_slugs))
+            if node and set(attr_slugs).issubset(self.get_category_attr_paths(node)):
+                self.category = node
+                self.attrs = self.get_attrs(node, attr_slugs)
+                return
+        raise PathNotFound(self.path)
+
+    @metrics.timed(PATH_RESOLVE)
     def resolve(self):
         """
         Obtain elements of path: category, item. attributes
@@ -153,28 +232,14 @@ class Path:
             self.category = self.get_item(self._path_list[0])
 
         else:
-            if len(self._path_list) > 1 and len(self._path_list[-1].split('_')) == 2:
+            if is_item_slug(self._path_list[-1]):
                 """
-                if last element contain "_" then it is item slug, and last by one is item category
+                if last element has item slug form (name, delimiter and uid) then it is item slug, and last by one
+                is item category, same as in routing.classify()
                 """
                 self.get_item_instance(self._path_list[-2], self._path_list[-1])
             else:
-                try:
-                    branch = self.CategoryModel.objects.get(slug=self._path_list[0]).get_descendants(include_self=True)
-                except ObjectDoesNotExist:
-                    raise PathNotFound(self.path)
-                for node in branch:
-                    category_paths = self.get_category_paths(node)
-                    if self._path_list in category_paths:
-                        self.category = node
-                        break
-                    else:
-                        attr_paths = self.get_category_attr_paths(node)
-                        if not len(attr_paths):
-                            continue
-                        resolved = self.resolve_mix_path(category_paths, attr_paths)
-                        self.category = node
-                        self.attrs = self.get_attrs(node, [x['attr'] for x in resolved if x.get('attr')])
+                self.resolve_mix_path()
 
     def _get_query_attr_classes(self, query):
         """
@@ -202,6 +267,7 @@ class Path:
                         attrs.append((ia.class_obj, a[1]))
         return attrs
 
+    @metrics.timed(PATH_PARSE_QUERY)
     def parse_query(self):
         """
         Parse query
@@ -225,6 +291,7 @@ class Path:
                 else:
                     self.attrs.append({'attribute': attr, 'query_value': [value]})
 
+    @metrics.timed(PATH_PARSE_POST_REQUEST)
     def parse_post_request(self):
         """
         Parse post_dict.POST parameters
@@ -234,6 +301,7 @@ class Path:
         if self.category:
             self.attrs = self.get_attrs_post()
 
+    @metrics.timed(PATH_DB_LOOKUP)
     def get_category_post(self):
         """
         Get category instance
@@ -241,7 +309,10 @@ class Path:
         """
         try:
             category = self.post_dict.get('category', None)
-            return self.CategoryModel.objects.get(pk=int(category)) if category else None
+            if not category:
+                return None
+            self.db_lookups += 1
+            return self.CategoryModel.objects.using(self.get_read_db()).get(pk=int(category))
         except ObjectDoesNotExist:
             return None
 
@@ -263,6 +334,7 @@ class Path:
                     attrs.append(attr)
         return attrs
 
+    @metrics.timed(PATH_BUILD_URL)
     def build_url(self):
         """
         Build url from category, attributes and other POST parameters
@@ -282,3 +354,105 @@ class Path:
             self.url_query = '?' + urlencode(query_dict)
 
         self.url_full = self.url_path + self.url_query
+
+    def get_root_pk(self):
+        """
+        Return root pk of resolved category tree, it is looked up once
+        :return: Integer or None if category not resolved
+        """
+        if self._root_pk is None and self.category:
+            self._root_pk = self.category.get_root_pk()
+        return self._root_pk
+
+    def get_breadcrumbs(self):
+        """
+        Return breadcrumbs of resolved category or item, without queries
+        :return: List of Breadcrumb, empty if path not resolved
+        """
+        if not self.category:
+            return []
+        breadcrumbs = self.category.get_breadcrumbs()
+        if self.item:
+            breadcrumbs.append(Breadcrumb(self.item.name, self.item.url))
+        return breadcrumbs
+
+    def get_queryset(self):
+        """
+        Return active items of resolved endpoint category filtered by resolved attributes, items are read from
+        read database unless category items were changed within staleness window
+        :return: QuerySet or None if category not resolved or not endpoint
+        """
+        if not self.category or not self.category.item_class:
+            return None
+        item_class = CatalogItem.get_item_by_class(self.category.item_class)
+        if not item_class:
+            return None
+        content_type = ContentType.objects.get_for_model(self.CategoryModel)
+        qs = item_class.class_obj.objects.using(get_read_alias(versions.items_scope(self.category.pk)))\
+            .filter(content_type=content_type, object_id=self.category.pk, active=True)
+
+        for a in self.attrs:
+            if isinstance(a, dict):
+                attr = [x for x in item_class.attrs if x.class_obj == a['attribute']][0]
+                values = list(a.get('query_value', []))
+                if a.get('path_value'):
+                    values.append(attr.get_choice_value(a['path_value']))
+            else:
+                attr = [x for x in item_class.attrs if isinstance(a, x.class_obj)][0]
+                values = [a.value]
+            q = Q()
+            for v in values:
+                q |= attr.class_obj.get_query_filter(attr.field, v)
+            qs = qs.filter(q)
+        return qs
+
+    def get_page(self, ordering=settings.DJCAT_PAGE_ORDERING, per_page=settings.DJCAT_PAGE_SIZE):
+        """
+        Return keyset paginated page of items addressed by cursor, raise PageCursorNotValid if cursor is broken
+        :param ordering: List of order fields, example: ('price', '-pk')
+        :param per_page: Integer
+        :return: KeysetPage or None if category not resolved or not endpoint
+        """
+        qs = self.get_queryset()
+        if qs is None:
+            return None
+        return KeysetPaginator(qs, ordering=ordering, per_page=per_page).page(self.cursor)
+
+    def get_page_url(self, cursor):
+        """
+        Return url of resolved path with attributes query and page cursor
+        :param cursor: String, page cursor token
+        :return: String
+        """
+        url = '/'.join(self._path_list) + '/' if self._path_list else ''
+        return url + self.get_query_string(cursor)
+
+    def get_canonical_url(self, cursor=''):
+        """
+        Return canonical url of resolved path: item url or category url with sorted path attributes slugs, attributes
+        query and page cursor, so all paths of same page share it
+        :param cursor: String, page cursor token
+        :return: String, empty if path not resolved
+        """
+        if self.item:
+            url = self.item.get_url()
+        elif self.category:
+            slugs = sorted(a['path_value'] for a in self.attrs if isinstance(a, dict) and a.get('path_value'))
+            url = self.category.get_url() + ''.join(s + '/' for s in slugs)
+        else:
+            return ''
+        return url + self.get_query_string(cursor)
+
+    def get_query_string(self, cursor=''):
+        """
+        Return query string of attributes query and page cursor
+        :param cursor: String, page cursor token
+        :return: String, empty or starting with "?"
+        """
+        query_dict = {}
+        query = self.query.replace('a=', '')
+        if query:
+            query_dict['a'] = query
+        if cursor:
+            query_dict[settings.DJCAT_PAGE_CURSOR_KEY] = cursor
+        return '?' + urlencode(query_dict) if query_dict else ''
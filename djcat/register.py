@@ -24,7 +24,7 @@ class ItemAttribute:
     """
     Contain item class attribute REGISTRY entry
     """
-    def __init__(self, name, klass, class_obj, verbose_name, type, key, choices):
+    def __init__(self, name, klass, class_obj, verbose_name, type, key, choices, field=None):
         self.name = name
         self.klass = klass
         self.class_obj = class_obj
@@ -32,6 +32,17 @@ class ItemAttribute:
         self.type = type
         self.key = key
         self.choices = choices
+        self.field = field
+
+    def get_choice_value(self, slug):
+        """
+        Return choice value by choice slug
+        :param slug: String - choice slug
+        :return: Choice value or None
+        """
+        for c in self.class_obj.attr_choices or ():
+            if c[-1] == slug:
+                return c[0]
 
 
 class CatalogItem:
@@ -139,9 +150,9 @@ class CatalogItem:
                     if getattr(f, '_is_djcat_attr', False):
                         attr = f._attr_class
                         attr.check()
-                        i[1]['attrs'].update({
-                            attr.attr_name: attr.values_for_registry(cls.REGISTRY)
-                        })
+                        values = attr.values_for_registry(cls.REGISTRY)
+                        values['field'] = f.name
+                        i[1]['attrs'].update({attr.attr_name: values})
 
     @classmethod
     def get_item_by_class(cls, klass):
@@ -158,6 +169,32 @@ class CatalogItem:
                     return item
         return None
 
+    @classmethod
+    def is_registered(cls, class_obj):
+        """
+        Return True if given class is registered item class
+        :param class_obj: Class object
+        :return: Bool
+        """
+        for m in cls.REGISTRY.items():
+            for i in m[1]['items'].items():
+                if i[1]['_class'] is class_obj:
+                    return True
+        return False
+
+    @classmethod
+    def get_choices_slugs(cls):
+        """
+        Return choices slugs of all items attributes
+        :return: Set of slugs
+        """
+        slugs = set()
+        for m in cls.REGISTRY.items():
+            for i in m[1]['items'].items():
+                for a in i[1]['attrs'].items():
+                    slugs.update(a[1].get('choices') or [])
+        return slugs
+
     @classmethod
     def get_item_attrs(cls, registry_dict):
         """
@@ -169,7 +206,8 @@ class CatalogItem:
         for a in registry_dict.items():
             attrs.append(ItemAttribute(name=a[0], klass=a[1]['class'], class_obj=a[1]['_class'],
                                        verbose_name=a[1]['verbose_name'], type=a[1]['type'], key=a[1]['key'],
-                                       choices=a[1]['choices'] if a[1].get('choices') else None))
+                                       choices=a[1]['choices'] if a[1].get('choices') else None,
+                                       field=a[1].get('field')))
         return attrs
 
 
@@ -0,0 +1,149 @@
+from django.http import Http404
+
+from . import settings
+from .register import CatalogItem
+from .index import get_category_index
+
+
+ROUTE_CATEGORY = 'category'
+ROUTE_ATTRIBUTES = 'attributes'
+ROUTE_ITEM = 'item'
+
+
+class Route:
+    """
+    Classified catalog path: category node of category index, attributes slugs and item slug
+    """
+    __slots__ = ('kind', 'path', 'slugs', 'node', 'attr_slugs', 'item_slug')
+
+    def __init__(self, kind, path, slugs, node, attr_slugs=(), item_slug=None):
+        self.kind = kind
+        self.path = path
+        self.slugs = slugs
+        self.node = node
+        self.attr_slugs = attr_slugs
+        self.item_slug = item_slug
+
+    def __repr__(self):
+        return '<Route {}: {}>'.format(self.kind, self.path)
+
+    def get_path(self, query='', query_allow_multiple=False, cursor=''):
+        """
+        Return Path of route, category and item are loaded without path resolution
+        :return: Path instance
+        """
+        from .path import Path
+        return Path.from_route(self, query=query, query_allow_multiple=query_allow_multiple, cursor=cursor)
+
+
+def get_attr_slugs(item_class):
+    """
+    Return choices slugs of item class attributes
+    :param item_class: String, item class
+    :return: Set of slugs
+    """
+    item = CatalogItem.get_item_by_class(item_class) if item_class else None
+    if not item:
+        return set()
+    return {slug for a in item.attrs if a.type == 'choice' for slug in a.choices}
+
+
+def is_item_slug(slug):
+    """
+    Return True if slug has item slug form: name slug, delimiter and uid
+    :param slug: String
+    :return: Bool
+    """
+    parts = slug.rsplit(settings.DJCAT_ITEM_SLUG_DELIMITER, 1)
+    return len(parts) == 2 and len(parts[0]) > 0 and len(parts[1]) == settings.DJCAT_ITEM_UID_LENGTH
+
+
+def split_attr_slugs(slugs):
+    """
+    Return possible splits of path slugs on category path slugs and trailing attributes slugs, longest category path
+    first. Only trailing choices slugs are peeled, category slugs that clash with choices slugs stay category slugs
+    in first split.
+    :param slugs: List of strings
+    :return: List of tuples (List category slugs, List attributes slugs)
+    """
+    choices_slugs = CatalogItem.get_choices_slugs()
+    splits = [(slugs, [])]
+    for x in range(len(slugs) - 1, 0, -1):
+        if slugs[x] not in choices_slugs:
+            break
+        splits.append((slugs[:x], slugs[x:]))
+    return splits
+
+
+def classify(path, index=None):
+    """
+    Classify catalog path in one pass against category index and registry choices slugs, without DB access:
+    one slug is category slug, last slug of item form after endpoint category path is item,
+    other slugs are category path optionally followed by attributes choices slugs of category item class.
+    :param path: String, catalog path
+    :param index: CategoryIndex, process wide index by default
+    :return: Route or None if path is unknown
+    """
+    slugs = [p for p in str(path or '').split('/') if len(p)]
+    if not slugs:
+        return None
+    index = index or get_category_index()
+
+    if len(slugs) == 1:
+        node = index.get_by_slug(slugs[0])
+        return Route(ROUTE_CATEGORY, path, slugs, node) if node else None
+
+    if is_item_slug(slugs[-1]):
+        node = index.get_by_path('/'.join(slugs[:-1])) or \
+            (index.get_by_slug(slugs[-2]) if len(slugs) == 2 else None)
+        if node and node.is_endpoint:
+            return Route(ROUTE_ITEM, path, slugs, node, item_slug=slugs[-1])
+        return None
+
+    for category_slugs, attr_slugs in split_attr_slugs(slugs):
+        node = index.get_by_path('/'.join(category_slugs))
+        if node and get_attr_slugs(node.item_class).issuperset(attr_slugs):
+            return Route(ROUTE_ATTRIBUTES if attr_slugs else ROUTE_CATEGORY, path, slugs, node, attr_slugs=attr_slugs)
+    return None
+
+
+class CatalogPathConverter:
+    """
+    URL path converter (Django 2.0+) that matches classified catalog paths only, unknown paths don't match
+    without DB access. Converted value is Route.
+    Example:
+        register_converter(CatalogPathConverter, 'catalog')
+        path('<catalog:route>/', views.catalog)
+    """
+    regex = '[a-z0-9/_-]+'
+
+    def to_python(self, value):
+        route = classify(value)
+        if route is None:
+            raise ValueError('Unknown catalog path {!r}'.format(value))
+        return route
+
+    def to_url(self, value):
+        return value.path if isinstance(value, Route) else str(value).strip('/')
+
+
+def catalog_dispatch(category, attributes=None, item=None):
+    """
+    Return view that classifies catalog path and dispatches it to handler of route kind, unknown paths are answered
+    with 404 before any DB access. Handlers are called with route keyword argument.
+    Example:
+        url(r'^(?P<path>[a-z0-9/_-]+)/$', catalog_dispatch(views.category, item=views.item))
+    :param category: View of category routes, attributes routes too if attributes view is not given
+    :param attributes: View of category with attributes routes
+    :param item: View of item routes
+    :return: View function
+    """
+    handlers = {ROUTE_CATEGORY: category, ROUTE_ATTRIBUTES: attributes or category, ROUTE_ITEM: item}
+
+    def view(request, *args, **kwargs):
+        route = kwargs.pop('route', None) or classify(kwargs.pop('path', ''))
+        handler = handlers.get(route.kind) if route else None
+        if handler is None:
+            raise Http404('Catalog path not found')
+        return handler(request, *args, route=route, **kwargs)
+    return view
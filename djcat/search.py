@@ -0,0 +1,133 @@
+import heapq
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+
+from . import settings
+from .register import CatalogItem
+from .models import prefetch_categories
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Return thread pool shared by searches, it is created on first use
+    :return: ThreadPoolExecutor
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.DJCAT_SEARCH_WORKERS)
+    return _executor
+
+
+def get_item_classes():
+    """
+    Return all registered item classes
+    :return: List of class objects
+    """
+    classes = []
+    for m in CatalogItem.REGISTRY.items():
+        for i in m[1]['items'].items():
+            classes.append(i[1]['_class'])
+    return classes
+
+
+def parse_order(order_by):
+    """
+    Return field name and direction of django style ordering, example: '-price'
+    :param order_by: String
+    :return: Tuple (String field name, Bool descending)
+    """
+    if order_by.startswith('-'):
+        return order_by[1:], True
+    return order_by, False
+
+
+def slice_queryset(queryset, order_by, limit):
+    """
+    Return first limit rows of queryset, rows with equal order field are ordered by pk
+    :param queryset: QuerySet
+    :param order_by: String, field name with optional "-"
+    :param limit: Integer
+    :return: QuerySet
+    """
+    descending = parse_order(order_by)[1]
+    return queryset.order_by(order_by, '-pk' if descending else 'pk')[:limit]
+
+
+def fetch(queryset, order_by, limit):
+    """
+    Evaluate first limit rows of queryset, runs in worker thread with its own db connection
+    :param queryset: QuerySet
+    :param order_by: String, field name with optional "-"
+    :param limit: Integer
+    :return: List of model instances
+    """
+    try:
+        return list(slice_queryset(queryset, order_by, limit))
+    finally:
+        close_old_connections()
+
+
+def merge(results, order_by, limit):
+    """
+    Merge sorted partial results with k-way heap merge
+    :param results: List of sorted lists of model instances
+    :param order_by: String, field name with optional "-"
+    :param limit: Integer
+    :return: List of model instances
+    """
+    field, descending = parse_order(order_by)
+    merged = heapq.merge(*results, key=lambda obj: getattr(obj, field), reverse=descending)
+    return list(itertools.islice(merged, limit))
+
+
+def search(querysets, order_by='-pk', limit=20):
+    """
+    Run querysets concurrently on thread pool and return merged first limit results.
+    Each queryset is limited to limit rows in database, so whole search costs as the slowest single query.
+    :param querysets: List of QuerySets, may be of different models
+    :param order_by: String, field name present in all models, with optional "-" for descending order
+    :param limit: Integer, max results
+    :return: List of model instances
+    """
+    if len(querysets) < 2 or settings.DJCAT_SEARCH_WORKERS < 2:
+        results = [list(slice_queryset(qs, order_by, limit)) for qs in querysets]
+    else:
+        futures = [get_executor().submit(fetch, qs, order_by, limit) for qs in querysets]
+        results = [f.result() for f in futures]
+    return merge(results, order_by, limit)
+
+
+def search_items(filter_func=None, order_by='-pk', limit=20, item_classes=None, active=True,
+                 with_categories=False):
+    """
+    Search items of all registered item classes.
+    Example, newest items with text in name:
+        search_items(lambda qs: qs.filter(name__icontains='studio'), order_by='-pk', limit=10)
+    :param filter_func: Callable(queryset) - return filtered queryset of item class
+    :param order_by: String, field name present in all item classes, with optional "-" for descending order
+    :param limit: Integer, max results
+    :param item_classes: List of item class objects, all registered by default
+    :param active: Bool, only active items, None - all items
+    :param with_categories: Bool, load categories of found items
+    :return: List of items
+    """
+    querysets = []
+    for class_obj in item_classes or get_item_classes():
+        qs = class_obj.objects.all()
+        if active is not None:
+            qs = qs.filter(active=active)
+        if filter_func:
+            qs = filter_func(qs)
+        querysets.append(qs)
+    items = search(querysets, order_by=order_by, limit=limit)
+    if with_categories:
+        prefetch_categories(items)
+    return items
@@ -12,3 +12,41 @@ DJCAT_ITEM_UID_LENGTH = getattr(settings, 'DJCAT_ITEM_UID_LENGTH', 8)
 
 DJCAT_CATEGORY_MODEL = getattr(settings, 'DJCAT_CATEGORY_MODEL')
 DJCAT_CATALOG_ROOT_URL = getattr(settings, 'DJCAT_CATALOG_ROOT_URL')
+
+DJCAT_SITEMAP_MAX_URLS = getattr(settings, 'DJCAT_SITEMAP_MAX_URLS', 50000)
+DJCAT_ITEMS_CHUNK_SIZE = getattr(settings, 'DJCAT_ITEMS_CHUNK_SIZE', 2000)
+
+DJCAT_METRICS_ENABLED = getattr(settings, 'DJCAT_METRICS_ENABLED', False)
+DJCAT_METRICS_CALLBACK = getattr(settings, 'DJCAT_METRICS_CALLBACK', None)
+
+DJCAT_SEARCH_WORKERS = getattr(settings, 'DJCAT_SEARCH_WORKERS', 4)
+
+DJCAT_PAGE_SIZE = getattr(settings, 'DJCAT_PAGE_SIZE', 20)
+DJCAT_PAGE_ORDERING = getattr(settings, 'DJCAT_PAGE_ORDERING', ('-pk',))
+DJCAT_PAGE_CURSOR_KEY = getattr(settings, 'DJCAT_PAGE_CURSOR_KEY', 'c')
+
+DJCAT_CACHE_PREFIX = getattr(settings, 'DJCAT_CACHE_PREFIX', 'djcat')
+DJCAT_VERSIONS_CACHE = getattr(settings, 'DJCAT_VERSIONS_CACHE', 'default')
+DJCAT_FRAGMENTS_CACHE = getattr(settings, 'DJCAT_FRAGMENTS_CACHE', 'default')
+DJCAT_FRAGMENTS_TIMEOUT = getattr(settings, 'DJCAT_FRAGMENTS_TIMEOUT', 3600)
+
+DJCAT_NAVIGATION_CACHE = getattr(settings, 'DJCAT_NAVIGATION_CACHE', 'default')
+DJCAT_NAVIGATION_TIMEOUT = getattr(settings, 'DJCAT_NAVIGATION_TIMEOUT', 24 * 3600)
+
+DJCAT_INDEX_SNAPSHOT = getattr(settings, 'DJCAT_INDEX_SNAPSHOT', None)
+
+DJCAT_PATH_REDIRECTS = getattr(settings, 'DJCAT_PATH_REDIRECTS', True)
+
+# None - tree is updated in save(), 'thread' - in background thread, 'command' - by djcat_tree_worker command
+DJCAT_DEFERRED_TREE_UPDATES = getattr(settings, 'DJCAT_DEFERRED_TREE_UPDATES', None)
+DJCAT_DEFERRED_TREE_INTERVAL = getattr(settings, 'DJCAT_DEFERRED_TREE_INTERVAL', 1.0)
+
+# retries of category save on concurrent writes errors
+DJCAT_WRITE_RETRIES = getattr(settings, 'DJCAT_WRITE_RETRIES', 3)
+
+# database alias of catalog reads (path resolution, listings, navigation), None - default routing.
+# DJCAT_VERSIONS_CACHE must be shared by all processes (memcached, redis), otherwise other processes don't see
+# versions bumps and read from lagging replica right after writes
+DJCAT_READ_DB_ALIAS = getattr(settings, 'DJCAT_READ_DB_ALIAS', None)
+# seconds after change of read scope version when reads go to primary, replica could lag behind
+DJCAT_READ_STALENESS = getattr(settings, 'DJCAT_READ_STALENESS', 5)
@@ -0,0 +1,179 @@
+import os
+from xml.sax.saxutils import escape
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+
+from . import settings
+from .register import CatalogItem
+from .utils import keyset_iterator
+
+
+SITEMAP_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n' \
+                 '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+SITEMAP_FOOTER = '</urlset>\n'
+SITEMAP_INDEX_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n' \
+                       '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+SITEMAP_INDEX_FOOTER = '</sitemapindex>\n'
+
+
+def get_category_model():
+    return apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+
+
+def iter_categories():
+    """
+    Return active categories
+    :return: Generator of category instances
+    """
+    return keyset_iterator(get_category_model().objects.filter(is_active=True))
+
+
+def iter_category_urls():
+    """
+    Return urls of all active categories
+    :return: Generator of url strings
+    """
+    for node in iter_categories():
+        yield node.get_url()
+
+
+def iter_attr_urls(skip_empty=False):
+    """
+    Return urls of category + choice attribute combinations (landing pages), example: realty/flat/brick/
+    :param skip_empty: Bool, skip combinations that have no active items
+    :return: Generator of url strings
+    """
+    content_type = ContentType.objects.get_for_model(get_category_model())
+    for node in iter_categories():
+        if not node.is_endpoint:
+            continue
+        item_class = CatalogItem.get_item_by_class(node.item_class)
+        if not item_class:
+            continue
+        url = node.get_url()
+        attrs = [a for a in item_class.attrs if a.type == 'choice']
+        if skip_empty and attrs:
+            # values of active items of all choice attributes with one query per category
+            rows = item_class.class_obj.objects.filter(content_type=content_type, object_id=node.pk, active=True)\
+                .values_list(*[a.field for a in attrs]).distinct().order_by()
+            present = [set() for a in attrs]
+            for row in rows:
+                for values, value in zip(present, row):
+                    values.add(value)
+        for n, a in enumerate(attrs):
+            for slug in a.choices:
+                if skip_empty and a.get_choice_value(slug) not in present[n]:
+                    continue
+                yield '{}{}/'.format(url, slug)
+
+
+def iter_item_urls(chunk_size=settings.DJCAT_ITEMS_CHUNK_SIZE):
+    """
+    Return urls of active items, items are read in keyset chunks
+    :param chunk_size: Integer, items per query
+    :return: Generator of url strings
+    """
+    content_type = ContentType.objects.get_for_model(get_category_model())
+    for node in iter_categories():
+        if not node.is_endpoint:
+            continue
+        item_class = CatalogItem.get_item_by_class(node.item_class)
+        if not item_class:
+            continue
+        items = item_class.class_obj.objects.filter(content_type=content_type, object_id=node.pk, active=True)
+        for item in keyset_iterator(items.only('pk', 'url'), chunk_size=chunk_size):
+            yield item.get_url()
+
+
+def iter_urls(skip_empty=False, chunk_size=settings.DJCAT_ITEMS_CHUNK_SIZE):
+    """
+    Return all catalog urls: categories, category + attribute combinations and items
+    :param skip_empty: Bool, skip attribute combinations that have no active items
+    :param chunk_size: Integer, items per query
+    :return: Generator of url strings
+    """
+    yield from iter_category_urls()
+    yield from iter_attr_urls(skip_empty=skip_empty)
+    yield from iter_item_urls(chunk_size=chunk_size)
+
+
+class SitemapWriter:
+    """
+    Write urls to sharded sitemap files incrementally, each file contains at most max_urls urls.
+    Example:
+        writer = SitemapWriter('/var/www/sitemaps', 'https://example.com')
+        writer.write(iter_urls())
+    """
+    def __init__(self, directory, base_url, max_urls=settings.DJCAT_SITEMAP_MAX_URLS, name='sitemap'):
+        self.directory = directory
+        self.base_url = base_url.rstrip('/') + settings.DJCAT_CATALOG_ROOT_URL
+        self.files_base_url = base_url.rstrip('/') + '/'
+        self.max_urls = max_urls
+        self.name = name
+        self.files = []
+        self._file = None
+        self._count = 0
+
+    def _open(self):
+        filename = '{}-{}.xml'.format(self.name, len(self.files) + 1)
+        self.files.append(filename)
+        self._file = open(os.path.join(self.directory, filename), 'w', encoding='utf-8')
+        self._file.write(SITEMAP_HEADER)
+        self._count = 0
+
+    def _close(self):
+        if self._file:
+            self._file.write(SITEMAP_FOOTER)
+            self._file.close()
+            self._file = None
+
+    def add(self, url):
+        """
+        Write url to current sitemap file, open next file if current is full
+        :param url: String, url relative to catalog root
+        """
+        if not self._file or self._count >= self.max_urls:
+            self._close()
+            self._open()
+        self._file.write('<url><loc>{}</loc></url>\n'.format(escape(self.base_url + url)))
+        self._count += 1
+
+    def write_index(self):
+        """
+        Write sitemap index file with all written sitemap files
+        :return: String, index file name
+        """
+        filename = '{}.xml'.format(self.name)
+        with open(os.path.join(self.directory, filename), 'w', encoding='utf-8') as f:
+            f.write(SITEMAP_INDEX_HEADER)
+            for name in self.files:
+                f.write('<sitemap><loc>{}</loc></sitemap>\n'.format(escape(self.files_base_url + name)))
+            f.write(SITEMAP_INDEX_FOOTER)
+        return filename
+
+    def write(self, urls):
+        """
+        Write all urls and sitemap index
+        :param urls: Iterable of url strings
+        :return: List of written sitemap file names
+        """
+        try:
+            for url in urls:
+                self.add(url)
+        finally:
+            self._close()
+        self.write_index()
+        return self.files
+
+
+def write_sitemaps(directory, base_url, skip_empty=False, max_urls=settings.DJCAT_SITEMAP_MAX_URLS):
+    """
+    Write sharded sitemap files with all catalog urls and sitemap index
+    :param directory: String, directory for sitemap files
+    :param base_url: String, site url, example: https://example.com
+    :param skip_empty: Bool, skip attribute combinations that have no active items
+    :param max_urls: Integer, max urls in one sitemap file
+    :return: List of written sitemap file names
+    """
+    return SitemapWriter(directory, base_url, max_urls=max_urls).write(iter_urls(skip_empty=skip_empty))
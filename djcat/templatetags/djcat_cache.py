@@ -0,0 +1,79 @@
+from django.core.cache import InvalidCacheBackendError, caches
+from django.template import Library, Node, TemplateSyntaxError, VariableDoesNotExist
+
+from .. import settings
+from ..fragments import get_fragment, SCOPES, SCOPE_PATH
+
+register = Library()
+
+
+class DjcatCacheNode(Node):
+    def __init__(self, nodelist, fragment_name, path_var, vary_on, options):
+        self.nodelist = nodelist
+        self.fragment_name = fragment_name
+        self.path_var = path_var
+        self.vary_on = vary_on
+        self.options = options
+
+    def resolve(self, var, context):
+        try:
+            return var.resolve(context)
+        except VariableDoesNotExist:
+            raise TemplateSyntaxError('"djcat_cache" tag got an unknown variable: %r' % var.var)
+
+    def render(self, context):
+        options = {k: self.resolve(v, context) for k, v in self.options.items()}
+        scope = options.get('scope', SCOPE_PATH)
+        if scope not in SCOPES:
+            raise TemplateSyntaxError('"djcat_cache" tag got unknown scope: %r' % scope)
+        timeout = options.get('timeout', settings.DJCAT_FRAGMENTS_TIMEOUT)
+        if timeout is not None:
+            try:
+                timeout = int(timeout)
+            except (ValueError, TypeError):
+                raise TemplateSyntaxError('"djcat_cache" tag got a non-integer timeout value: %r' % timeout)
+        try:
+            cache = caches[options.get('using', settings.DJCAT_FRAGMENTS_CACHE)]
+        except InvalidCacheBackendError:
+            raise TemplateSyntaxError('Invalid cache name specified for djcat_cache tag: %r' % options['using'])
+
+        return get_fragment(self.fragment_name, self.resolve(self.path_var, context),
+                            lambda: self.nodelist.render(context), scope=scope,
+                            vary_on=[self.resolve(v, context) for v in self.vary_on], timeout=timeout, cache=cache)
+
+
+@register.tag('djcat_cache')
+def do_djcat_cache(parser, token):
+    """
+    Cache template fragment of resolved catalog path. Cached fragment is invalidated when categories of path tree
+    or items of path category change.
+
+    Usage::
+
+        {% load djcat_cache %}
+        {% djcat_cache [fragment_name] [path] [var1] [var2] .. %}
+            .. listing ..
+        {% enddjcat_cache %}
+
+    Options, given as last arguments:
+        scope="path" - fragment depends on tree and items of category (default), "tree" - on tree only
+        (breadcrumbs), "catalog" - on whole catalog and items counts (menus)
+        timeout=300 - seconds, DJCAT_FRAGMENTS_TIMEOUT by default
+        using="cachename" - cache, DJCAT_FRAGMENTS_CACHE by default
+    """
+    nodelist = parser.parse(('enddjcat_cache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise TemplateSyntaxError("'%r' tag requires at least 2 arguments." % tokens[0])
+    options = {}
+    while len(tokens) > 3 and tokens[-1].split('=', 1)[0] in ('scope', 'timeout', 'using'):
+        name, value = tokens.pop().split('=', 1)
+        options[name] = parser.compile_filter(value)
+    return DjcatCacheNode(
+        nodelist,
+        tokens[1].strip('"\''),  # fragment_name can't be a variable.
+        parser.compile_filter(tokens[2]),
+        [parser.compile_filter(t) for t in tokens[3:]],
+        options,
+    )
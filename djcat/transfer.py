@@ -0,0 +1,199 @@
+import json
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, router, transaction
+
+from . import settings
+from . import versions
+from .register import CatalogItem
+from .utils import keyset_iterator, get_tree_ordering, chunks
+from .exceptions import *
+
+
+FORMAT_VERSION = 1
+
+RECORD_HEADER = 'header'
+RECORD_CATEGORY = 'category'
+RECORD_ITEM = 'item'
+# keys required in records of type
+RECORD_KEYS = {RECORD_CATEGORY: ('fields',), RECORD_ITEM: ('class', 'fields')}
+
+# denormalized fields, they are rebuilt after import
+CATEGORY_SKIP_FIELDS = ('url', 'ancestors')
+ITEM_SKIP_FIELDS = ('url', 'content_type')
+
+
+def get_registered_items():
+    """
+    Return registered item classes paths and class objects
+    :return: List of tuples (String item class, class object)
+    """
+    return [(i[1]['class'], i[1]['_class'])
+            for m in CatalogItem.REGISTRY.items() for i in m[1]['items'].items()]
+
+
+def get_export_fields(model, skip=()):
+    return [f for f in model._meta.concrete_fields if f.name not in skip]
+
+
+def dump_record(record):
+    return json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def dump_fields(obj, fields):
+    return {f.attname: f.value_from_object(obj) for f in fields}
+
+
+def export_catalog(stream, chunk_size=settings.DJCAT_ITEMS_CHUNK_SIZE):
+    """
+    Write catalog to stream as NDJSON, one record per line: header, categories in tree order (parent goes before
+    its children), items of every registered class in keyset chunks with all concrete fields including attributes
+    fields. Denormalized urls and ancestors are not written. Memory stays flat whatever the catalog size.
+    :param stream: Text file object
+    :param chunk_size: Integer, rows per items query
+    :return: Dictionary {'categories': Integer, 'items': Integer} - written records counts
+    """
+    CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+    counts = {'categories': 0, 'items': 0}
+    stream.write(dump_record({'type': RECORD_HEADER, 'format': FORMAT_VERSION,
+                              'category_model': CategoryModel._meta.label}))
+
+    fields = get_export_fields(CategoryModel, CATEGORY_SKIP_FIELDS)
+    queryset = CategoryModel._base_manager.order_by(*get_tree_ordering(CategoryModel))
+    for obj in queryset.iterator():
+        stream.write(dump_record({'type': RECORD_CATEGORY, 'fields': dump_fields(obj, fields)}))
+        counts['categories'] += 1
+
+    for item_class, class_obj in get_registered_items():
+        fields = get_export_fields(class_obj, ITEM_SKIP_FIELDS)
+        for obj in keyset_iterator(class_obj._base_manager.all(), chunk_size=chunk_size):
+            stream.write(dump_record({'type': RECORD_ITEM, 'class': item_class, 'fields': dump_fields(obj, fields)}))
+            counts['items'] += 1
+    return counts
+
+
+class BulkInserter:
+    """
+    Buffer of model instances inserted in batches. Instances of multi-table inherited models are inserted into
+    every table of inheritance chain. Field values are inserted as is (raw), auto_now fields keep imported values.
+    """
+    def __init__(self, model, using, batch_size):
+        self.model = model
+        self.using = using
+        self.batch_size = batch_size
+        self.objs = []
+        self.count = 0
+        # parents go before children, so child rows reference existing parent rows
+        self.models = [m for m in reversed(model._meta.get_parent_list())] + [model]
+
+    def add(self, obj):
+        self.objs.append(obj)
+        if len(self.objs) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.objs:
+            return
+        ops = connections[self.using].ops
+        for model in self.models:
+            fields = model._meta.local_concrete_fields
+            # bulk_create() refuses multi-table inherited models, so rows are inserted table by table
+            for batch in chunks(self.objs, max(ops.bulk_batch_size(fields, self.objs), 1)):
+                model._base_manager._insert(batch, fields=fields, using=self.using, raw=True)
+        self.count += len(self.objs)
+        self.objs = []
+
+
+def load_object(model, fields, line):
+    """
+    Return unsaved model instance from record fields
+    :param model: Model class
+    :param fields: Dictionary {field attname: value}
+    :param line: Integer, record line number for errors
+    :return: Model instance
+    """
+    if not isinstance(fields, dict):
+        raise CatalogImportError(line, "'fields' is not an object")
+    opts = {f.attname: f for f in model._meta.concrete_fields}
+    values = {}
+    for attname, value in fields.items():
+        if attname not in opts:
+            raise CatalogImportError(line, "unknown field '{}' of {}".format(attname, model._meta.label))
+        values[attname] = opts[attname].to_python(value)
+    return model(**values)
+
+
+def import_catalog(lines, batch_size=settings.DJCAT_ITEMS_CHUNK_SIZE):
+    """
+    Load catalog written by export_catalog() into empty catalog in one transaction. Rows are bulk inserted with
+    exported primary keys and tree fields, without save() and tree updates, then url paths, ancestors and items urls
+    of every tree are rebuilt once. Memory stays flat for items, rebuild loads one tree at a time.
+    :param lines: Iterable of NDJSON lines
+    :param batch_size: Integer, rows per insert batch
+    :return: Dictionary {'categories': Integer, 'items': Integer} - imported rows counts
+    """
+    CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+    using = router.db_for_write(CategoryModel)
+    content_type = ContentType.objects.db_manager(using).get_for_model(CategoryModel)
+    categories = BulkInserter(CategoryModel, using, batch_size)
+    items = {}
+
+    with transaction.atomic(using=using):
+        if CategoryModel._base_manager.using(using).exists():
+            raise CatalogImportError(0, 'catalog is not empty')
+        header = False
+        for line, data in enumerate(lines, 1):
+            if not data.strip():
+                continue
+            try:
+                record = json.loads(data)
+            except ValueError:
+                raise CatalogImportError(line, 'record is not valid JSON')
+            if not isinstance(record, dict):
+                raise CatalogImportError(line, 'record is not an object')
+            kind = record.get('type')
+            if not header:
+                # header is first record, blank lines before it are skipped
+                if kind != RECORD_HEADER or record.get('format') != FORMAT_VERSION:
+                    raise CatalogImportError(line, 'unknown export format')
+                header = True
+                continue
+            missing = [k for k in RECORD_KEYS.get(kind, ()) if k not in record]
+            if missing:
+                raise CatalogImportError(line, "{} record has no '{}'".format(kind, missing[0]))
+            if kind == RECORD_CATEGORY:
+                categories.add(load_object(CategoryModel, record['fields'], line))
+            elif kind == RECORD_ITEM:
+                if record['class'] not in items:
+                    item = CatalogItem.get_item_by_class(record['class'])
+                    if not item:
+                        raise CatalogImportError(line, "item class '{}' is not registered".format(record['class']))
+                    # items reference categories, they are inserted after all categories
+                    categories.flush()
+                    items[record['class']] = BulkInserter(item.class_obj, using, batch_size)
+                inserter = items[record['class']]
+                obj = load_object(inserter.model, record['fields'], line)
+                obj.content_type_id = content_type.pk
+                obj.url = ''
+                inserter.add(obj)
+            else:
+                raise CatalogImportError(line, "unknown record type '{}'".format(kind))
+        if not header:
+            raise CatalogImportError(0, 'no header')
+        for inserter in [categories] + list(items.values()):
+            inserter.flush()
+
+        # explicit primary keys don't move sequences (PostgreSQL, Oracle)
+        models = [CategoryModel] + [m for i in items.values() for m in i.models]
+        with connections[using].cursor() as cursor:
+            for sql in connections[using].ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+
+        for root in CategoryModel._base_manager.using(using).filter(parent__isnull=True).iterator():
+            CategoryModel.objects.db_manager(using).rebuild_tree(root)
+
+    versions.bump(versions.CATALOG, versions.COUNTS)
+    return {'categories': categories.count, 'items': sum(i.count for i in items.values())}
@@ -0,0 +1,142 @@
+from django.db import models
+from django.db.models import Q, F, Value
+from django.db.models.functions import Concat, Substr
+from django.utils.translation import ugettext as _
+
+from .exceptions import *
+
+
+class MaterializedPathNode(models.Model):
+    """
+    Abstract tree node stored as materialized path: tree_path is concatenation of fixed width primary keys of all
+    ancestors and node itself. Inserts and moves don't touch other trees or siblings: insert costs a constant number
+    of queries whatever the tree size, subtree move is one UPDATE over moved nodes only.
+    Provides the part of django-mptt node API used by djcat.
+    Subclasses must define parent field:
+        parent = models.ForeignKey('self', null=True, blank=True, related_name='children')
+    Siblings are ordered by primary key.
+    """
+    tree_path_step = 10
+
+    tree_path = models.CharField(max_length=255, verbose_name=_('Tree path'), editable=False, blank=True,
+                                 db_index=True)
+    level = models.PositiveIntegerField(default=0, verbose_name=_('Level'), editable=False)
+
+    class Meta:
+        abstract = True
+        ordering = ['tree_path']
+
+    @property
+    def tree_id(self):
+        """
+        Return tree identifier, it is root node primary key
+        :return: Integer
+        """
+        return int(self.tree_path[:self.tree_path_step])
+
+    def get_tree_queryset(self):
+        return self.__class__._default_manager.all()
+
+    def make_tree_path_segment(self, pk):
+        return str(pk).zfill(self.tree_path_step)
+
+    def get_ancestors_paths(self, include_self=False):
+        """
+        Return tree paths of ancestors
+        :param include_self: Bool
+        :return: List of strings
+        """
+        step = self.tree_path_step
+        end = len(self.tree_path) if include_self else len(self.tree_path) - step
+        return [self.tree_path[:x] for x in range(step, end + 1, step)]
+
+    def is_root_node(self):
+        return self.parent_id is None
+
+    def is_leaf_node(self):
+        return not self.get_descendants().exists()
+
+    def get_level(self):
+        return self.level
+
+    def get_root(self):
+        """
+        Return root node of tree
+        :return: Node instance
+        """
+        if self.is_root_node():
+            return self
+        return self.get_tree_queryset().get(tree_path=self.tree_path[:self.tree_path_step])
+
+    def get_ancestors(self, ascending=False, include_self=False):
+        """
+        Return ancestors, from root by default
+        :param ascending: Bool, order from parent to root
+        :param include_self: Bool
+        :return: QuerySet
+        """
+        qs = self.get_tree_queryset().filter(tree_path__in=self.get_ancestors_paths(include_self=include_self))
+        return qs.order_by('-tree_path' if ascending else 'tree_path')
+
+    def get_descendants(self, include_self=False):
+        """
+        Return descendants in tree order
+        :param include_self: Bool
+        :return: QuerySet
+        """
+        qs = self.get_tree_queryset().filter(tree_path__startswith=self.tree_path)
+        if not include_self:
+            qs = qs.exclude(pk=self.pk)
+        return qs.order_by('tree_path')
+
+    def get_descendant_count(self):
+        return self.get_descendants().count()
+
+    def get_children(self):
+        return self.get_tree_queryset().filter(parent_id=self.pk).order_by('tree_path')
+
+    def get_family(self):
+        """
+        Return ancestors, node itself and its descendants in tree order
+        :return: QuerySet
+        """
+        ancestors = Q(tree_path__in=self.get_ancestors_paths())
+        qs = self.get_tree_queryset().filter(ancestors | Q(tree_path__startswith=self.tree_path))
+        return qs.order_by('tree_path')
+
+    def is_descendant_of(self, other, include_self=False):
+        if self.pk == other.pk:
+            return include_self
+        return self.tree_path.startswith(other.tree_path)
+
+    def make_tree_path(self, old_tree_path=''):
+        """
+        Return tree path and level of node by its parent
+        :param old_tree_path: String, current tree path of node stored in db
+        :return: Tuple (String, Integer)
+        """
+        if not self.parent_id:
+            return self.make_tree_path_segment(self.pk), 0
+        parent = self.get_tree_queryset().only('tree_path', 'level').get(pk=self.parent_id)
+        if old_tree_path and parent.tree_path.startswith(old_tree_path):
+            raise CategoryInvalidMove(node=self, parent=parent)
+        return parent.tree_path + self.make_tree_path_segment(self.pk), parent.level + 1
+
+    def save(self, *args, **kwargs):
+        """
+        Saves node, sets tree path of new node or moves node with descendants if parent was changed
+        """
+        if self._state.adding:
+            super(MaterializedPathNode, self).save(*args, **kwargs)
+            self.tree_path, self.level = self.make_tree_path()
+            self.get_tree_queryset().filter(pk=self.pk).update(tree_path=self.tree_path, level=self.level)
+            return
+
+        old_tree_path, old_level = self.get_tree_queryset().values_list('tree_path', 'level').get(pk=self.pk)
+        tree_path, level = self.make_tree_path(old_tree_path=old_tree_path)
+        if not tree_path == old_tree_path:
+            self.get_tree_queryset().filter(tree_path__startswith=old_tree_path).update(
+                tree_path=Concat(Value(tree_path), Substr('tree_path', len(old_tree_path) + 1)),
+                level=F('level') + (level - old_level))
+        self.tree_path, self.level = tree_path, level
+        super(MaterializedPathNode, self).save(*args, **kwargs)
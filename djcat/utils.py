@@ -1,10 +1,12 @@
+import time
 import random
 import string
 import itertools
 
 from unidecode import unidecode
 
-from django.db import connection
+from django.db import connection, transaction, OperationalError
+from django.db.models import Case, When, Value, F
 from django.utils.text import slugify
 
 from . import settings
@@ -66,3 +68,108 @@ def db_table_exists(table_name):
     :return:
     """
     return table_name in connection.introspection.table_names()
+
+
+def keyset_iterator(queryset, chunk_size=settings.DJCAT_ITEMS_CHUNK_SIZE):
+    """
+    Iterate over queryset ordered by primary key, each chunk is fetched with "pk > last seen pk" condition,
+    so memory stays flat and deep chunks cost the same as first one.
+    :param queryset: QuerySet of model instances
+    :param chunk_size: Integer, rows per query
+    :return: Generator of model instances
+    """
+    last_pk = None
+    while True:
+        qs = queryset.order_by('pk')
+        if last_pk is not None:
+            qs = qs.filter(pk__gt=last_pk)
+        fetched = 0
+        for obj in qs[:chunk_size].iterator():
+            fetched += 1
+            last_pk = obj.pk
+            yield obj
+        if fetched < chunk_size:
+            return
+
+
+def bulk_update_fields(queryset, values, batch_size=100):
+    """
+    Update different values for many rows with "UPDATE ... SET field = CASE pk WHEN ..." queries.
+    :param queryset: QuerySet of rows to update
+    :param values: Dictionary {pk: {field name: value}}
+    :param batch_size: Integer, rows per query
+    :return: Integer, updated rows count
+    """
+    pks = list(values)
+    updated = 0
+    for i in range(0, len(pks), batch_size):
+        batch = pks[i:i + batch_size]
+        fields = set(f for pk in batch for f in values[pk])
+        update = {}
+        for f in fields:
+            output_field = queryset.model._meta.get_field(f)
+            whens = [When(pk=pk, then=Value(values[pk][f])) for pk in batch if f in values[pk]]
+            update[f] = Case(*whens, default=F(f), output_field=output_field)
+        updated += queryset.filter(pk__in=batch).update(**update)
+    return updated
+
+
+def chunks(seq, size):
+    """
+    Split sequence on chunks
+    :param seq: List
+    :param size: Integer, chunk size
+    :return: Generator of lists
+    """
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def get_tree_ordering(model):
+    """
+    Return ordering of tree model rows where parent goes before its children and siblings are in tree order
+    :param model: MPTT or materialized path tree model
+    :return: Tuple of field names
+    """
+    opts = getattr(model, '_mptt_meta', None)
+    if opts:
+        return opts.tree_id_attr, opts.left_attr
+    return ('tree_path',)
+
+
+def get_tree_fields(model):
+    """
+    Return names of fields that store node position in tree
+    :param model: MPTT or materialized path tree model
+    :return: Tuple of field names
+    """
+    opts = getattr(model, '_mptt_meta', None)
+    if opts:
+        return opts.tree_id_attr, opts.left_attr, opts.right_attr, opts.level_attr
+    return 'tree_path', 'level'
+
+
+def atomic_retry(func, using=None, retries=None, on_retry=None):
+    """
+    Call func in transaction and retry it with random backoff on errors of concurrent writes (deadlock, lock wait
+    timeout, locked sqlite database). Inside outer transaction func is called once, only outer transaction
+    can be retried.
+    :param func: Callable
+    :param using: String, database alias
+    :param retries: Integer, max retries count, DJCAT_WRITE_RETRIES by default
+    :param on_retry: Callable, called before every retry, to reset state changed by failed call
+    :return: Result of func
+    """
+    if retries is None:
+        retries = settings.DJCAT_WRITE_RETRIES
+    attempts = 1 if transaction.get_connection(using).in_atomic_block else 1 + retries
+    for attempt in range(attempts):
+        if attempt and on_retry:
+            on_retry()
+        try:
+            with transaction.atomic(using=using, savepoint=False):
+                return func()
+        except OperationalError:
+            if attempt + 1 == attempts:
+                raise
+            time.sleep(random.uniform(0, 0.02 * 2 ** attempt))
@@ -0,0 +1,81 @@
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+
+from . import settings
+
+
+# whole catalog: any category change
+CATALOG = 'catalog'
+# active items counts of categories
+COUNTS = 'counts'
+
+
+def tree_scope(root_pk):
+    """
+    Return version scope of categories of one root tree
+    :param root_pk: Integer, root category pk
+    :return: String
+    """
+    return 'tree:{}'.format(root_pk)
+
+
+def items_scope(category_pk):
+    """
+    Return version scope of items of category and its descendants, branch pages list and count descendants items
+    :param category_pk: Integer, category pk
+    :return: String
+    """
+    return 'items:{}'.format(category_pk)
+
+
+def get_cache():
+    return caches[settings.DJCAT_VERSIONS_CACHE]
+
+
+def make_key(scope):
+    return '{}:version:{}'.format(settings.DJCAT_CACHE_PREFIX, scope)
+
+
+def bump(*scopes):
+    """
+    Set new versions of scopes, version is time of change
+    :param scopes: Strings
+    :return: Float, new version
+    """
+    version = time.time()
+    get_cache().set_many({make_key(s): version for s in scopes if s}, timeout=None)
+    return version
+
+
+def bump_on_commit(*scopes, using=None):
+    """
+    Bump versions of scopes after current transaction commit, so readers never get new version with old rows.
+    Outside of transaction versions are bumped at once, on rollback they are not bumped.
+    :param scopes: Strings
+    :param using: String, database alias
+    :return:
+    """
+    transaction.on_commit(lambda: bump(*scopes), using=using)
+
+
+def get_versions(*scopes):
+    """
+    Return versions of scopes with one cache request. Unknown (evicted) versions are set to current time,
+    so they differ from any version seen before.
+    :param scopes: Strings
+    :return: Dictionary {scope: Float version}
+    """
+    cache = get_cache()
+    found = cache.get_many([make_key(s) for s in scopes])
+    versions = {s: found[make_key(s)] for s in scopes if make_key(s) in found}
+    missing = [s for s in scopes if s not in versions]
+    if missing:
+        now = time.time()
+        for s in missing:
+            cache.add(make_key(s), now, timeout=None)
+        # version could be added by other process first
+        found = cache.get_many([make_key(s) for s in missing])
+        versions.update({s: found.get(make_key(s), now) for s in missing})
+    return versions
@@ -0,0 +1,46 @@
+import gzip
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from django.views.decorators.http import require_GET
+
+from .navigation import get_snapshot, get_diff
+
+
+def gzip_json_response(request, data, etag):
+    """
+    Return JSON response of gzip compressed data, compressed data is sent as is if client accepts gzip
+    :param request: HttpRequest
+    :param data: Bytes, compressed JSON
+    :param etag: String
+    :return: HttpResponse
+    """
+    if 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+        response = HttpResponse(data, content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(gzip.decompress(data), content_type='application/json')
+    response['ETag'] = quote_etag(etag)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+@require_GET
+def navigation(request):
+    """
+    Serve active categories tree JSON: {"etag": ..., "tree": [nodes]}. Not modified tree is answered with 304.
+    With "since" parameter - etag of client tree - diff to current tree is served if client tree is still cached:
+    {"etag": ..., "since": ..., "changed": [nodes], "removed": [ids]}, full tree otherwise.
+    """
+    snapshot = get_snapshot()
+    if quote_etag(snapshot.etag) in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = HttpResponseNotModified()
+        response['ETag'] = quote_etag(snapshot.etag)
+        return response
+    since = request.GET.get('since')
+    if since:
+        diff = get_diff(since, snapshot)
+        if diff is not None:
+            return gzip_json_response(request, diff, snapshot.etag)
+    return gzip_json_response(request, snapshot.data, snapshot.etag)
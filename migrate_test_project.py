@@ -24,9 +24,7 @@ except AttributeError:
     pass
 else:
     setup()
-    call_command('migrate')
     call_command('makemigrations', 'catalog')
     call_command('makemigrations', 'catalog_module_realty')
-    call_command('migrate', 'catalog')
-    call_command('migrate', 'catalog_module_realty')
+    call_command('migrate')
 
@@ -53,6 +53,9 @@ setup(
     url='https://github.com/avigmati/djcat',
     packages=[
         'djcat',
+        'djcat.migrations',
+        'djcat.management',
+        'djcat.management.commands',
     ],
     include_package_data=True,
     install_requires=[
@@ -10,7 +10,12 @@ settings = dict(
         "default": {
             'NAME': os.path.join(BASE_DIR, 'test_db.sqlite3'),
             "ENGINE": "django.db.backends.sqlite3",
-        }
+        },
+        # stand-in of read replica, it is not replicated, see tests.test_db
+        "replica": {
+            'NAME': os.path.join(BASE_DIR, 'test_db_replica.sqlite3'),
+            "ENGINE": "django.db.backends.sqlite3",
+        },
     },
     ROOT_URLCONF="tests.urls",
 
@@ -41,7 +46,8 @@ settings = dict(
         },
     ],
 
-    DJCAT_CATEGORY_MODEL='catalog.Category',
+    # catalog.MPCategory runs tests against materialized path category
+    DJCAT_CATEGORY_MODEL=os.environ.get('DJCAT_TEST_CATEGORY_MODEL', 'catalog.Category'),
     DJCAT_CATALOG_ROOT_URL='/'
 )
 
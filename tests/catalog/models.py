@@ -1,6 +1,9 @@
 from django.db import models
 
-from djcat.models import DjcatCategory, DjcatItem
+from mptt.models import MPTTModel, TreeForeignKey
+
+from djcat.models import DjcatCategory, DjcatMPCategory, DjcatItem
+from djcat.tree import MaterializedPathNode
 
 from .fields import PriceField
 
@@ -9,8 +12,28 @@ class Category(DjcatCategory):
     pass
 
 
+class MPCategory(DjcatMPCategory):
+    """Materialized path category, used when tests run with DJCAT_TEST_CATEGORY_MODEL=catalog.MPCategory"""
+    pass
+
+
 class BaseAd(DjcatItem):
     price = PriceField(verbose_name="Price")
 
     def create_name(self):
         return self.name
+
+
+class PathNode(MaterializedPathNode):
+    """Plain materialized path tree, used in tree backend tests and benchmarks"""
+    name = models.CharField(max_length=100)
+    parent = models.ForeignKey('self', null=True, blank=True, related_name='children', on_delete=models.CASCADE)
+
+
+class MPTTNode(MPTTModel):
+    """Plain MPTT tree, used in tree backend benchmarks"""
+    name = models.CharField(max_length=100)
+    parent = TreeForeignKey('self', null=True, blank=True, related_name='children', on_delete=models.CASCADE)
+
+    class MPTTMeta:
+        order_insertion_by = ['name']
@@ -1,19 +1,26 @@
 from django.shortcuts import render, redirect
 from django.views import View
 from django.conf import settings
+from django.utils.decorators import method_decorator
 
 from djcat.path import Path
+from djcat.http import catalog_condition, get_request_path
 
 
 class Catalog(View):
     def __init__(self):
         super().__init__()
 
+    @method_decorator(catalog_condition())
     def get(self, request, *args, **kwargs):
         """
         Route between render category and item
         """
-        path = Path(path=kwargs.get('path', None), query=request.GET.get('a'))
+        path = get_request_path(request, *args, **kwargs)
+        if path.redirect_url:
+            query = request.META.get('QUERY_STRING', '')
+            return redirect(settings.DJCAT_CATALOG_ROOT_URL + path.redirect_url + ('?' + query if query else ''),
+                            permanent=True)
         if not path.item:
             return self.render_category(request, path)
         else:
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_djcat
+------------
+
+Tests for `djcat` management commands.
+"""
+
+from io import StringIO
+
+from django.test import TransactionTestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from django.apps import apps
+from django.conf import settings
+
+from djcat import versions
+from djcat.models import CategoryPath
+from djcat.register import CatalogItem
+
+
+class TestRebuildPathsCase(TransactionTestCase):
+    """djcat_rebuild_paths command test"""
+
+    def setUp(self):
+        cache.clear()
+        self.c = self.create_category(name="Realty", is_active=True)
+        self.c1 = self.create_category(name="Flat", parent=self.c, is_unique_in_path=True, is_active=True)
+        self.c2 = self.create_category(name="Flatbuy", parent=self.c1, is_active=True,
+                                       item_class='catalog_module_realty.models.FlatBuy')
+        self.other = self.create_category(name="Auto", is_active=False)
+        self.other1 = self.create_category(name="Cars", parent=self.other, is_active=False)
+
+    def create_category(self, **kwargs):
+        self.CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+        c = self.CategoryModel.objects.create(**kwargs)
+        c.refresh_from_db()
+        return c
+
+    def break_tree(self):
+        CategoryPath.objects.filter(category=self.c2).delete()
+        CategoryPath.objects.create(category=self.c2, kind='full', path='stale/path')
+        self.CategoryModel.objects.filter(pk=self.c1.pk).update(url='wrong/')
+        self.CategoryModel.objects.filter(pk=self.other1.pk).update(is_active=True, ancestors='')
+
+    def call(self, *args):
+        out = StringIO()
+        call_command('djcat_rebuild_paths', *args, stdout=out)
+        return out.getvalue()
+
+    def test_verify(self):
+        self.call('--verify')
+        self.break_tree()
+        self.assertRaises(CommandError, self.call, '--verify')
+
+    def test_dry_run(self):
+        self.break_tree()
+        out = self.call('--dry-run')
+        self.assertIn('6 differences found', out)
+        self.assertTrue(CategoryPath.objects.filter(path='stale/path').exists())
+
+    def test_rebuild(self):
+        self.break_tree()
+        scopes = (versions.CATALOG, versions.tree_scope(self.c.pk), versions.tree_scope(self.other.pk))
+        before = versions.get_versions(*scopes)
+        self.call('--dry-run')
+        self.assertEqual(versions.get_versions(*scopes), before)
+        out = self.call()
+        after = versions.get_versions(*scopes)
+        self.assertTrue(all(not after[s] == before[s] for s in scopes))
+        self.assertIn('[1/2] Realty: 3 nodes, 0 inactive, 1 urls, 0 ancestors, 1 stale paths, 2 missing paths', out)
+        self.assertIn('[2/2] Auto: 2 nodes, 1 inactive, 0 urls, 1 ancestors, 0 stale paths, 0 missing paths', out)
+        self.call('--verify')
+        self.c1.refresh_from_db()
+        self.other1.refresh_from_db()
+        self.assertEqual(self.c1.url, 'flat/')
+        self.assertEqual(self.other1.is_active, False)
+        self.assertEqual(sorted(CategoryPath.objects.filter(category=self.c2).values_list('path', flat=True)),
+                         ['flat/flatbuy', 'realty/flat/flatbuy'])
+
+
+class TestRecountItemsCase(TransactionTestCase):
+    """djcat_recount_items command test"""
+
+    def setUp(self):
+        cache.clear()
+        self.CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+        self.c = self.CategoryModel.objects.create(name="Realty", is_active=True)
+        self.c1 = self.CategoryModel.objects.create(name="Flatbuy", parent=self.c, is_active=True,
+                                                    item_class='catalog_module_realty.models.FlatBuy')
+        item_class = CatalogItem.get_item_by_class(self.c1.item_class)
+        item_class.class_obj.objects.create(category=self.c1, price=1, active=True, building_type=1, room=2)
+
+    def call(self, *args):
+        out = StringIO()
+        call_command('djcat_recount_items', *args, stdout=out)
+        return out.getvalue()
+
+    def test_recount(self):
+        self.assertIn('Done: 0 differences found.', self.call('--verify'))
+        self.CategoryModel.objects.update(item_count=0)
+        self.assertRaises(CommandError, self.call, '--verify')
+        out = self.call('--dry-run', '--verbosity', '2')
+        self.assertIn('Realty: stored 0, computed 1', out)
+        self.assertIn('Done: 2 differences found.', out)
+        before = versions.get_versions(versions.COUNTS)
+        self.assertIn('Done: 2 differences fixed.', self.call())
+        self.assertNotEqual(versions.get_versions(versions.COUNTS), before)
+        # nothing to fix, counts version is kept
+        before = versions.get_versions(versions.COUNTS)
+        self.assertIn('Done: 0 differences fixed.', self.call())
+        self.assertEqual(versions.get_versions(versions.COUNTS), before)
+        self.assertEqual(list(self.CategoryModel.objects.values_list('item_count', flat=True)), [1, 1])
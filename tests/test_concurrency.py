@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_djcat
+------------
+
+Tests for `djcat` concurrent category writes.
+"""
+
+import threading
+from unittest import mock
+
+from django.test import TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.db import connection, transaction, OperationalError
+
+from django.apps import apps
+from django.conf import settings
+
+from djcat import settings as djcat_settings
+from djcat.utils import atomic_retry
+
+
+class TestConcurrencyCase(TransactionTestCase):
+    """Concurrent writers of one tree, every thread has own connection, so data must be committed"""
+
+    def setUp(self):
+        self.CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+        self.roots = [self.CategoryModel.objects.create(name=name, is_active=True) for name in ('Realty', 'Auto')]
+        self.nodes = [self.CategoryModel.objects.create(name='Node {}'.format(x), parent=self.roots[0],
+                                                        is_active=True) for x in range(4)]
+        for node in self.nodes:
+            self.CategoryModel.objects.create(name='Leaf {}'.format(node.pk), parent=node, is_active=True,
+                                              item_class='catalog_module_realty.models.FlatBuy')
+
+    def assertTreesConsistent(self):
+        for root in self.CategoryModel.objects.filter(parent__isnull=True):
+            diff = self.CategoryModel.objects.rebuild_tree(root, write=False)
+            for key in ('inactive', 'urls', 'ancestors', 'stale', 'missing'):
+                self.assertEqual(diff[key], [], '{} of tree {} are not consistent'.format(key, root))
+
+    def test_concurrent_writers(self):
+        """
+        Paths stay consistent under concurrent renames and moves. On SQLite select_for_update() is no-op and writers
+        are serialized by database lock, so this test doesn't prove root rows locking, see test_lock_trees
+        """
+        errors = []
+
+        def write(node_pk, x):
+            def step_save(step):
+                node = self.CategoryModel.objects.get(pk=node_pk)
+                node.slug = 'node{}s{}n{}'.format(x, step, node_pk)
+                if step % 2:
+                    # move sibling to other tree and back
+                    node.parent = self.CategoryModel.objects.get(pk=self.roots[step % 4 // 2 - 1].pk)
+                node.save()
+            try:
+                for step in range(5):
+                    # sqlite locks tables on reads too, so read and save are retried together
+                    atomic_retry(lambda: step_save(step))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        with mock.patch.object(djcat_settings, 'DJCAT_WRITE_RETRIES', 20):
+            threads = [threading.Thread(target=write, args=(node.pk, x)) for x, node in enumerate(self.nodes)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(errors, [])
+        self.assertTreesConsistent()
+        for node in self.CategoryModel.objects.filter(pk__in=[n.pk for n in self.nodes]):
+            self.assertEqual(node.url, '{}/{}/'.format(node.parent.slug, node.slug))
+
+    @skipUnlessDBFeature('has_select_for_update')
+    def test_lock_trees(self):
+        with CaptureQueriesContext(connection) as queries, transaction.atomic():
+            self.assertEqual(self.CategoryModel.objects.lock_trees(self.roots[1].pk, self.roots[0].pk, None),
+                             {r.pk for r in self.roots})
+        self.assertIn('FOR UPDATE', queries[0]['sql'])
+
+    def test_save_retry(self):
+        update_tree = self.CategoryModel.objects.update_tree
+        calls = []
+
+        def fail_once(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 1:
+                raise OperationalError('deadlock detected')
+            return update_tree(*args, **kwargs)
+
+        with mock.patch.object(self.CategoryModel.objects, 'update_tree', side_effect=fail_once):
+            c = self.CategoryModel(name='Room', parent=self.CategoryModel.objects.get(pk=self.nodes[0].pk))
+            c.save()
+        # first insert was rolled back and instance state was reset before retry
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(self.CategoryModel.objects.filter(name='Room').count(), 1)
+        self.assertEqual(self.CategoryModel.objects.get(name='Room').pk, c.pk)
+        self.assertEqual(c.url, 'realty/{}/room/'.format(self.nodes[0].slug))
+        self.assertTreesConsistent()
+
+    def test_atomic_retry(self):
+        calls = []
+
+        def func():
+            calls.append(1)
+            if calls.count(1) < 3:
+                raise OperationalError('deadlock detected')
+            return len(calls)
+        self.assertEqual(atomic_retry(func, retries=2, on_retry=lambda: calls.append(0)), 5)
+        calls.clear()
+        with self.assertRaises(OperationalError):
+            atomic_retry(func, retries=1)
+        calls.clear()
+        # outer transaction can't be retried
+        with self.assertRaises(OperationalError), transaction.atomic():
+            atomic_retry(func, retries=2)
+        self.assertEqual(calls, [1])
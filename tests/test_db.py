@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_djcat
+------------
+
+Tests for `djcat` read database routing.
+"""
+
+from unittest import mock
+
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connections
+
+from django.apps import apps
+from django.conf import settings
+
+from djcat import settings as djcat_settings
+from djcat import versions
+from djcat.db import get_read_alias
+from djcat.path import Path
+from djcat.register import CatalogItem
+from djcat.navigation import get_tree_queryset
+
+
+class TestReadDatabaseCase(TransactionTestCase):
+    """Read replica routing test, replica alias is not replicated, so reads routed to it don't see test data"""
+    multi_db = True
+
+    def setUp(self):
+        self.CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+        self.c = self.CategoryModel.objects.create(name="Realty", is_active=True)
+        self.c1 = self.CategoryModel.objects.create(name="Flatbuy", parent=self.c, is_active=True,
+                                                    item_class='catalog_module_realty.models.FlatBuy')
+        self.item_class = CatalogItem.get_item_by_class(self.c1.item_class)
+        self.item = self.item_class.class_obj.objects.create(category=self.c1, price=11, building_type=1, room=2)
+
+    def resolve(self, path):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            p = Path(path=path)
+        return p, len(primary), len(replica)
+
+    def test_no_read_alias(self):
+        self.assertIsNone(get_read_alias(versions.CATALOG))
+        p, primary, replica = self.resolve('realty/flatbuy/')
+        self.assertEqual(p.category.pk, self.c1.pk)
+        self.assertEqual((primary, replica), (1, 0))
+
+    def test_read_alias(self):
+        with mock.patch.object(djcat_settings, 'DJCAT_READ_DB_ALIAS', 'replica'), \
+                mock.patch.object(djcat_settings, 'DJCAT_READ_STALENESS', 60):
+            # tree was just written, replica could lag behind
+            self.assertIsNone(get_read_alias(versions.CATALOG))
+            p, primary, replica = self.resolve('realty/flatbuy/')
+            self.assertEqual(p.category.pk, self.c1.pk)
+            self.assertEqual((primary, replica), (1, 0))
+            self.assertEqual(p.get_queryset().db, 'default')
+            self.assertEqual(get_read_alias(), 'replica')
+
+            with mock.patch('djcat.db.time.time', return_value=versions.bump(versions.CATALOG) + 61):
+                self.assertEqual(get_read_alias(versions.CATALOG), 'replica')
+                self.assertEqual(get_tree_queryset().db, 'replica')
+                # replica stand-in has no rows
+                p, primary, replica = self.resolve('realty/flatbuy/')
+                self.assertIsNone(p.category)
+                self.assertEqual(primary, 0)
+                self.assertGreater(replica, 0)
+
+    def test_item_read_alias(self):
+        with mock.patch.object(djcat_settings, 'DJCAT_READ_DB_ALIAS', 'replica'):
+            with mock.patch('djcat.db.time.time', return_value=versions.bump(versions.CATALOG) + 6):
+                # categories are read from replica stand-in, new item is read from primary
+                self.assertEqual(get_read_alias(versions.CATALOG), 'replica')
+                item = self.item_class.class_obj.objects.create(category=self.c1, price=12, building_type=1, room=2)
+                path = Path()
+                path.category = self.c1
+                self.assertEqual(path.get_read_db(), 'replica')
+                with CaptureQueriesContext(connections['replica']) as replica:
+                    self.assertEqual(path.get_item(item.slug, item_type='item', item_model=self.item_class.class_obj),
+                                     item)
+                self.assertEqual(len(replica), 0)
+
+    def test_listing_read_alias(self):
+        with mock.patch.object(djcat_settings, 'DJCAT_READ_DB_ALIAS', 'replica'):
+            p = Path(path='realty/flatbuy/')
+            self.assertEqual(p.get_queryset().db, 'default')
+            with mock.patch('djcat.db.time.time', return_value=versions.bump(versions.items_scope(self.c1.pk)) + 6):
+                self.assertEqual(p.get_queryset().db, 'replica')
+                self.item.price = 12
+                self.item.save()
+                self.assertEqual(p.get_queryset().db, 'default')
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_djcat
+------------
+
+Tests for `djcat` deferred tree updates.
+"""
+
+import time
+from unittest import mock
+
+from django.test import TransactionTestCase
+from django.core.management import call_command
+from django.utils.six import StringIO
+
+from django.apps import apps
+from django.conf import settings
+
+from djcat import settings as djcat_settings
+from djcat import versions
+from djcat.deferred import process_queue, get_worker, stop_worker
+from djcat.models import TreeUpdate
+
+
+class TestDeferredCase(TransactionTestCase):
+    """Deferred tree updates, queue is filled on commit, so data must be committed"""
+
+    def setUp(self):
+        self.CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+        self.c = self.CategoryModel.objects.create(name="Realty", is_active=True)
+        self.c1 = self.CategoryModel.objects.create(name="Flat", parent=self.c, is_active=True)
+        self.c2 = self.CategoryModel.objects.create(name="Flatbuy", parent=self.c1, is_active=True,
+                                                    item_class='catalog_module_realty.models.FlatBuy')
+        self.r = self.CategoryModel.objects.create(name="Auto", is_active=True)
+
+    def get(self, obj):
+        return self.CategoryModel.objects.get(pk=obj.pk)
+
+    def test_deferred(self):
+        with mock.patch.object(djcat_settings, 'DJCAT_DEFERRED_TREE_UPDATES', 'command'):
+            version = versions.get_versions(versions.tree_scope(self.c.pk))[versions.tree_scope(self.c.pk)]
+            c1 = self.get(self.c1)
+            c1.name = 'Flats'
+            c1.save()
+            c1 = self.get(self.c1)
+            c1.slug = 'flats'
+            c1.save()
+            # url paths and versions are not updated until worker runs
+            self.assertEqual(self.get(self.c1).url, 'realty/flat/')
+            self.assertEqual(versions.get_versions(versions.tree_scope(self.c.pk))[versions.tree_scope(self.c.pk)],
+                             version)
+            # duplicate roots are coalesced
+            self.assertEqual(TreeUpdate.objects.filter(root_id=self.c.pk).count(), 2)
+            self.assertEqual(process_queue(), [self.c.pk])
+            self.assertEqual(self.get(self.c1).url, 'realty/flats/')
+            self.assertNotEqual(versions.get_versions(versions.tree_scope(self.c.pk))[versions.tree_scope(self.c.pk)],
+                                version)
+            self.assertFalse(TreeUpdate.objects.exists())
+            self.assertEqual(process_queue(), [])
+
+    def test_deferred_move(self):
+        with mock.patch.object(djcat_settings, 'DJCAT_DEFERRED_TREE_UPDATES', 'command'):
+            c1 = self.get(self.c1)
+            c1.parent = self.get(self.r)
+            c1.save()
+            self.assertEqual(set(TreeUpdate.objects.values_list('root_id', flat=True)), {self.c.pk, self.r.pk})
+            out = StringIO()
+            call_command('djcat_tree_worker', once=True, stdout=out)
+            self.assertIn('Rebuilt 2 trees', out.getvalue())
+            self.assertEqual(self.get(self.c1).url, 'auto/flat/')
+            self.assertEqual(self.get(self.c2).get_ancestor_chain()[0].pk, self.r.pk)
+
+    def test_deferred_thread(self):
+        with mock.patch.object(djcat_settings, 'DJCAT_DEFERRED_TREE_UPDATES', 'thread'):
+            try:
+                c1 = self.get(self.c1)
+                c1.slug = 'flats'
+                c1.save()
+                # worker is woken up on commit
+                for x in range(50):
+                    if self.get(self.c1).url == 'realty/flats/':
+                        break
+                    time.sleep(0.1)
+                self.assertEqual(self.get(self.c1).url, 'realty/flats/')
+            finally:
+                worker = get_worker()
+                stop_worker()
+            self.assertFalse(worker.is_alive())
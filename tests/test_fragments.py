@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_djcat
+------------
+
+Tests for `djcat` fragment cache.
+"""
+
+from django.test import TransactionTestCase, RequestFactory
+from django.core.cache import cache
+from django.template import Template, Context, TemplateSyntaxError
+from django.views import View
+
+from django.apps import apps
+from django.conf import settings
+
+from djcat.path import Path
+from djcat.fragments import FragmentCacheMixin, make_fragment_key, SCOPE_CATALOG
+from djcat.register import CatalogItem
+
+
+class TestFragmentCacheCase(TransactionTestCase):
+    """djcat_cache template tag and FragmentCacheMixin test, versions are bumped on commit"""
+
+    def setUp(self):
+        cache.clear()
+        self.c = self.create_category(name="Realty", is_active=True)
+        self.c1 = self.create_category(name="Flat", parent=self.c, is_unique_in_path=True, is_active=True)
+        self.c2 = self.create_category(name="Flatbuy", parent=self.c1, is_active=True,
+                                       item_class='catalog_module_realty.models.FlatBuy')
+        self.other = self.create_category(name="Auto", is_active=True)
+        self.item_class = CatalogItem.get_item_by_class(self.c2.item_class)
+        self.item = self.item_class.class_obj.objects.create(category=self.c2, price=11, active=True,
+                                                             building_type=1, room=2)
+
+    def create_category(self, **kwargs):
+        self.CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+        c = self.CategoryModel.objects.create(**kwargs)
+        c.refresh_from_db()
+        return c
+
+    def render(self, value, path='flat/flatbuy/', options=''):
+        template = Template('{% load djcat_cache %}{% djcat_cache "listing" path ' + options + ' %}'
+                            '{{ value }}{% enddjcat_cache %}')
+        return template.render(Context({'path': Path(path=path), 'value': value}))
+
+    def test_template_tag(self):
+        self.assertEqual(self.render(1), '1')
+        self.assertEqual(self.render(2), '1')
+        self.assertEqual(self.render(2, path='flat/flatbuy/brick/'), '2')
+
+        self.other.name = 'Cars'
+        self.other.save()
+        self.assertEqual(self.render(3), '1')
+
+        self.item.price = 12
+        self.item.save()
+        self.assertEqual(self.render(4), '4')
+        self.assertEqual(self.render(5, options='scope="tree"'), '5')
+
+        self.item.price = 13
+        self.item.save()
+        self.assertEqual(self.render(6, options='scope="tree"'), '5')
+
+        self.c1.refresh_from_db()
+        self.c1.name = 'Flats'
+        self.c1.save()
+        self.assertEqual(self.render(7, path='flats/flatbuy/', options='scope="tree" timeout=60'), '7')
+
+        # not resolved path is not cached
+        self.assertEqual(self.render(8, path='unknown/'), '8')
+        self.assertEqual(self.render(9, path='unknown/'), '9')
+
+        self.assertRaises(TemplateSyntaxError, self.render, 1, options='scope="other"')
+        self.assertRaises(TemplateSyntaxError, self.render, 1, options='using="other"')
+
+    def test_canonical_key(self):
+        # paths of same page share fragment
+        self.assertEqual(self.render(1, path='flat/flatbuy/'), '1')
+        self.assertEqual(self.render(2, path='realty/flat/flatbuy/'), '1')
+        # branch fragment depends on items of descendant endpoints
+        self.assertEqual(self.render(3, path='realty/'), '3')
+        self.assertEqual(self.render(4, path='realty/'), '3')
+        self.item.price = 12
+        self.item.save()
+        self.assertEqual(self.render(5, path='realty/'), '5')
+
+    def test_catalog_scope(self):
+        key = make_fragment_key('menu', None, scope=SCOPE_CATALOG)
+        self.assertEqual(key, make_fragment_key('menu', None, scope=SCOPE_CATALOG))
+        self.other.name = 'Cars'
+        self.other.save()
+        self.assertNotEqual(key, make_fragment_key('menu', None, scope=SCOPE_CATALOG))
+
+    def test_view_mixin(self):
+        rendered = []
+
+        class CatalogView(FragmentCacheMixin, View):
+            def get(self, request, *args, **kwargs):
+                return self.get_fragment('listing', lambda: rendered.append(1) or str(len(rendered)))
+
+        factory = RequestFactory()
+        view = CatalogView.as_view()
+        self.assertEqual(view(factory.get('/flat/flatbuy/'), path='flat/flatbuy/'), '1')
+        self.assertEqual(view(factory.get('/flat/flatbuy/'), path='flat/flatbuy/'), '1')
+        self.assertEqual(view(factory.get('/flat/flatbuy/', {'a': 'rbt_2'}), path='flat/flatbuy/'), '2')
+        self.item.save()
+        self.assertEqual(view(factory.get('/flat/flatbuy/'), path='flat/flatbuy/'), '3')
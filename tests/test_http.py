@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_djcat
+------------
+
+Tests for `djcat` versions and conditional GET of catalog pages.
+"""
+
+from django.test import TransactionTestCase, Client
+from django.db import transaction
+from django.core.cache import cache
+
+from django.apps import apps
+from django.conf import settings
+
+from djcat import versions
+from djcat.path import Path
+from djcat.http import get_path_versions
+from djcat.register import CatalogItem
+
+
+class TestConditionalGetCase(TransactionTestCase):
+    """Versions and catalog_condition decorator test, versions are bumped on commit, so data must be committed"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.c = self.create_category(name="Realty", is_active=True)
+        self.c1 = self.create_category(name="Flat", parent=self.c, is_unique_in_path=True, is_active=True)
+        self.c2 = self.create_category(name="Flatbuy", parent=self.c1, is_active=True,
+                                       item_class='catalog_module_realty.models.FlatBuy')
+        self.other = self.create_category(name="Auto", is_active=True)
+        self.item_class = CatalogItem.get_item_by_class(self.c2.item_class)
+        self.item = self.item_class.class_obj.objects.create(category=self.c2, price=11, active=True,
+                                                             building_type=1, room=2)
+
+    def create_category(self, **kwargs):
+        self.CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+        c = self.CategoryModel.objects.create(**kwargs)
+        c.refresh_from_db()
+        return c
+
+    def test_versions(self):
+        scopes = [versions.tree_scope(self.c.pk), versions.tree_scope(self.other.pk), versions.items_scope(self.c2.pk)]
+        before = versions.get_versions(*scopes)
+        self.assertEqual(before, versions.get_versions(*scopes))
+
+        self.other.name = 'Cars'
+        self.other.save()
+        after = versions.get_versions(*scopes)
+        self.assertEqual(after[scopes[0]], before[scopes[0]])
+        self.assertGreater(after[scopes[1]], before[scopes[1]])
+        self.assertEqual(after[scopes[2]], before[scopes[2]])
+
+        self.item.price = 12
+        self.item.save()
+        after = versions.get_versions(*scopes)
+        self.assertGreater(after[scopes[2]], before[scopes[2]])
+        self.assertEqual(after[scopes[0]], before[scopes[0]])
+
+        # moved category changes both trees
+        before = after
+        self.c1.refresh_from_db()
+        self.other.refresh_from_db()
+        self.c1.parent = self.other
+        self.c1.save()
+        after = versions.get_versions(*scopes)
+        self.assertGreater(after[scopes[0]], before[scopes[0]])
+        self.assertGreater(after[scopes[1]], before[scopes[1]])
+
+    def test_versions_rollback(self):
+        scopes = [versions.CATALOG, versions.tree_scope(self.other.pk), versions.items_scope(self.c2.pk)]
+        before = versions.get_versions(*scopes)
+        with self.assertRaises(ValueError), transaction.atomic():
+            self.other.name = 'Cars'
+            self.other.save()
+            self.item.price = 12
+            self.item.save()
+            raise ValueError
+        self.assertEqual(versions.get_versions(*scopes), before)
+
+    def test_path_versions(self):
+        path_versions = get_path_versions(Path(path=self.item.get_url()))
+        self.assertEqual(sorted(path_versions), [versions.items_scope(self.c2.pk), versions.tree_scope(self.c.pk)])
+        self.assertEqual(get_path_versions(Path(path='notfound/')), {})
+
+    def test_branch_versions(self):
+        # branch page lists and counts items of descendant endpoints
+        etag = self.client.get('/realty/')['ETag']
+        self.assertEqual(self.client.get('/realty/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.item.price = 12
+        self.item.save()
+        self.assertEqual(self.client.get('/realty/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        etag = self.client.get('/realty/')['ETag']
+        self.item.active = False
+        self.item.save()
+        self.assertEqual(self.client.get('/realty/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_conditional_get(self):
+        response = self.client.get('/flat/flatbuy/?a=pr_f1-t50')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/flat/flatbuy/?a=pr_f1-t50', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # other query, other page
+        response = self.client.get('/flat/flatbuy/?a=pr_f1-t50&q=1', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        # change in other tree
+        self.other.save()
+        response = self.client.get('/flat/flatbuy/?a=pr_f1-t50', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # item of category changed
+        self.item.save()
+        response = self.client.get('/flat/flatbuy/?a=pr_f1-t50', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        # category of tree changed
+        self.c.refresh_from_db()
+        self.c.save()
+        response = self.client.get('/flat/flatbuy/?a=pr_f1-t50', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get('/notfound/')
+        self.assertFalse(response.has_header('ETag'))
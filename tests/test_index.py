@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_djcat
+------------
+
+Tests for `djcat` category index.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock, skipIf
+from contextlib import contextmanager
+
+from django.test import TestCase, TransactionTestCase
+from django.core.management import call_command
+from django.core.cache import cache
+
+from django.apps import apps
+from django.conf import settings
+
+from djcat import settings as djcat_settings
+from djcat import versions
+from djcat import index as djcat_index
+from djcat.index import CategoryIndex, get_category_index, load_category_index, path_hash, snapshot_lock
+from djcat.exceptions import *
+
+
+class TestCategoryIndexCase(TransactionTestCase):
+    """Compact category index test, versions are bumped on commit"""
+
+    def setUp(self):
+        cache.clear()
+        # roots are created in name order, so sibling order is the same for MPTT and materialized path trees
+        self.other = self.create_category(name="Auto", is_active=True)
+        self.c = self.create_category(name="Realty", is_active=True)
+        self.c1 = self.create_category(name="Flat", parent=self.c, is_unique_in_path=True, is_active=True)
+        self.c2 = self.create_category(name="Flatbuy", parent=self.c1, is_active=True,
+                                       item_class='catalog_module_realty.models.FlatBuy')
+        self.c3 = self.create_category(name="Room", parent=self.c, is_active=False)
+
+    def create_category(self, **kwargs):
+        self.CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+        c = self.CategoryModel.objects.create(**kwargs)
+        c.refresh_from_db()
+        return c
+
+    def test_build(self):
+        with self.assertNumQueries(1):
+            index = CategoryIndex.build()
+        self.assertEqual(len(index), 5)
+        self.assertEqual([n.name for n in index], ['Auto', 'Realty', 'Flat', 'Flatbuy', 'Room'])
+        self.assertEqual([n.name for n in index.get_roots()], ['Auto', 'Realty'])
+
+        with self.assertNumQueries(0):
+            node = index.get(self.c2.pk)
+            self.assertEqual((node.pk, node.slug, node.level, node.item_class),
+                             (self.c2.pk, 'flatbuy', 2, 'catalog_module_realty.models.FlatBuy'))
+            self.assertTrue(node.is_active and node.is_endpoint and node.is_unique_in_path)
+            self.assertEqual(node.url, self.c2.url)
+            self.assertEqual([n.pk for n in node.get_ancestors()], [self.c.pk, self.c1.pk])
+            self.assertEqual(node.get_url_paths(), self.c2.get_url_paths())
+
+            root = index.get(self.c.pk)
+            self.assertEqual([n.name for n in root.get_children()], ['Flat', 'Room'])
+            self.assertEqual([n.name for n in root.get_descendants()], ['Flat', 'Flatbuy', 'Room'])
+            self.assertTrue(node.is_descendant_of(root))
+            self.assertFalse(root.is_descendant_of(node))
+            self.assertFalse(index.get(self.c3.pk).is_active)
+            self.assertIsNone(root.parent)
+            self.assertIsNone(index.get(0))
+
+    def test_lookups(self):
+        index = CategoryIndex.build()
+        with self.assertNumQueries(0):
+            self.assertEqual(index.get_by_slug('flatbuy').pk, self.c2.pk)
+            self.assertIsNone(index.get_by_slug('unknown'))
+            for path in ('realty/flat/flatbuy', '/flat/flatbuy/', 'flat'):
+                self.assertIsNotNone(index.get_by_path(path), path)
+            self.assertEqual(index.get_by_path('flat/flatbuy').pk, self.c2.pk)
+            self.assertEqual(index.get_by_path('realty/room').pk, self.c3.pk)
+            self.assertIsNone(index.get_by_path('flatbuy'))
+            self.assertIsNone(index.get_by_path('room'))
+        self.assertNotEqual(path_hash('flat'), path_hash('flatbuy'))
+
+        index = CategoryIndex.build(self.CategoryModel.objects.filter(is_active=True))
+        self.assertEqual([n.name for n in index], ['Auto', 'Realty', 'Flat', 'Flatbuy'])
+
+    def test_get_category_index(self):
+        index = get_category_index()
+        with self.assertNumQueries(0):
+            self.assertIs(get_category_index(), index)
+        other = self.CategoryModel.objects.get(pk=self.other.pk)
+        other.name = 'Cars'
+        other.save()
+        index = get_category_index()
+        self.assertEqual(index.get(self.other.pk).name, 'Cars')
+
+
+class TestIndexSnapshotCase(TestCase):
+    """Memory mapped category index snapshot test"""
+
+    def setUp(self):
+        cache.clear()
+        self.CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+        self.c = self.CategoryModel.objects.create(name="Realty", is_active=True)
+        self.c1 = self.CategoryModel.objects.create(name="Квартиры", parent=self.c, is_unique_in_path=True,
+                                                    is_active=True)
+        self.c2 = self.CategoryModel.objects.create(name="Flatbuy", parent=self.c1, is_active=True,
+                                                    item_class='catalog_module_realty.models.FlatBuy')
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'index.bin')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_snapshot(self):
+        built = CategoryIndex.build()
+        built.version = 1.5
+        built.write_snapshot(self.path)
+        with self.assertNumQueries(0):
+            index = CategoryIndex.load_snapshot(self.path)
+        self.assertEqual(index.version, 1.5)
+        self.assertEqual(len(index), 3)
+        self.assertEqual(list(index.pks), list(built.pks))
+        self.assertEqual(list(index.names), ['Realty', 'Квартиры', 'Flatbuy'])
+        node = index.get_by_path('kvartiry/flatbuy')
+        self.assertEqual((node.pk, node.slug, node.item_class, node.url),
+                         (self.c2.pk, 'flatbuy', 'catalog_module_realty.models.FlatBuy', 'kvartiry/flatbuy/'))
+        self.assertEqual(index.get_by_slug('realty').get_descendants(), [index.get(self.c1.pk), node])
+        self.assertIsNone(index.get(self.c.pk).item_class)
+
+        # file is replaced, loaded index keeps reading old one
+        built.version = 2.5
+        built.write_snapshot(self.path)
+        self.assertEqual(index.get(self.c2.pk).name, 'Flatbuy')
+        self.assertEqual(CategoryIndex.load_snapshot(self.path).version, 2.5)
+        self.assertEqual(os.listdir(self.dir), ['index.bin'])
+
+        with open(self.path, 'r+b') as f:
+            f.write(b'BROKEN')
+        self.assertRaises(IndexSnapshotNotValid, CategoryIndex.load_snapshot, self.path)
+        open(self.path, 'w').close()
+        self.assertRaises(IndexSnapshotNotValid, CategoryIndex.load_snapshot, self.path)
+
+    def test_load_category_index(self):
+        index = load_category_index(1.5, snapshot=self.path)
+        self.assertEqual(index.version, 1.5)
+        self.assertIsInstance(index.pks, memoryview)
+        with self.assertNumQueries(0):
+            self.assertEqual(load_category_index(1.5, snapshot=self.path).get_by_slug('flatbuy').pk, self.c2.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(load_category_index(2.5, snapshot=self.path).version, 2.5)
+
+        with mock.patch.object(djcat_settings, 'DJCAT_INDEX_SNAPSHOT', self.path):
+            index = get_category_index()
+            self.assertEqual(index.version, versions.get_versions(versions.CATALOG)[versions.CATALOG])
+            self.assertEqual(CategoryIndex.load_snapshot(self.path).version, index.version)
+
+    def test_load_waits_for_writer(self):
+        """Process that waited for snapshot lock loads snapshot written by lock holder instead of building"""
+        built = CategoryIndex.build()
+        built.version = 3.5
+
+        @contextmanager
+        def written_while_waiting(path):
+            built.write_snapshot(path)
+            yield
+
+        with mock.patch.object(djcat_index, 'snapshot_lock', written_while_waiting):
+            with self.assertNumQueries(0):
+                index = load_category_index(3.5, snapshot=self.path)
+        self.assertIsInstance(index.pks, memoryview)
+        self.assertEqual(index.version, 3.5)
+
+    @skipIf(djcat_index.fcntl is None, 'fcntl is not available')
+    def test_snapshot_lock(self):
+        """Snapshot lock is exclusive"""
+        acquired = threading.Event()
+
+        def worker():
+            with snapshot_lock(self.path):
+                acquired.set()
+
+        with snapshot_lock(self.path):
+            thread = threading.Thread(target=worker)
+            thread.start()
+            self.assertFalse(acquired.wait(0.2))
+        self.assertTrue(acquired.wait(5))
+        thread.join()
+
+    def test_command(self):
+        out = StringIO()
+        call_command('djcat_write_index', '--output', self.path, stdout=out)
+        self.assertIn('Done: 3 categories', out.getvalue())
+        self.assertEqual(len(CategoryIndex.load_snapshot(self.path)), 3)
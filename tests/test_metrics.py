@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_djcat
+------------
+
+Tests for `djcat` metrics hooks.
+"""
+
+from django.test import TestCase
+
+from django.apps import apps
+from django.conf import settings
+
+from djcat.path import Path
+from djcat.register import CatalogItem
+from djcat.metrics import metrics, metric, MetricsRecorder, KIND_TIMING, KIND_COUNTER
+
+
+class TestMetricsCase(TestCase):
+    """Metrics test"""
+
+    def setUp(self):
+        self.c = self.create_category(name="Realty", is_active=True)
+        self.c1 = self.create_category(name="Flat", parent=self.c, is_unique_in_path=True, is_active=True)
+        self.c2 = self.create_category(name="Flatbuy", parent=self.c1, is_active=True,
+                                       item_class='catalog_module_realty.models.FlatBuy')
+        self.item_class = CatalogItem.get_item_by_class(self.c2.item_class)
+        self.item = self.item_class.class_obj.objects.create(category=self.c2, price=11, building_type=1, room=2)
+        self.recorder = MetricsRecorder()
+        metrics.configure(enabled=True, callback=self.recorder)
+
+    def tearDown(self):
+        metrics.configure(enabled=False)
+        metrics.callback = None
+
+    def create_category(self, **kwargs):
+        self.CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+        c = self.CategoryModel.objects.create(**kwargs)
+        c.refresh_from_db()
+        return c
+
+    def test_disabled(self):
+        metrics.configure(enabled=False)
+        Path(path='flat/flatbuy/brick/', query='a=pr_f100-t500')
+        self.c2.save()
+        self.assertEqual(self.recorder.records, [])
+
+    def test_path(self):
+        Path(path='flat/flatbuy/brick/', query='a=pr_f100-t500')
+        summary = self.recorder.summary()
+        self.assertEqual(summary['path.resolve']['kind'], KIND_TIMING)
+        self.assertEqual(summary['path.resolve']['count'], 1)
+        self.assertEqual(summary['path.parse_query']['count'], 1)
+        self.assertEqual(summary['path.db_lookup']['count'], 1)
+        self.assertEqual(summary['path.db_lookups']['kind'], KIND_COUNTER)
+        self.assertEqual(self.recorder.values('path.db_lookups'), [1])
+
+        self.recorder.clear()
+        Path(path=self.item.get_url())
+        self.assertEqual(self.recorder.values('path.db_lookups'), [2])
+
+        self.recorder.clear()
+        Path(path='/notfound/')
+        # category lookup and redirect lookup
+        self.assertEqual(self.recorder.values('path.db_lookups'), [2])
+        self.assertEqual(len(self.recorder.values('path.resolve')), 1)
+
+    def test_post_request(self):
+        path = Path(post_dict={'category': str(self.c2.pk), 'page': '2'})
+        self.assertEqual(path.url_full, 'flat/flatbuy/?page=2')
+        summary = self.recorder.summary()
+        self.assertEqual(summary['path.parse_post_request']['count'], 1)
+        self.assertEqual(summary['path.build_url']['count'], 1)
+        self.assertNotIn('path.resolve', summary)
+
+    def test_signal(self):
+        received = []
+
+        def receiver(sender, name, kind, value, tags, **kwargs):
+            received.append((name, kind, value, tags))
+
+        metric.connect(receiver)
+        try:
+            self.c1.slug = 'flats'
+            self.c1.save()
+        finally:
+            metric.disconnect(receiver)
+        names = [r[0] for r in received]
+        self.assertIn('tree.update', names)
+        rows = {(r[3]['table'], r[3].get('field')): r[2] for r in received if r[0] == 'tree.rows'}
+        self.assertEqual(rows[('category', 'url')], 2)
+        self.assertEqual(rows[('category_path', None)], 8)
+        self.assertEqual(rows[('item', 'url')], 1)
+        self.assertEqual(received, self.recorder.records)
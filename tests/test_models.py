@@ -9,13 +9,18 @@ Tests for `djcat` models module.
 """
 
 from django.test import TestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from django.apps import apps
 from django.conf import settings
 
+from djcat.models import CategoryPath, Breadcrumb, prefetch_categories
 from djcat.register import CatalogItem
 from djcat.exceptions import *
 
+from catalog.models import BaseAd
+
 
 class TestCategoryCase(TestCase):
 
@@ -92,6 +97,58 @@ class TestCategoryCase(TestCase):
         self.assertEqual(c3.get_url_paths(),
                          {'full': ['testnew', 'test1', 'test2', 'test3'], 'unique': ['test1', 'test3']})
 
+    def test_stored_paths(self):
+        """Categories paths rows test"""
+
+        c = self.create_instance(name="test")
+        c1 = self.create_instance(name="test1", parent=c, is_unique_in_path=True)
+        c2 = self.create_instance(name="test2", parent=c1)
+        rows = sorted(CategoryPath.objects.values_list('category_id', 'kind', 'path'))
+        self.assertEqual(rows, [(c.pk, 'full', 'test'), (c1.pk, 'full', 'test/test1'), (c1.pk, 'unique', 'test1'),
+                                (c2.pk, 'full', 'test/test1/test2')])
+
+        cn = self.create_instance(name="test new")
+        c1.refresh_from_db()
+        c1.parent = cn
+        c1.save()
+        rows = sorted(CategoryPath.objects.values_list('category_id', 'kind', 'path'))
+        self.assertEqual(rows, [(c.pk, 'full', 'test'), (c1.pk, 'full', 'testnew/test1'), (c1.pk, 'unique', 'test1'),
+                                (c2.pk, 'full', 'testnew/test1/test2'), (cn.pk, 'full', 'testnew')])
+
+    def test_breadcrumbs(self):
+        """Categories ancestor chains and breadcrumbs test"""
+
+        c = self.create_instance(name="test")
+        c1 = self.create_instance(name="test1", parent=c, is_unique_in_path=True)
+        c2 = self.create_instance(name="test2", parent=c1)
+        c2 = self.CategoryModel.objects.get(pk=c2.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(c2.get_breadcrumbs(), [Breadcrumb('test', 'test/'), Breadcrumb('test1', 'test1/'),
+                                                    Breadcrumb('test2', 'test/test1/test2/')])
+            self.assertEqual(c2.get_root_pk(), c.pk)
+            self.assertEqual(c2.get_url_paths(), {'full': ['test', 'test1', 'test2'], 'unique': ['test1']})
+            self.assertEqual(c.get_ancestor_chain(), [])
+
+        c1.refresh_from_db()
+        c1.name = 'renamed'
+        c1.slug = 'renamed'
+        c1.save()
+        cn = self.create_instance(name="test new")
+        c.refresh_from_db()
+        c.parent = cn
+        c.save()
+        c2.refresh_from_db()
+        self.assertEqual(c2.get_breadcrumbs(), [Breadcrumb('test new', 'testnew/'),
+                                                Breadcrumb('test', 'testnew/test/'),
+                                                Breadcrumb('renamed', 'renamed/'),
+                                                Breadcrumb('test2', 'testnew/test/renamed/test2/')])
+        self.assertEqual(c2.get_root_pk(), cn.pk)
+
+        # chain not computed yet is queried from tree
+        self.CategoryModel.objects.filter(pk=c2.pk).update(ancestors='')
+        c2.refresh_from_db()
+        self.assertEqual([a.pk for a in c2.get_ancestor_chain()], [cn.pk, c.pk, c1.pk])
+
     def test_endpoint_as_parent(self):
         c = self.create_instance(name='endpoint', item_class='itemc')
         self.assertRaises(CategoryInheritanceError, self.create_instance, name='fail', parent=c)
@@ -136,3 +193,178 @@ class TestItemCase(TestCase):
                                                    building_type=1, room=2)
         self.assertTrue(isinstance(item, item_class.class_obj))
 
+    def test_urls(self):
+        c = self.create_category(name="Realty", is_active=True)
+        c1 = self.create_category(name="Flat", parent=c, is_unique_in_path=True, is_active=True)
+        c2 = self.create_category(name="Flatbuy", parent=c1, is_active=True,
+                                  item_class='catalog_module_realty.models.FlatBuy')
+        c3 = self.create_category(name="Brick houses", parent=c1, is_active=True)
+        self.assertEqual(c.url, 'realty/')
+        self.assertEqual(c1.get_url(), 'flat/')
+        self.assertEqual(c2.get_url(), 'flat/flatbuy/')
+        self.assertEqual(c3.get_url(), 'realty/flat/brickhouses/')
+
+        item_class = CatalogItem.get_item_by_class(c2.item_class)
+        item = item_class.class_obj.objects.create(category=c2, price=11, building_type=1, room=2)
+        self.assertEqual(item.get_url(), 'flat/flatbuy/{}/'.format(item.slug))
+
+        items = list(item_class.class_obj.objects.all())
+        with self.assertNumQueries(0):
+            self.assertEqual([i.get_url() for i in items], [item.url])
+
+        # rename endpoint and change its path, items urls must follow
+        c2.refresh_from_db()
+        c2.slug = 'buy'
+        c2.save()
+        item.refresh_from_db()
+        self.assertEqual(item.get_url(), 'flat/buy/{}/'.format(item.slug))
+        c1.refresh_from_db()
+        c1.is_unique_in_path = False
+        c1.save()
+        item.refresh_from_db()
+        self.assertEqual(item.get_url(), 'buy/{}/'.format(item.slug))
+
+    def test_item_count(self):
+        c = self.create_category(name="Realty", is_active=True)
+        c1 = self.create_category(name="Flat", parent=c, is_unique_in_path=True, is_active=True)
+        c2 = self.create_category(name="Flatbuy", parent=c1, is_active=True,
+                                  item_class='catalog_module_realty.models.FlatBuy')
+        other = self.create_category(name="Other", is_active=True)
+        c3 = self.create_category(name="Flatsell", parent=other, is_active=True,
+                                  item_class='catalog_module_realty.models.FlatBuy')
+        item_class = CatalogItem.get_item_by_class(c2.item_class)
+
+        def counts():
+            return dict(self.CategoryModel.objects.values_list('name', 'item_count'))
+
+        item = item_class.class_obj.objects.create(category=c2, price=11, active=True, building_type=1, room=2)
+        item_class.class_obj.objects.create(category=c2, price=12, building_type=1, room=2)
+        self.assertEqual(counts(), {'Realty': 1, 'Flat': 1, 'Flatbuy': 1, 'Other': 0, 'Flatsell': 0})
+
+        # activation and deactivation of loaded item
+        inactive = item_class.class_obj.objects.get(active=False)
+        inactive.active = True
+        inactive.save()
+        self.assertEqual(counts()['Realty'], 2)
+        inactive.active = False
+        inactive.save()
+        inactive.save()
+        self.assertEqual(counts()['Realty'], 1)
+
+        # item moved to another category
+        item.category = c3
+        item.save()
+        self.assertEqual(counts(), {'Realty': 0, 'Flat': 0, 'Flatbuy': 0, 'Other': 1, 'Flatsell': 1})
+
+        # category with items moved to another tree, count loaded earlier must not overwrite stored one
+        item_class.class_obj.objects.create(category=c2, price=13, active=True, building_type=1, room=2)
+        other.refresh_from_db()
+        c2.refresh_from_db()
+        c2.item_count = 0
+        c2.parent = other
+        c2.save()
+        self.assertEqual(counts(), {'Realty': 0, 'Flat': 0, 'Flatbuy': 1, 'Other': 2, 'Flatsell': 1})
+
+        # instance and queryset delete
+        item.delete()
+        self.assertEqual(counts()['Other'], 1)
+        item_class.class_obj.objects.all().delete()
+        self.assertEqual(set(counts().values()), {0})
+
+    def test_item_count_delete(self):
+        c = self.create_category(name="Realty", is_active=True)
+        c1 = self.create_category(name="Flat", parent=c, is_active=True)
+        c2 = self.create_category(name="Flatbuy", parent=c1, is_active=True,
+                                  item_class='catalog_module_realty.models.FlatBuy')
+        c3 = self.create_category(name="Flatsell", parent=c1, is_active=True,
+                                  item_class='catalog_module_realty.models.FlatBuy')
+        item_class = CatalogItem.get_item_by_class(c2.item_class)
+
+        def counts():
+            return dict(self.CategoryModel.objects.values_list('name', 'item_count'))
+
+        def create(category, number):
+            for x in range(number):
+                item_class.class_obj.objects.create(category=category, price=x, active=bool(x % 3),
+                                                    building_type=1, room=2)
+
+        def delete_queries(category):
+            with CaptureQueriesContext(connection) as queries:
+                item_class.class_obj.objects.filter(object_id=category.pk).delete()
+            return len(queries)
+
+        # queryset delete costs the same number of queries whatever the number of items
+        create(c2, 2)
+        create(c3, 9)
+        self.assertEqual(counts(), {'Realty': 7, 'Flat': 7, 'Flatbuy': 1, 'Flatsell': 6})
+        self.assertEqual(delete_queries(c2), delete_queries(c3))
+        self.assertEqual(set(counts().values()), {0})
+
+        # deleted category items are taken out of ancestors counts, with descendants deleted in any order
+        create(c2, 2)
+        create(c3, 3)
+        self.assertEqual(counts()['Realty'], 3)
+        c2.refresh_from_db()
+        c2.delete()
+        self.assertEqual(counts(), {'Realty': 2, 'Flat': 2, 'Flatsell': 2})
+        c1.refresh_from_db()
+        c1.delete()
+        self.assertEqual(counts(), {'Realty': 0})
+
+    def test_recount_items(self):
+        c = self.create_category(name="Realty", is_active=True)
+        c1 = self.create_category(name="Flatbuy", parent=c, is_active=True,
+                                  item_class='catalog_module_realty.models.FlatBuy')
+        item_class = CatalogItem.get_item_by_class(c1.item_class)
+        for x in range(3):
+            item_class.class_obj.objects.create(category=c1, price=x, active=bool(x), building_type=1, room=2)
+        self.assertEqual(self.CategoryModel.objects.recount_items(), [])
+
+        self.CategoryModel.objects.filter(pk=c.pk).update(item_count=10)
+        self.assertEqual(self.CategoryModel.objects.recount_items(write=False), [(c.pk, 10, 2)])
+        self.assertEqual(self.CategoryModel.objects.recount_items(), [(c.pk, 10, 2)])
+        c.refresh_from_db()
+        self.assertEqual(c.item_count, 2)
+
+    def test_prefetch_categories(self):
+        c = self.create_category(name="Realty", is_active=True)
+        c1 = self.create_category(name="Flatbuy", parent=c, is_active=True,
+                                  item_class='catalog_module_realty.models.FlatBuy')
+        c2 = self.create_category(name="Flatsell", parent=c, is_active=True,
+                                  item_class='catalog_module_realty.models.FlatBuy')
+        item_class = CatalogItem.get_item_by_class(c1.item_class)
+        for category in (c1, c2, c2):
+            item_class.class_obj.objects.create(category=category, price=1, active=True, building_type=1, room=2)
+
+        with self.assertNumQueries(2):
+            items = list(item_class.class_obj.objects.with_categories())
+        with self.assertNumQueries(0):
+            self.assertEqual([i.category.name for i in items], ['Flatbuy', 'Flatsell', 'Flatsell'])
+
+        # items of different classes
+        items = list(item_class.class_obj.objects.all()) + list(BaseAd.objects.all())
+        with self.assertNumQueries(1):
+            self.assertEqual(prefetch_categories(items), items)
+        with self.assertNumQueries(0):
+            self.assertEqual([i.category.pk for i in items], [c1.pk, c2.pk, c2.pk] * 2)
+
+    def test_indexes(self):
+        self.CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+        item_class = CatalogItem.get_item_by_class('catalog_module_realty.models.FlatBuy').class_obj
+
+        def indexes(model):
+            with connection.cursor() as cursor:
+                constraints = connection.introspection.get_constraints(cursor, model._meta.db_table)
+            return {tuple(c['columns']): c['unique'] for c in constraints.values() if c['index'] or c['unique']}
+
+        category = indexes(self.CategoryModel)
+        self.assertTrue(category[('slug',)])
+        self.assertIn(('item_class',), category)
+        item = indexes(BaseAd)
+        self.assertTrue(item[('slug',)])
+        self.assertTrue(item[('uid',)])
+        self.assertIn(('content_type_id', 'object_id', 'active'), item)
+        self.assertIn(('price',), item)
+        flat = indexes(item_class)
+        self.assertIn(('building_type',), flat)
+        self.assertNotIn(('content_type_id', 'object_id', 'active'), flat)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_djcat
+------------
+
+Tests for `djcat` navigation tree.
+"""
+
+import gzip
+import json
+
+from django.test import TransactionTestCase, Client
+from django.core.cache import cache
+
+from django.apps import apps
+from django.conf import settings
+
+from djcat.navigation import get_snapshot, build_tree
+from djcat.register import CatalogItem
+
+
+class TestNavigationCase(TransactionTestCase):
+    """Navigation tree snapshots, diffs and view test, versions are bumped on commit"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        # roots are created in name order, so sibling order is the same for MPTT and materialized path trees
+        self.other = self.create_category(name="Auto", is_active=True)
+        self.c = self.create_category(name="Realty", is_active=True)
+        self.c1 = self.create_category(name="Flat", parent=self.c, is_unique_in_path=True, is_active=True)
+        self.c2 = self.create_category(name="Flatbuy", parent=self.c1, is_active=True,
+                                       item_class='catalog_module_realty.models.FlatBuy')
+        self.hidden = self.create_category(name="Cars", parent=self.other, is_active=False)
+        self.item_class = CatalogItem.get_item_by_class(self.c2.item_class)
+        self.item = self.item_class.class_obj.objects.create(category=self.c2, price=11, active=True,
+                                                             building_type=1, room=2)
+
+    def create_category(self, **kwargs):
+        self.CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+        c = self.CategoryModel.objects.create(**kwargs)
+        c.refresh_from_db()
+        return c
+
+    def get(self, **kwargs):
+        response = self.client.get('/djcat/navigation/', **kwargs)
+        content = response.content
+        if response.get('Content-Encoding') == 'gzip':
+            content = gzip.decompress(content)
+        return response, json.loads(content.decode('utf-8')) if content else None
+
+    def test_build_tree(self):
+        with self.assertNumQueries(1):
+            tree = build_tree()
+        self.assertEqual([n['name'] for n in tree], ['Auto', 'Realty'])
+        self.assertEqual(tree[0]['children'], [])
+        flatbuy = tree[1]['children'][0]['children'][0]
+        self.assertEqual(flatbuy, {'id': self.c2.pk, 'name': 'Flatbuy', 'url': '/flat/flatbuy/', 'count': 1,
+                                   'children': []})
+
+    def test_snapshot(self):
+        snapshot = get_snapshot()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_snapshot().etag, snapshot.etag)
+        self.item.active = False
+        self.item.save()
+        changed = get_snapshot()
+        self.assertNotEqual(changed.etag, snapshot.etag)
+        self.assertEqual(changed.tree[1]['count'], 0)
+
+    def test_view(self):
+        response, data = self.get()
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(etag, '"{}"'.format(data['etag']))
+        self.assertEqual([n['name'] for n in data['tree']], ['Auto', 'Realty'])
+
+        response, data = self.get(HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['ETag'], etag)
+
+        with self.assertNumQueries(0):
+            response, data = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_diff(self):
+        since = get_snapshot().etag
+        # fresh instances, cached parents of refreshed ones have outdated tree fields
+        c1 = self.CategoryModel.objects.get(pk=self.c1.pk)
+        c1.name = 'Flats'
+        c1.save()
+        other = self.CategoryModel.objects.get(pk=self.other.pk)
+        other.is_active = False
+        other.save()
+
+        response, data = self.get(data={'since': since})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['since'], since)
+        self.assertEqual(data['removed'], [self.other.pk])
+        self.assertEqual([(n['id'], n['name'], n['parent'], n['position']) for n in data['changed']],
+                         [(self.c.pk, 'Realty', None, 0), (self.c1.pk, 'Flats', self.c.pk, 0)])
+        self.assertEqual(response['ETag'], '"{}"'.format(data['etag']))
+
+        response, data = self.get(data={'since': 'unknown'})
+        self.assertEqual([n['name'] for n in data['tree']], ['Realty'])
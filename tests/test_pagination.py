@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_djcat
+------------
+
+Tests for `djcat` keyset pagination.
+"""
+
+from django.test import TestCase
+
+from django.apps import apps
+from django.conf import settings
+
+from djcat.path import Path
+from djcat.pagination import KeysetPaginator
+from djcat.register import CatalogItem
+from djcat.exceptions import *
+
+
+class TestPaginationCase(TestCase):
+    """Keyset pagination test"""
+
+    def setUp(self):
+        self.c = self.create_category(name="Realty", is_active=True)
+        self.c1 = self.create_category(name="Flat", parent=self.c, is_unique_in_path=True, is_active=True)
+        self.c2 = self.create_category(name="Flatbuy", parent=self.c1, is_active=True,
+                                       item_class='catalog_module_realty.models.FlatBuy')
+        self.item_class = CatalogItem.get_item_by_class(self.c2.item_class)
+        self.items = []
+        for x, price in enumerate([300, 100, 300, 200, 500, 100, 400, 300, 700]):
+            self.items.append(self.item_class.class_obj.objects.create(
+                category=self.c2, price=price, active=True, building_type=1 + x % 2, room=2))
+        self.item_class.class_obj.objects.create(category=self.c2, price=1, active=False, building_type=1, room=2)
+
+    def create_category(self, **kwargs):
+        self.CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+        c = self.CategoryModel.objects.create(**kwargs)
+        c.refresh_from_db()
+        return c
+
+    def walk(self, paginator):
+        """Walk pages forward then back, return pks of pages"""
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            with self.assertNumQueries(1):
+                pages.append(paginator.page(pages[-1].next_cursor))
+        back = [pages[-1]]
+        while back[-1].has_previous():
+            back.append(paginator.page(back[-1].previous_cursor))
+        self.assertEqual([[i.pk for i in p] for p in back[::-1]], [[i.pk for i in p] for p in pages])
+        return [[i.pk for i in p] for p in pages]
+
+    def test_paginator(self):
+        qs = self.item_class.class_obj.objects.filter(active=True)
+        expected = list(qs.order_by('price', 'pk').values_list('pk', flat=True))
+        pages = self.walk(KeysetPaginator(qs, ordering=('price',), per_page=2))
+        self.assertEqual(len(pages), 5)
+        self.assertEqual(sum(pages, []), expected)
+
+        expected = list(qs.order_by('-price', 'pk').values_list('pk', flat=True))
+        pages = self.walk(KeysetPaginator(qs, ordering=('-price', 'pk'), per_page=4))
+        self.assertEqual(sum(pages, []), expected)
+
+        page = KeysetPaginator(qs, per_page=20).page()
+        self.assertEqual([i.pk for i in page], [i.pk for i in reversed(self.items)])
+        self.assertFalse(page.has_next() or page.has_previous())
+
+    def test_cursor_not_valid(self):
+        paginator = KeysetPaginator(self.item_class.class_obj.objects.all(), ordering=('price',), per_page=2)
+        for cursor in ('bad', 'WyJuIl0', paginator.page().next_cursor[:-3]):
+            self.assertRaises(PageCursorNotValid, paginator.page, cursor)
+
+    def test_path_page(self):
+        path = Path(path='flat/flatbuy/brick/', query='a=pr_f200-t500')
+        self.assertEqual(sorted(path.get_queryset().values_list('price', flat=True)), [300, 300, 400, 500])
+
+        page = path.get_page(ordering=('price',), per_page=3)
+        self.assertEqual([i.price for i in page], [300, 300, 400])
+        url = path.get_page_url(page.next_cursor)
+        self.assertTrue(url.startswith('flat/flatbuy/brick/?'))
+        self.assertIn('a=pr_f200-t500', url)
+        self.assertIn('c={}'.format(page.next_cursor), url)
+
+        path = Path(path='flat/flatbuy/brick/', query='a=pr_f200-t500', cursor=page.next_cursor)
+        self.assertEqual([i.price for i in path.get_page(ordering=('price',), per_page=3)], [500])
+
+        self.assertEqual(Path(path='flat/flatbuy/', query='rbt_2').get_queryset().count(), 4)
+        self.assertIsNone(Path(path='realty/').get_queryset())
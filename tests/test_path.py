@@ -14,6 +14,7 @@ from django.apps import apps
 from django.conf import settings
 
 from djcat.path import Path
+from djcat.models import CategoryRedirect
 from djcat.register import CatalogItem
 from djcat.exceptions import *
 
@@ -59,6 +60,27 @@ class TestPathCase(TestCase):
         path = Path(path='flatbuy')
         self.assertEqual(path.category, self.c2)
 
+    def test_resolve_single_lookup(self):
+        """Test category path is resolved with one query"""
+
+        with self.assertNumQueries(1):
+            self.assertEqual(Path(path='/realty/flat/flatbuy/').category, self.c2)
+        with self.assertNumQueries(1):
+            self.assertEqual(Path(path='flat/flatbuy/brick/1roomed').category, self.c2)
+        # category slug can clash with choices slugs, so such paths are looked up too, then their redirects
+        with self.assertNumQueries(2):
+            self.assertEqual(Path(path='brick/1roomed').category, None)
+
+    def test_resolve_category_clashing_with_choices(self):
+        """Test category whose slug is choices slug of other item class"""
+        brick = self.create_category(name="Brick", parent=self.c, is_active=True)
+        self.assertEqual(brick.slug, 'brick')
+        with self.assertNumQueries(1):
+            self.assertEqual(Path(path='realty/brick/').category, brick)
+        # attributes slugs are peeled off the end only
+        self.assertEqual(Path(path='realty/flat/flatbuy/brick/').category, self.c2)
+        self.assertEqual(Path(path='realty/brick/flat/flatbuy/').category, None)
+
     def test_resolve_category_and_attrs(self):
         """Test path resolver with category and  path attributes"""
 
@@ -79,10 +101,67 @@ class TestPathCase(TestCase):
 
     def test_resolve_item_instance(self):
         """Test path resolver with item"""
-        path = Path(path='flat/flatbuy/'+self.item.slug)
+        path = Path(path='flat/flatbuy/' + self.item.slug)
         self.assertEqual(path.category, self.c2)
         self.assertEqual(path.item, self.item)
 
+    def test_breadcrumbs(self):
+        """Test breadcrumbs of resolved path cost no queries"""
+        path = Path(path='flat/flatbuy/' + self.item.slug)
+        with self.assertNumQueries(0):
+            self.assertEqual([b.url for b in path.get_breadcrumbs()],
+                             ['realty/', 'flat/', 'flat/flatbuy/', self.item.get_url()])
+            self.assertEqual(path.get_root_pk(), self.c.pk)
+        self.assertEqual([b.name for b in Path(path='flat/flatbuy/brick').get_breadcrumbs()],
+                         ['Realty', 'Flat', 'Flatbuy'])
+        self.assertEqual(Path(path='unknown').get_breadcrumbs(), [])
+        item = self.item.__class__.objects.get(pk=self.item.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(item.get_breadcrumbs(), path.get_breadcrumbs())
+        with self.assertNumQueries(0):
+            item.get_breadcrumbs()
+
+    def test_redirects(self):
+        """Test stale paths resolve to redirect url with single lookup"""
+        c1 = self.CategoryModel.objects.get(pk=self.c1.pk)
+        c1.slug = 'flats'
+        c1.save()
+        c2 = self.CategoryModel.objects.get(pk=self.c2.pk)
+        c2.slug = 'buy'
+        c2.save()
+        self.assertEqual(sorted(CategoryRedirect.objects.values_list('path', flat=True)),
+                         ['flat', 'flat/flatbuy', 'flats/flatbuy', 'realty/flat', 'realty/flat/flatbuy',
+                          'realty/flats/flatbuy'])
+        self.assertEqual(set(CategoryRedirect.objects.values_list('category_id', flat=True)), {c1.pk, c2.pk})
+
+        with self.assertNumQueries(2):
+            path = Path(path='realty/flat/flatbuy/brick/')
+        self.assertIsNone(path.category)
+        self.assertEqual(path.redirect_url, 'flats/buy/brick/')
+        self.assertEqual(Path(path='flat/').redirect_url, 'flats/')
+        self.assertEqual(Path(path='flat/flatbuy/' + self.item.slug).redirect_url, 'flats/buy/' + self.item.slug + '/')
+        self.assertIsNone(Path(path='flats/buy/').redirect_url)
+        self.assertIsNone(Path(path='unknown/').redirect_url)
+        # item slug with delimiter in name part
+        slug = 'big_flat_' + 'x' * settings.DJCAT_ITEM_UID_LENGTH
+        self.assertEqual(Path(path='flat/flatbuy/' + slug).redirect_url, 'flats/buy/' + slug + '/')
+
+        # old path is live again
+        c1 = self.CategoryModel.objects.get(pk=self.c1.pk)
+        c1.slug = 'flat'
+        c1.save()
+        self.assertEqual(Path(path='flat/').category, c1)
+        self.assertFalse(CategoryRedirect.objects.filter(path='flat').exists())
+        self.assertEqual(Path(path='flats/buy/').redirect_url, 'flat/buy/')
+
+    def test_redirects_choices_clash(self):
+        """Test stale path of category whose slug is choices slug"""
+        brick = self.create_category(name="Brick", parent=self.c, is_active=True)
+        brick = self.CategoryModel.objects.get(pk=brick.pk)
+        brick.slug = 'bricks'
+        brick.save()
+        self.assertEqual(Path(path='realty/brick/').redirect_url, 'realty/bricks/')
+
     def test_parse_query(self):
         """Test resolve & parse query"""
 
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_djcat
+------------
+
+Query budget tests for `djcat` hot paths: query counts must not grow with catalog or subtree size.
+"""
+
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+
+from django.apps import apps
+from django.conf import settings
+
+from djcat.path import Path
+from djcat.register import CatalogItem
+
+ITEM_CLASS = 'catalog_module_realty.models.FlatBuy'
+SIZES = (1, 3, 8)
+ITEMS_PER_ENDPOINT = 2
+
+
+class QueryBudgetMixin:
+    """
+    Runs operation on catalogs of different sizes and checks query count is the same and fits budget
+    """
+    def count_queries(self, func, *args):
+        with CaptureQueriesContext(connection) as context:
+            func(*args)
+        return len(context)
+
+    def assertQueryBudget(self, build, operation, budget, sizes=SIZES):
+        """
+        :param build: Callable(size) - create catalog of given size, return context passed to operation
+        :param operation: Callable(context) - measured operation
+        :param budget: Integer, max queries
+        :param sizes: Catalog sizes
+        """
+        counts = []
+        for size in sizes:
+            context = build(size)
+            counts.append(self.count_queries(operation, context))
+        self.assertEqual(len(set(counts)), 1, 'Query count grows with catalog size: {}'.format(
+            dict(zip(sizes, counts))))
+        self.assertLessEqual(counts[0], budget, 'Query budget {} exceeded: {}'.format(budget, counts[0]))
+
+
+class TestQueryBudgetCase(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        self.CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+        self.item_class = CatalogItem.get_item_by_class(ITEM_CLASS)
+        self.is_mptt = hasattr(self.CategoryModel, '_mptt_meta')
+
+    def create_category(self, **kwargs):
+        return self.CategoryModel.objects.create(**kwargs)
+
+    def build_catalog(self, size):
+        """
+        Build tree: root -> size inner nodes -> size endpoints each with ITEMS_PER_ENDPOINT items
+        :return: Dictionary with created instances
+        """
+        root = self.create_category(name='root{}'.format(size), is_active=True)
+        inner, endpoints, items = [], [], []
+        for x in range(size):
+            node = self.create_category(name='inner{}-{}'.format(size, x), parent=root, is_active=True)
+            inner.append(node)
+            for y in range(size):
+                endpoint = self.create_category(name='endpoint{}-{}-{}'.format(size, x, y), parent=node,
+                                                is_active=True, is_unique_in_path=True, item_class=ITEM_CLASS)
+                endpoints.append(endpoint)
+                for z in range(ITEMS_PER_ENDPOINT):
+                    items.append(self.item_class.class_obj.objects.create(
+                        category=endpoint, price=z, active=True, building_type=1, room=2))
+        other = self.create_category(name='other{}'.format(size), is_active=True)
+        return {'root': root, 'inner': inner, 'endpoints': endpoints, 'items': items, 'other': other}
+
+    def refresh(self, node):
+        return self.CategoryModel.objects.get(pk=node.pk)
+
+    def test_resolve_category(self):
+        self.assertQueryBudget(self.build_catalog, lambda c: Path(path=c['endpoints'][-1].get_url()), 1)
+
+    def test_resolve_mixed(self):
+        self.assertQueryBudget(self.build_catalog, lambda c: Path(path=c['endpoints'][-1].get_url() + 'brick/'), 1)
+
+    def test_resolve_item(self):
+        self.assertQueryBudget(self.build_catalog, lambda c: Path(path=c['items'][-1].get_url()), 2)
+
+    def test_save_leaf(self):
+        def build(size):
+            c = self.build_catalog(size)
+            c['leaf'] = self.refresh(c['endpoints'][-1])
+            c['leaf'].name = 'renamed leaf{}'.format(size)
+            return c
+        self.assertQueryBudget(build, lambda c: c['leaf'].save(), 8)
+
+    def test_rename_inner_node(self):
+        def build(size):
+            c = self.build_catalog(size)
+            c['node'] = self.refresh(c['inner'][0])
+            c['node'].slug = 'renamed{}'.format(size)
+            return c
+        # materialized path node save reads stored tree paths of node and parent
+        self.assertQueryBudget(build, lambda c: c['node'].save(), 12 if self.is_mptt else 14)
+
+    def test_move_subtree(self):
+        def build(size):
+            c = self.build_catalog(size)
+            c['node'] = self.refresh(c['inner'][0])
+            c['node'].parent = c['other']
+            return c
+        self.assertQueryBudget(build, lambda c: c['node'].save(), 16 if self.is_mptt else 17)
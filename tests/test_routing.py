@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_djcat
+------------
+
+Tests for `djcat` catalog path routing.
+"""
+
+from django.test import TestCase, RequestFactory
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+
+from django.apps import apps
+from django.conf import settings
+
+from djcat.index import CategoryIndex
+from djcat.routing import classify, catalog_dispatch, CatalogPathConverter, ROUTE_CATEGORY, ROUTE_ATTRIBUTES, \
+    ROUTE_ITEM
+from djcat.register import CatalogItem
+from djcat.path import Path
+
+
+class TestRoutingCase(TestCase):
+    """Catalog path classification and dispatch test"""
+
+    def setUp(self):
+        cache.clear()
+        self.c = self.create_category(name="Realty", is_active=True)
+        self.c1 = self.create_category(name="Flat", parent=self.c, is_unique_in_path=True, is_active=True)
+        self.c2 = self.create_category(name="Flatbuy", parent=self.c1, is_active=True,
+                                       item_class='catalog_module_realty.models.FlatBuy')
+        self.item_class = CatalogItem.get_item_by_class(self.c2.item_class)
+        self.item = self.item_class.class_obj.objects.create(category=self.c2, price=11, active=True,
+                                                             building_type=1, room=2)
+        self.index = CategoryIndex.build()
+
+    def create_category(self, **kwargs):
+        self.CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+        c = self.CategoryModel.objects.create(**kwargs)
+        c.refresh_from_db()
+        return c
+
+    def test_classify(self):
+        with self.assertNumQueries(0):
+            for path, kind, pk in [('realty', ROUTE_CATEGORY, self.c.pk),
+                                   ('flatbuy/', ROUTE_CATEGORY, self.c2.pk),
+                                   ('/realty/flat/flatbuy/', ROUTE_CATEGORY, self.c2.pk),
+                                   ('flat/flatbuy/brick/1roomed', ROUTE_ATTRIBUTES, self.c2.pk),
+                                   (self.item.get_url(), ROUTE_ITEM, self.c2.pk),
+                                   ('flatbuy/' + self.item.slug, ROUTE_ITEM, self.c2.pk)]:
+                route = classify(path, self.index)
+                self.assertEqual((route.kind, route.node.pk), (kind, pk), path)
+
+            self.assertEqual(classify('flat/flatbuy/brick/1roomed', self.index).attr_slugs, ['brick', '1roomed'])
+            self.assertEqual(classify(self.item.get_url(), self.index).item_slug, self.item.slug)
+            for path in ('', '/', 'unknown', 'flat/unknown', 'brick/1roomed', 'realty/brick',
+                         'flat/flatbuy/brick/unknown', 'realty/' + self.item.slug, 'unknown/' + self.item.slug):
+                self.assertIsNone(classify(path, self.index), path)
+
+    def test_classify_agrees_with_path(self):
+        """Item slugs are told from category slugs the same way by classify() and Path"""
+        # delimiter in name part of item slug and in category slug
+        self.item_class.class_obj.objects.filter(pk=self.item.pk).update(slug='big_flat_' + self.item.uid)
+        c3 = self.create_category(name="Garage", parent=self.c, is_active=True)
+        c3.slug = 'old_garage'
+        c3.save()
+        index = CategoryIndex.build()
+        for path, kind, pk in [('flat/flatbuy/big_flat_' + self.item.uid, ROUTE_ITEM, self.c2.pk),
+                               ('realty/old_garage', ROUTE_CATEGORY, c3.pk)]:
+            route = classify(path, index)
+            self.assertEqual((route.kind, route.node.pk), (kind, pk), path)
+            resolved = Path(path=path)
+            self.assertEqual(resolved.category.pk, pk, path)
+            self.assertEqual(resolved.item.pk if resolved.item else None,
+                             self.item.pk if kind == ROUTE_ITEM else None, path)
+        # item slug form after category that has no items
+        path = 'realty/garage_' + self.item.uid
+        self.assertIsNone(classify(path, index))
+        self.assertIsNone(Path(path=path).category)
+
+    def test_classify_choices_clash(self):
+        brick = self.create_category(name="Brick", parent=self.c, is_active=True)
+        index = CategoryIndex.build()
+        with self.assertNumQueries(0):
+            route = classify('realty/brick', index)
+            self.assertEqual((route.kind, route.node.pk), (ROUTE_CATEGORY, brick.pk))
+            # attributes slugs are peeled off the end only
+            self.assertEqual(classify('realty/flat/flatbuy/brick', index).node.pk, self.c2.pk)
+            self.assertIsNone(classify('flat/brick/flatbuy', index))
+            self.assertIsNone(classify('flat/flatbuy/brick/realty', index))
+
+    def test_route_path(self):
+        with self.assertNumQueries(1):
+            path = classify('flat/flatbuy/brick', self.index).get_path(query='a=pr_f1-t50')
+        self.assertEqual(path.category, self.c2)
+        self.assertEqual(path.attrs[0]['path_value'], 'brick')
+        self.assertEqual(path.attrs[1]['query_value'], [{'from': 1, 'to': 50}])
+
+        with self.assertNumQueries(2):
+            path = classify(self.item.get_url(), self.index).get_path()
+        self.assertEqual((path.category, path.item), (self.c2, self.item))
+
+        self.item.delete()
+        path = classify(self.item.get_url(), self.index).get_path()
+        self.assertIsNone(path.category)
+
+    def test_dispatch(self):
+        def handler(name):
+            return lambda request, route: HttpResponse('{}:{}'.format(name, route.node.pk))
+
+        view = catalog_dispatch(handler('category'), item=handler('item'))
+        request = RequestFactory().get('/')
+        self.assertEqual(view(request, path='flat/flatbuy/').content.decode(), 'category:{}'.format(self.c2.pk))
+        self.assertEqual(view(request, path='flat/flatbuy/brick/').content.decode(), 'category:{}'.format(self.c2.pk))
+        self.assertEqual(view(request, path=self.item.get_url()).content.decode(), 'item:{}'.format(self.c2.pk))
+        with self.assertNumQueries(0):
+            self.assertRaises(Http404, view, request, path='unknown/path/')
+
+        view = catalog_dispatch(handler('category'), attributes=handler('attributes'))
+        self.assertEqual(view(request, path='flat/flatbuy/brick/').content.decode(),
+                         'attributes:{}'.format(self.c2.pk))
+        self.assertRaises(Http404, view, request, path=self.item.get_url())
+
+    def test_converter(self):
+        converter = CatalogPathConverter()
+        route = converter.to_python('flat/flatbuy')
+        self.assertEqual(route.node.pk, self.c2.pk)
+        self.assertEqual(converter.to_url(route), 'flat/flatbuy')
+        self.assertRaises(ValueError, converter.to_python, 'unknown')
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_djcat
+------------
+
+Tests for `djcat` search module.
+"""
+
+import threading
+
+from django.test import TransactionTestCase
+
+from django.apps import apps
+from django.conf import settings
+
+from djcat.register import CatalogItem
+from djcat.search import search, search_items
+from djcat import search as search_module
+
+
+class TestSearchCase(TransactionTestCase):
+    """Search fan-out test, querysets run in worker threads with own connections, so data must be committed"""
+
+    def setUp(self):
+        self.CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+        self.c = self.CategoryModel.objects.create(name="Realty", is_active=True)
+        self.c1 = self.CategoryModel.objects.create(name="Flatbuy", parent=self.c, is_active=True,
+                                                    item_class='catalog_module_realty.models.FlatBuy')
+        self.item_class = CatalogItem.get_item_by_class(self.c1.item_class)
+        self.items = []
+        for x, price in enumerate([5, 1, 9, 3, 7, 2]):
+            self.items.append(self.item_class.class_obj.objects.create(
+                category=self.c1, price=price, active=bool(x % 3), building_type=1 + x % 2, room=2))
+
+    def test_search(self):
+        threads = set()
+        fetch = search_module.fetch
+
+        def tracked_fetch(*args):
+            threads.add(threading.get_ident())
+            return fetch(*args)
+
+        objects = self.item_class.class_obj.objects
+        search_module.fetch = tracked_fetch
+        try:
+            found = search([objects.filter(building_type=1), objects.filter(building_type=2)],
+                           order_by='price', limit=4)
+        finally:
+            search_module.fetch = fetch
+        self.assertEqual([i.price for i in found], [1, 2, 3, 5])
+        self.assertTrue(threads)
+        self.assertNotIn(threading.get_ident(), threads)
+
+        found = search([objects.filter(building_type=1), objects.filter(building_type=2)], order_by='-price', limit=3)
+        self.assertEqual([i.price for i in found], [9, 7, 5])
+
+    def test_search_items(self):
+        found = search_items(order_by='-pk', with_categories=True)
+        self.assertEqual(found, [i for i in reversed(self.items) if i.active])
+        with self.assertNumQueries(0):
+            self.assertEqual({i.category.pk for i in found}, {self.c1.pk})
+
+        found = search_items(lambda qs: qs.filter(price__gte=5), order_by='price', active=None)
+        self.assertEqual([i.price for i in found], [5, 7, 9])
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_djcat
+------------
+
+Tests for `djcat` sitemap module.
+"""
+
+import os
+import tempfile
+
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+
+from django.apps import apps
+from django.conf import settings
+
+from djcat.register import CatalogItem
+from djcat.sitemap import iter_urls, iter_attr_urls, iter_item_urls, write_sitemaps
+
+
+class TestSitemapCase(TestCase):
+    """Sitemap test"""
+
+    def setUp(self):
+        self.c = self.create_category(name="Realty", is_active=True)
+        self.c1 = self.create_category(name="Flat", parent=self.c, is_unique_in_path=True, is_active=True)
+        self.c2 = self.create_category(name="Flatbuy", parent=self.c1, is_active=True,
+                                       item_class='catalog_module_realty.models.FlatBuy')
+        self.item_class = CatalogItem.get_item_by_class(self.c2.item_class)
+        self.item = self.item_class.class_obj.objects.create(category=self.c2, price=11, active=True,
+                                                             building_type=1, room=2)
+
+    def create_category(self, **kwargs):
+        self.CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+        c = self.CategoryModel.objects.create(**kwargs)
+        c.refresh_from_db()
+        return c
+
+    def test_urls(self):
+        urls = list(iter_urls())
+        self.assertIn('realty/', urls)
+        self.assertIn('flat/flatbuy/', urls)
+        self.assertIn('flat/flatbuy/brick/', urls)
+        self.assertIn('flat/flatbuy/panel/', urls)
+        self.assertIn('flat/flatbuy/{}/'.format(self.item.slug), urls)
+
+    def test_skip_empty(self):
+        urls = list(iter_attr_urls(skip_empty=True))
+        self.assertEqual(urls, ['flat/flatbuy/brick/', 'flat/flatbuy/1roomed/'])
+
+    def test_skip_empty_queries(self):
+        """Values of items are read with one query per endpoint category whatever the number of choices"""
+        self.create_category(name="Flatsell", parent=self.c1, is_active=True,
+                             item_class='catalog_module_realty.models.FlatBuy')
+        self.item_class.class_obj.objects.create(category=self.c2, price=12, active=True, building_type=2, room=1)
+        self.item_class.class_obj.objects.create(category=self.c2, price=13, active=False, building_type=3, room=3)
+        with CaptureQueriesContext(connection) as queries:
+            list(iter_attr_urls())
+        with self.assertNumQueries(len(queries) + 2):
+            urls = list(iter_attr_urls(skip_empty=True))
+        self.assertEqual(urls, ['flat/flatbuy/brick/', 'flat/flatbuy/panel/', 'flat/flatbuy/studio/',
+                                'flat/flatbuy/1roomed/'])
+
+    def test_items_chunks(self):
+        for x in range(4):
+            self.item_class.class_obj.objects.create(category=self.c2, price=x, active=True, building_type=2, room=1)
+        self.item_class.class_obj.objects.create(category=self.c2, price=1, active=False, building_type=2, room=1)
+        self.assertEqual(len(list(iter_item_urls(chunk_size=2))), 5)
+
+    def test_write_sitemaps(self):
+        with tempfile.TemporaryDirectory() as directory:
+            files = write_sitemaps(directory, 'http://example.com/', max_urls=5)
+            total = len(list(iter_urls()))
+            self.assertEqual(len(files), (total + 4) // 5)
+            with open(os.path.join(directory, 'sitemap-1.xml')) as f:
+                content = f.read()
+            self.assertEqual(content.count('<url>'), 5)
+            self.assertIn('<loc>http://example.com/realty/</loc>', content)
+            with open(os.path.join(directory, 'sitemap.xml')) as f:
+                content = f.read()
+            self.assertIn('<loc>http://example.com/sitemap-1.xml</loc>', content)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_djcat
+------------
+
+Tests for `djcat` catalog export and import.
+"""
+
+import os
+import json
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.test import TestCase
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from django.apps import apps
+from django.conf import settings
+
+from djcat import transfer
+from djcat.register import CatalogItem
+from djcat.models import CategoryPath
+from djcat.transfer import export_catalog, import_catalog
+from djcat.utils import get_tree_fields
+from djcat.exceptions import *
+
+
+class TestTransferCase(TestCase):
+    """Export and import test"""
+    multi_db = True
+
+    def setUp(self):
+        self.CategoryModel = apps.get_model(settings.DJCAT_CATEGORY_MODEL)
+        # roots are created in name order, so sibling order is the same for MPTT and materialized path trees
+        self.c3 = self.CategoryModel.objects.create(name="Auto", is_active=False)
+        self.c = self.CategoryModel.objects.create(name="Realty", is_active=True)
+        self.c1 = self.CategoryModel.objects.create(name="Flat", parent=self.c, is_active=True)
+        self.c2 = self.CategoryModel.objects.create(name="Flatbuy", parent=self.c1, is_active=True,
+                                                    item_class='catalog_module_realty.models.FlatBuy')
+        self.item_class = CatalogItem.get_item_by_class(self.c2.item_class)
+        for x, price in enumerate([5, 1, 9]):
+            self.item_class.class_obj.objects.create(category=self.c2, price=price, active=bool(x % 2),
+                                                     building_type=1 + x % 2, room=2)
+
+    def snapshot(self):
+        categories = list(self.CategoryModel.objects.order_by('pk').values_list(
+            'pk', 'parent_id', 'name', 'slug', 'url', 'ancestors', 'is_active', 'item_count',
+            *get_tree_fields(self.CategoryModel)))
+        items = list(self.item_class.class_obj.objects.order_by('pk').values_list(
+            'pk', 'name', 'slug', 'uid', 'url', 'active', 'object_id', 'price', 'building_type', 'room'))
+        paths = sorted(CategoryPath.objects.values_list('path', 'category_id'))
+        return categories, items, paths
+
+    def clear(self):
+        self.item_class.class_obj.objects.all().delete()
+        self.CategoryModel.objects.all().delete()
+
+    def test_export_import(self):
+        before = self.snapshot()
+        out = StringIO()
+        self.assertEqual(export_catalog(out, chunk_size=2), {'categories': 4, 'items': 3})
+        lines = out.getvalue().splitlines(True)
+        self.assertEqual(len(lines), 8)
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(records[0]['type'], 'header')
+        self.assertEqual([r['fields']['name'] for r in records[1:5]], ['Auto', 'Realty', 'Flat', 'Flatbuy'])
+        self.assertNotIn('url', records[1]['fields'])
+        self.assertEqual(records[5]['fields']['building_type'], 1)
+
+        self.clear()
+        self.assertEqual(import_catalog(iter(lines), batch_size=2), {'categories': 4, 'items': 3})
+        self.assertEqual(self.snapshot(), before)
+        for root in self.CategoryModel.objects.filter(parent__isnull=True):
+            diff = self.CategoryModel.objects.rebuild_tree(root, write=False)
+            self.assertEqual((diff['urls'], diff['ancestors'], diff['stale'], diff['missing']), ([], [], [], []))
+        # imported tree takes regular saves
+        c = self.CategoryModel.objects.create(name="Room", parent=self.CategoryModel.objects.get(pk=self.c.pk))
+        self.assertEqual(c.url, 'realty/room/')
+
+    def test_import_errors(self):
+        out = StringIO()
+        export_catalog(out)
+        lines = out.getvalue().splitlines(True)
+        with self.assertRaises(CatalogImportError):
+            import_catalog(iter(lines))
+        self.clear()
+        with self.assertRaises(CatalogImportError):
+            import_catalog(iter(lines[1:]))
+        bad = json.loads(lines[-1])
+        bad['class'] = 'catalog_module_realty.models.Unknown'
+        with self.assertRaises(CatalogImportError):
+            import_catalog(iter(lines[:-1] + [json.dumps(bad)]))
+        # malformed records
+        header, category = lines[0], json.loads(lines[1])
+        for key in ('fields', 'class'):
+            bad = json.loads(lines[-1])
+            del bad[key]
+            with self.assertRaises(CatalogImportError):
+                import_catalog(iter([header, json.dumps(bad)]))
+        del category['fields']
+        with self.assertRaises(CatalogImportError):
+            import_catalog(iter([header, json.dumps(category)]))
+        with self.assertRaises(CatalogImportError):
+            import_catalog(iter(['\n', '\n']))
+        self.assertFalse(self.CategoryModel.objects.exists())
+
+        # blank lines before header are skipped
+        self.assertEqual(import_catalog(iter(['\n'] + lines)), {'categories': 4, 'items': 3})
+
+    def test_import_using(self):
+        """Import with rebuild of trees goes to database of category model writes"""
+        out = StringIO()
+        export_catalog(out)
+        lines = out.getvalue().splitlines(True)
+        with mock.patch.object(transfer.router, 'db_for_write', return_value='replica'):
+            import_catalog(iter(lines))
+        self.assertEqual(self.CategoryModel.objects.using('replica').get(pk=self.c2.pk).url, self.c2.url)
+        self.assertEqual(sorted(CategoryPath.objects.using('replica').values_list('path', flat=True)),
+                         sorted(CategoryPath.objects.values_list('path', flat=True)))
+        items = self.item_class.class_obj.objects
+        self.assertEqual(list(items.using('replica').order_by('pk').values_list('url', flat=True)),
+                         list(items.order_by('pk').values_list('url', flat=True)))
+
+    def test_commands(self):
+        before = self.snapshot()
+        fd, path = tempfile.mkstemp(suffix='.ndjson')
+        os.close(fd)
+        try:
+            out = StringIO()
+            call_command('djcat_export', output=path, stdout=out)
+            self.assertIn('4 categories, 3 items', out.getvalue())
+            with self.assertRaises(CommandError):
+                call_command('djcat_import', path, stdout=StringIO())
+            self.clear()
+            out = StringIO()
+            call_command('djcat_import', path, stdout=out)
+            self.assertIn('4 categories, 3 items imported', out.getvalue())
+        finally:
+            os.remove(path)
+        self.assertEqual(self.snapshot(), before)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_djcat
+------------
+
+Tests for `djcat` materialized path tree backend.
+"""
+
+from django.test import TestCase
+
+from catalog.models import PathNode
+from djcat.exceptions import *
+
+
+class TestMaterializedPathCase(TestCase):
+    """Materialized path tree test"""
+
+    def setUp(self):
+        self.root = PathNode.objects.create(name='root')
+        self.a = PathNode.objects.create(name='a', parent=self.root)
+        self.b = PathNode.objects.create(name='b', parent=self.a)
+        self.c = PathNode.objects.create(name='c', parent=self.b)
+        self.other = PathNode.objects.create(name='other')
+
+    def test_create(self):
+        self.assertEqual(self.root.level, 0)
+        self.assertEqual(self.c.level, 3)
+        self.assertEqual(self.c.tree_id, self.root.pk)
+        self.assertTrue(self.c.tree_path.startswith(self.b.tree_path))
+        self.assertEqual(self.c.get_root(), self.root)
+        self.assertTrue(self.root.is_root_node())
+        self.assertTrue(self.c.is_descendant_of(self.a))
+
+    def test_queries(self):
+        self.assertEqual(list(self.c.get_ancestors()), [self.root, self.a, self.b])
+        self.assertEqual(list(self.c.get_ancestors(ascending=True, include_self=True)),
+                         [self.c, self.b, self.a, self.root])
+        self.assertEqual(list(self.a.get_descendants()), [self.b, self.c])
+        self.assertEqual(list(self.a.get_descendants(include_self=True)), [self.a, self.b, self.c])
+        self.assertEqual(list(self.b.get_family()), [self.root, self.a, self.b, self.c])
+        self.assertEqual(list(self.root.get_children()), [self.a])
+
+    def test_insert_constant_queries(self):
+        with self.assertNumQueries(3):
+            PathNode.objects.create(name='d', parent=self.c)
+        with self.assertNumQueries(3):
+            PathNode.objects.create(name='e', parent=self.root)
+
+    def test_move(self):
+        self.a.parent = self.other
+        self.a.save()
+        self.c.refresh_from_db()
+        self.assertEqual(self.c.level, 3)
+        self.assertEqual(self.c.get_root(), self.other)
+        self.assertEqual(list(self.c.get_ancestors()), [self.other, self.a, self.b])
+        self.assertEqual(list(self.root.get_descendants()), [])
+
+        self.b.refresh_from_db()
+        self.b.parent = None
+        self.b.save()
+        self.c.refresh_from_db()
+        self.assertEqual(self.c.level, 1)
+        self.assertEqual(self.c.get_root(), self.b)
+
+    def test_invalid_move(self):
+        self.a.parent = self.c
+        self.assertRaises(CategoryInvalidMove, self.a.save)
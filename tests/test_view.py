@@ -58,6 +58,14 @@ class TestViewCase(TestCase):
         self.assertEqual(response.context.get('pr'), [{'to': 50, 'from': 1}])
         self.assertEqual(response.context.get('q'), 'hello')
 
+    def test_catalog_view_redirect(self):
+        c1 = self.CategoryModel.objects.get(slug='flat')
+        c1.slug = 'flats'
+        c1.save()
+        response = self.client.get('/flat/flatbuy/brick/?a=pr_f1-t50')
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(response['Location'], '/flats/flatbuy/brick/?a=pr_f1-t50')
+
     def test_catalog_view_get_item(self):
         response = self.client.get('/flat/flatbuy/'+self.item.slug+'/')
         self.assertEqual(response.context.get('item'), self.item.name)
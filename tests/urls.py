@@ -2,5 +2,6 @@ from django.conf.urls import url, include
 
 
 urlpatterns = [
+    url(r'^djcat/', include('djcat.urls', namespace='djcat')),
     url(r'', include('catalog.urls', namespace='catalog')),
-]
\ No newline at end of file
+]